@@ -1,6 +1,9 @@
 from fastapi import APIRouter
-from .endpoints import words, reviews
+from .endpoints import words, reviews, jobs, sync, export
 
 api_router = APIRouter()
 api_router.include_router(words.router, prefix="/words", tags=["words"])
 api_router.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
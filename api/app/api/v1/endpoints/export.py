@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+
+from app.core.responses import choose_encoding
+from app.services.export import csv_chunks, export_rows, gzipped, ndjson_chunks
+
+router = APIRouter()
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get("")
+async def export_deck(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    language: Optional[str] = Query(None, description="Only this language (default: all)"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Every word with its review state, as NDJSON (one object per line) or CSV.
+
+    Streamed from a server-side cursor, so any deck size works. The body is
+    gzipped on the fly (`Content-Encoding: gzip`) when the client accepts it.
+    """
+    chunks = export_rows(language)
+    body = ndjson_chunks(chunks) if format == "ndjson" else csv_chunks(chunks)
+    headers = {"Content-Disposition": f'attachment; filename="nekowords-{language or "all"}.{format}"'}
+    if choose_encoding(accept_encoding, offered=("gzip",)):
+        body = gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
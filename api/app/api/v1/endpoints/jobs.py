@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+from datetime import datetime
+import uuid
+from pydantic import BaseModel
+
+from app.core.db import get_session
+from app.models.job import EnrichmentJob
+from app.models.word import Word
+
+router = APIRouter()
+
+class JobStatus(BaseModel):
+    id: uuid.UUID
+    word: str
+    language: str
+    status: str  # queued, running, done, failed
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    result: Optional[Word] = None
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    job = await session.get(EnrichmentJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = await session.get(Word, job.word_id) if job.word_id else None
+    return JobStatus(**job.model_dump(exclude={"word_id", "run_after"}), result=result)
@@ -1,139 +1,259 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from sqlmodel import select
+from sqlalchemy import tuple_
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List, Any
-from datetime import datetime, timezone, timedelta
-from pydantic import BaseModel
+from typing import List, Any, Literal, Optional
+from datetime import date, datetime, timezone, timedelta
+import base64
+import json
+import uuid
+from pydantic import BaseModel, Field
 
-from app.core.db import get_session
+from app.core.db import get_read_session, get_session
+from app.core.responses import CompactJSONResponse
 from app.models.review import Review
+from app.models.review_forecast import ReviewForecast
 from app.models.word import Word
+from app.services.reviewing import apply_grades, log_grade, undo_grade
 
 router = APIRouter()
 
-@router.get("/due", response_model=List[dict])
+def _encode_cursor(streak: int, ease_factor: float, interval: int, word_id: uuid.UUID) -> str:
+    key = [streak, ease_factor, interval, str(word_id)]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        streak, ease_factor, interval, word_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(streak), float(ease_factor), int(interval), uuid.UUID(word_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+class DueWord(BaseModel):
+    id: uuid.UUID
+    word: str
+    translation: str
+    examples: List[dict]
+
+class DueReview(BaseModel):
+    version: int
+    interval: int
+    ease_factor: float
+    streak: int
+    next_review_at: datetime
+    last_reviewed_at: Optional[datetime] = None
+
+class DueCard(BaseModel):
+    word: DueWord
+    review: DueReview
+
+# Columns a client can ask for with `fields=`
+DUE_FIELDS = {
+    "word.id": Word.id,
+    "word.word": Word.word,
+    "word.language": Word.language,
+    "word.translation": Word.translation,
+    "word.examples": Word.examples,
+    "word.created_at": Word.created_at,
+    "review.word_id": Review.word_id,
+    "review.language": Review.language,
+    "review.version": Review.version,
+    "review.interval": Review.interval,
+    "review.ease_factor": Review.ease_factor,
+    "review.streak": Review.streak,
+    "review.next_review_at": Review.next_review_at,
+    "review.last_reviewed_at": Review.last_reviewed_at,
+}
+DEFAULT_DUE_FIELDS = [
+    f"{group}.{name}" for group, model in (("word", DueWord), ("review", DueReview)) for name in model.model_fields
+]
+
+def _due_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return DEFAULT_DUE_FIELDS
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in DUE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(DUE_FIELDS)})",
+        )
+    return names or DEFAULT_DUE_FIELDS
+
+@router.get(
+    "/due",
+    response_model=List[DueCard],
+    response_description="DueCard objects with the default fields; with `fields`, partial cards holding only those",
+)
 async def get_due_reviews(
     limit: int = 50, 
     language: str = "en", 
-    session: AsyncSession = Depends(get_session)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated subset, e.g. word.word,word.translation,review.version"
+    ),
+    accept_encoding: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_read_session)
 ):
+    """Due cards, hardest first. Walks the ix_reviews_due_queue index.
+
+    Only the columns a review screen needs are selected (see DueCard), or the
+    ones listed in `fields`; words are not joined when no word field is asked
+    for. With `fields` the cards are partial: they hold the listed fields only
+    (`{"word": {"word": ..., "translation": ...}, "review": {"version": ...}}`)
+    and don't match the DueCard schema. The page is serialized as is
+    (CompactJSONResponse, orjson) and compressed when large and the client
+    accepts it.
+
+    When a full page is returned, the `X-Next-Cursor` header holds the cursor
+    for the next page (keyset pagination on the queue order).
+
+    Read from the replica when one is configured: a card's `version` can be
+    up to DB_REPLICA_MAX_LAG_SECONDS behind, and grading it then gets a 409
+    whose `detail.review` has the current version to grade again with.
+    """
+    names = _due_fields(fields)
     now = datetime.utcnow()
+    queue_key = tuple_(Review.streak, Review.ease_factor, Review.interval, Review.word_id)
     statement = (
-        select(Review, Word)
-        .join(Word)
-        .where(Word.language == language)
+        select(Review.streak, Review.ease_factor, Review.interval, Review.word_id, *(DUE_FIELDS[name] for name in names))
+        .where(Review.language == language)
         .where(Review.next_review_at <= now)
-        .order_by(Review.streak.asc(), Review.ease_factor.asc(), Review.interval.asc())
+        .order_by(Review.streak.asc(), Review.ease_factor.asc(), Review.interval.asc(), Review.word_id.asc())
         .limit(limit)
     )
-    results = await session.exec(statement)
-    
+    if any(name.startswith("word.") for name in names):
+        statement = statement.join(Word, Word.id == Review.word_id)
+    if cursor:
+        statement = statement.where(queue_key > tuple_(*_decode_cursor(cursor)))
+    rows = (await session.exec(statement)).all()
+
+    keys = [name.split(".") for name in names]
     output = []
-    for review, word in results:
-        output.append({
-            "review": review,
-            "word": word
-        })
-    return output
+    for row in rows:
+        card = {}
+        for (group, name), value in zip(keys, row[4:]):
+            card.setdefault(group, {})[name] = value
+        output.append(card)
+    headers = {}
+    if rows and len(rows) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(*rows[-1][:4])
+    return CompactJSONResponse(output, headers=headers, accept_encoding=accept_encoding)
+
+class ForecastDay(BaseModel):
+    date: date
+    due: int
+
+@router.get("/forecast", response_model=List[ForecastDay])
+async def get_review_forecast(
+    days: int = Query(30, ge=1, le=365),
+    language: str = "en",
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Cards due on each of the next `days` days (UTC), today first.
+
+    Read from the review_forecast counters, so the cost does not depend on the
+    size of the deck. Today's count includes every overdue card.
+    """
+    today = datetime.utcnow().date()
+    statement = (
+        select(ReviewForecast.day, ReviewForecast.due_count)
+        .where(ReviewForecast.language == language)
+        .where(ReviewForecast.day < today + timedelta(days=days))
+    )
+    counts = [0] * days
+    for day, due_count in await session.exec(statement):
+        counts[max(0, (day - today).days)] += due_count
+    return [ForecastDay(date=today + timedelta(days=i), due=count) for i, count in enumerate(counts)]
 
 class ReviewLog(BaseModel):
     grade: str # again, hard, good, easy
+    # Card version the grade was given on (`review.version` from GET /reviews/due)
+    version: Optional[int] = None
+    # Client-chosen; resubmitting the same key does not apply the grade twice
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=64)
+
+class BatchReviewItem(BaseModel):
+    word_id: uuid.UUID
+    grade: Literal["again", "hard", "good", "easy"]
+    reviewed_at: datetime  # client clock, UTC
+    idempotency_key: str = Field(min_length=1, max_length=64)
+
+class BatchReviewLog(BaseModel):
+    items: List[BatchReviewItem] = Field(max_length=1000)
+
+class BatchReviewResult(BaseModel):
+    idempotency_key: str
+    word_id: uuid.UUID
+    status: Literal["applied", "duplicate", "stale", "not_found"]
+    next_review_at: Optional[datetime] = None
+
+@router.post("/batch-log", response_model=List[BatchReviewResult])
+async def batch_log_reviews(
+    batch: BatchReviewLog,
+    session: AsyncSession = Depends(get_session)
+):
+    """Apply many grades in one transaction.
+
+    Items are applied in `reviewed_at` order. An idempotency key that was
+    already applied is reported as "duplicate" and not applied again, so a
+    client can safely resend a batch after a timeout. Conflict rule: the most
+    recent review wins; a grade older than the card's last review (e.g. from
+    another device) is reported as "stale" and ignored. See `apply_grades`.
+    """
+    results, _ = await apply_grades(session, batch.items)
+    return results
 
 @router.post("/{word_id}/log")
 async def log_review(
-    word_id: str, 
+    word_id: uuid.UUID, 
     log: ReviewLog, 
     session: AsyncSession = Depends(get_session)
 ):
-    review = await session.get(Review, word_id)
-    if not review:
+    """Grade one card.
+
+    With `version`, the grade is only applied if the card has not been
+    written since (e.g. graded on another device); otherwise the response is
+    409 with the card's current state. A resent `idempotency_key` returns
+    status "duplicate" and changes nothing. See `log_grade`.
+    """
+    status, review = await log_grade(session, word_id, log.grade, log.version, log.idempotency_key)
+    if status == "not_found":
         raise HTTPException(status_code=404, detail="Review not found")
-    
-    now = datetime.utcnow()
-    review.last_reviewed_at = now
-    
-    # Grading Logic
-    quality = 3
-    if log.grade == "again": quality = 0
-    elif log.grade == "hard": quality = 2
-    elif log.grade == "good": quality = 4
-    elif log.grade == "easy": quality = 5
-    
-    if quality < 3:
-        review.streak = 0
-        review.interval = 1
-        review.next_review_at = now + timedelta(minutes=1)
-    else:
-        if review.streak == 0:
-            review.interval = 1
-        elif review.streak == 1:
-            review.interval = 6
-        else:
-            review.interval = int(review.interval * review.ease_factor)
-        
-        review.streak += 1
-        review.ease_factor = review.ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        if review.ease_factor < 1.3: review.ease_factor = 1.3
-        
-        review.next_review_at = now + timedelta(days=review.interval)
-
-    # History Update
-    history_entry = {
-        "date": now.isoformat(),
-        "grade": log.grade,
-        "interval": review.interval,
-        "ease": review.ease_factor
+    if status == "conflict":
+        raise HTTPException(status_code=409, detail={
+            "message": "Card was changed by another review; reload it and grade again",
+            "review": jsonable_encoder(review),
+        })
+    return {
+        "status": "ok" if status == "applied" else status,
+        "next_review": review.next_review_at,
+        "version": review.version,
     }
-    
-    # Ensure list copy
-    current_history = list(review.history) if review.history else []
-    current_history.append(history_entry)
-    review.history = current_history
-    
-    session.add(review)
-    await session.commit()
-    await session.refresh(review)
-    return {"status": "ok", "next_review": review.next_review_at}
 
 @router.post("/{word_id}/undo")
 async def undo_review(
-    word_id: str,
+    word_id: uuid.UUID,
+    version: Optional[int] = Query(None, description="Card version the undo was requested on"),
     session: AsyncSession = Depends(get_session)
 ):
-    """Undo the last review action for a word."""
-    review = await session.get(Review, word_id)
-    if not review:
+    """Undo the last review action for a word.
+
+    With `version`, the undo is only applied if the card has not been
+    written since; otherwise the response is 409 with the card's current
+    state, as for grades. Concurrent undos never delete more than one event
+    for the version they read. See `undo_grade`.
+    """
+    status, review, event = await undo_grade(session, word_id, version)
+    if status == "not_found":
         raise HTTPException(status_code=404, detail="Review not found")
-    
-    if not review.history or len(review.history) == 0:
+    if status == "no_history":
         raise HTTPException(status_code=400, detail="No review history to undo")
-    
-    # Pop the last history entry
-    current_history = list(review.history)
-    popped = current_history.pop()
-    review.history = current_history
-    
-    # Restore previous state
-    if len(current_history) > 0:
-        # Restore from the previous entry
-        prev = current_history[-1]
-        review.interval = prev.get("interval", 0)
-        review.ease_factor = prev.get("ease", 2.5)
-        review.last_reviewed_at = datetime.fromisoformat(prev.get("date")) if prev.get("date") else None
-        # Recalculate streak based on history
-        review.streak = len([h for h in current_history if h.get("grade") not in ["again", "hard"]])
-    else:
-        # Reset to initial state
-        review.interval = 0
-        review.ease_factor = 2.5
-        review.streak = 0
-        review.last_reviewed_at = None
-    
-    # Set next_review_at to now so the card appears again immediately
-    review.next_review_at = datetime.utcnow()
-    
-    session.add(review)
-    await session.commit()
-    await session.refresh(review)
-    
-    return {"status": "ok", "undone_grade": popped.get("grade")}
+    if status == "conflict":
+        raise HTTPException(status_code=409, detail={
+            "message": "Card was changed by another review; reload it and undo again",
+            "review": jsonable_encoder(review),
+        })
+    return {"status": "ok", "undone_grade": event.grade, "version": review.version}
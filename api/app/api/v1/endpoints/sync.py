@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select, text
+from sqlalchemy import tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
+import base64
+import json
+import uuid
+from pydantic import BaseModel
+
+from app.core.db import get_session
+from app.models.review import Review
+from app.models.word import Word
+from app.services.reviewing import apply_grades
+from .reviews import BatchReviewLog, BatchReviewResult
+
+router = APIRouter()
+
+# How the feed works: every insert/update stamps the row with the id of its
+# transaction (sync_xid, set by a trigger). A pass returns rows with
+# sync_xid below the snapshot xmin taken when the pass started: every
+# transaction below xmin has finished, so no row can still appear behind the
+# cursor later. The next pass starts at that xmin.
+
+class ChangeFeed(BaseModel):
+    words: List[Word]
+    reviews: List[Review]
+    cursor: str
+    has_more: bool
+
+class PushResult(BaseModel):
+    results: List[BatchReviewResult]
+    reviews: List[Review]
+
+def _encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded))
+        for table in ("words", "reviews"):
+            xid, key = state[table]
+            state[table] = [int(xid), str(uuid.UUID(key)) if key else None]
+        state["hi"] = int(state["hi"]) if state.get("hi") is not None else None
+        return state
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _after(statement, xid_column, key_column, position: list):
+    xid, key = position
+    if key is None:
+        return statement.where(xid_column >= xid)
+    return statement.where(tuple_(xid_column, key_column) > tuple_(xid, uuid.UUID(key)))
+
+@router.get("/changes", response_model=ChangeFeed)
+async def get_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous response; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    session: AsyncSession = Depends(get_session)
+):
+    """Words and reviews written since `since`, oldest change first.
+
+    Keep calling with the returned cursor while `has_more` is true, then store
+    the cursor for the next sync. Each row is sent in its current state, so a
+    client only needs to upsert.
+    """
+    state = _decode_cursor(since) if since else {"words": [0, None], "reviews": [0, None], "hi": None}
+    if state["hi"] is None:
+        state["hi"] = (await session.exec(
+            text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        )).one()[0]
+    hi = state["hi"]
+
+    words = (await session.exec(
+        _after(select(Word).where(Word.sync_xid < hi), Word.sync_xid, Word.id, state["words"])
+        .order_by(Word.sync_xid, Word.id)
+        .limit(limit)
+    )).all()
+    reviews = (await session.exec(
+        _after(select(Review).where(Review.sync_xid < hi), Review.sync_xid, Review.word_id, state["reviews"])
+        .order_by(Review.sync_xid, Review.word_id)
+        .limit(limit)
+    )).all()
+
+    has_more = len(words) == limit or len(reviews) == limit
+    if words:
+        state["words"] = [words[-1].sync_xid, str(words[-1].id)]
+    if reviews:
+        state["reviews"] = [reviews[-1].sync_xid, str(reviews[-1].word_id)]
+    if not has_more:
+        # Pass complete: the next one picks up everything from xmin on
+        state = {"words": [hi, None], "reviews": [hi, None], "hi": None}
+    return ChangeFeed(words=words, reviews=reviews, cursor=_encode_cursor(state), has_more=has_more)
+
+@router.post("/push", response_model=PushResult)
+async def push_grades(
+    batch: BatchReviewLog,
+    session: AsyncSession = Depends(get_session)
+):
+    """Apply grades logged offline and return the server's state of each card.
+
+    Same rules as POST /reviews/batch-log: applied in `reviewed_at` order,
+    idempotency keys make resending safe, and the most recent review wins.
+    A "stale" grade leaves the card unchanged; the returned review is the
+    state the client must adopt.
+    """
+    results, reviews = await apply_grades(session, batch.items)
+    return PushResult(results=results, reviews=list(reviews.values()))
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
+import asyncio
+import json
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import Any
-from app.core.db import get_session
+from typing import Any, AsyncIterator, List, Literal, Optional
+from app.core.config import settings
+from app.core.db import async_session_factory, get_read_session, get_session
+from app.core.metrics import span
 from app.models.word import Word, WordBase
 from app.models.review import Review
-from app.services.llm import enrich_word
+from app.services.enrichment_cache import (
+    cached_enrich_word, cached_stream_enrich_word, enrichment_cache, normalize_word,
+)
+from app.services.importing import import_stream
+from app.services.jobs import enqueue_job, job_workers
+from app.services.search import WordMatch, search_words
+from app.services.vocabulary import ingest_words, reset_known_word, save_enriched_word
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -15,73 +26,225 @@ class WordInput(BaseModel):
     word: str
     language: str = "en"
 
+class BatchWordInput(BaseModel):
+    words: List[str]
+    language: str = "en"
+
+class BatchItemResult(BaseModel):
+    input: str
+    status: Literal["created", "reset", "failed"]
+    word: Optional[Word] = None
+    error: Optional[str] = None
+
+class ImportResult(BaseModel):
+    rows: int
+    created: int
+    queued: int
+    skipped: int
+    duplicates: int
+    invalid: int
+
 from loguru import logger
 
-@router.post("/", response_model=Word)
+@router.post("/", response_model=Word, responses={202: {"description": "Queued as a background job (async=true)"}})
 async def add_word(
     input: WordInput, 
+    run_async: bool = Query(False, alias="async", description="Queue the enrichment and return 202 with a job id"),
     session: AsyncSession = Depends(get_session)
 ):
     # Normalize input
-    input.word = input.word.strip().lower()
+    input.word = normalize_word(input.word)
+    
+    logger.info("Received add_word request for: {}", input.word)
     
-    logger.info(f"Received add_word request for: {input.word}")
+    if run_async:
+        job = await enqueue_job(session, input.word, input.language)
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": str(job.id), "status": job.status},
+            headers={"Location": f"{settings.API_V1_STR}/jobs/{job.id}"},
+        )
     
-    # Process with LLM first
     try:
-        data = await enrich_word(input.word, input.language)
-        base_word_text = data.get("word", input.word).strip().lower()
-        
-        # Check if the base word already exists
-        statement = select(Word).where(Word.word == base_word_text).where(Word.language == input.language)
-        results = await session.exec(statement)
-        existing_word = results.first()
-        
+        # Known surface form (e.g. "wrote" seen before): skip the LLM entirely
+        with span("lookup"):
+            existing_word = await reset_known_word(session, input.word, input.language)
         if existing_word:
-            logger.info(f"Word '{base_word_text}' already exists. Resetting review status (Forgotten).")
-            # Fetch associated review
-            review_stmt = select(Review).where(Review.word_id == existing_word.id)
-            review_results = await session.exec(review_stmt)
-            review = review_results.first()
-            
-            if review:
-                review.streak = 0
-                review.interval = 0
-                review.next_review_at = datetime.utcnow()
-                review.ease_factor = max(1.3, review.ease_factor - 0.2) # Optional: penalize ease factor slightly
-                session.add(review)
-                await session.commit()
-                await session.refresh(existing_word)
-                return existing_word
-            else:
-                # Should not happen if data integrity is maintained, but handle gracefully
-                # If review doesn't exist for some reason, create it
-                review = Review(word_id=existing_word.id)
-                session.add(review)
-                await session.commit()
-                await session.refresh(existing_word)
-                return existing_word
-
-        # If not exists, create new
-        new_word = Word(
-            word=base_word_text,
-            language=input.language,
-            translation=data["translation"],
-            examples=data["examples"]
-        )
-        session.add(new_word)
-        await session.commit()
-        await session.refresh(new_word)
-        
-        # Init review
-        review = Review(word_id=new_word.id)
-        session.add(review)
+            return existing_word
+
+        # Don't hold a pooled connection while the LLM works
         await session.commit()
-        
-        # Refresh to ensure object is not expired before returning
-        await session.refresh(new_word)
-        return new_word
+
+        # Process with LLM
+        with span("enrich"):
+            data = await cached_enrich_word(input.word, input.language)
+        with span("save"):
+            word, _ = await save_enriched_word(session, input.word, input.language, data)
+        return word
         
     except Exception as e:
         logger.error(f"Error adding word {input.word}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _sse_enrichment(data: dict):
+    yield _sse("lemma", {"word": data["word"]})
+    yield _sse("translation", {"translation": data["translation"]})
+    for example in data["examples"]:
+        yield _sse("example", example)
+
+# SSE comment: ignored by clients, but resets their read timeouts (and proxies')
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+async def _with_keepalive(events: AsyncIterator, interval: float) -> AsyncIterator:
+    """`events`, with None yielded whenever none arrived for `interval` seconds."""
+    pending = asyncio.ensure_future(events.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            yield item
+            pending = asyncio.ensure_future(events.__anext__())
+    finally:
+        if not pending.done():
+            pending.cancel()
+            await asyncio.wait({pending})
+        await events.aclose()
+
+@router.post("/stream")
+async def add_word_stream(input: WordInput):
+    """Add a word, streaming the enrichment as Server-Sent Events.
+
+    Events: `lemma`, `translation`, one `example` per example, then `done` with
+    the stored word and whether it was "created" or "reset" (or `error`).
+    A `: keep-alive` comment is sent when nothing else was for
+    SSE_KEEPALIVE_SECONDS.
+    """
+    surface = normalize_word(input.word)
+    logger.info("Received streaming add_word request for: {}", surface)
+
+    async def events():
+        try:
+            # The session lives inside the generator: the response outlives the request scope
+            async with async_session_factory() as session:
+                word = await reset_known_word(session, surface, input.language)
+            if word:
+                for event in _sse_enrichment(word.model_dump()):
+                    yield event
+                yield _sse("done", {"status": "reset", "word": word.model_dump(mode="json")})
+                return
+
+            streamed = False
+            # Following another request's enrichment sends nothing for up to
+            # ENRICH_LOCK_WAIT_SECONDS: keep the connection visibly alive
+            enrichment = _with_keepalive(
+                cached_stream_enrich_word(surface, input.language), settings.SSE_KEEPALIVE_SECONDS
+            )
+            async for item in enrichment:
+                if item is None:
+                    yield SSE_KEEPALIVE
+                    continue
+                event, value = item
+                if event == "done":
+                    data = value
+                else:
+                    streamed = True
+                    if event == "word":
+                        yield _sse("lemma", {"word": value})
+                    elif event == "translation":
+                        yield _sse("translation", {"translation": value})
+                    else:
+                        yield _sse("example", value)
+            if not streamed:
+                # From the cache or another request's enrichment: all at once
+                for event in _sse_enrichment(data):
+                    yield event
+
+            async with async_session_factory() as session:
+                word, created = await save_enriched_word(session, surface, input.language, data)
+            yield _sse("done", {"status": "created" if created else "reset", "word": word.model_dump(mode="json")})
+        except Exception as e:
+            logger.error(f"Error streaming word {surface}: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/batch", response_model=List[BatchItemResult])
+async def add_words_batch(
+    input: BatchWordInput,
+    session: AsyncSession = Depends(get_session)
+):
+    """Add many words in one request. Failures are reported per item instead of failing the batch."""
+    if len(input.words) > settings.BATCH_MAX_WORDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many words in one batch (max {settings.BATCH_MAX_WORDS})",
+        )
+
+    logger.info("Received batch add request for {} words ({})", len(input.words), input.language)
+    try:
+        return await ingest_words(session, input.words, input.language)
+    except Exception as e:
+        logger.error(f"Error adding batch of {len(input.words)} words: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/import", response_model=ImportResult)
+async def import_words(
+    request: Request,
+    format: Literal["auto", "csv", "tsv", "anki"] = "auto",
+    language: str = Query("en", description="Language of rows that don't name one"),
+):
+    """Bulk import from the raw request body: CSV/TSV (header row optional) or
+    an Anki "Notes in Plain Text" export.
+
+    Rows with a translation are saved as they are; rows with only a word are
+    queued as enrichment jobs. Existing words are skipped. All or nothing:
+    see `services/importing.py`.
+    """
+    logger.info("Received import request ({}, {})", format, language)
+    try:
+        result = await import_stream(request.stream(), format, language)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("Imported {}", result)
+    if result["queued"]:
+        job_workers.notify()
+    return result
+
+@router.get("/search", response_model=List[WordMatch])
+async def search_saved_words(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    language: str = "en",
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Saved words matching `q`, best first: exact, prefix, substring of the
+    word, substring of the translation, similar spelling.
+
+    Answers within roughly NEKO_SEARCH_BUDGET_MS: when substring and fuzzy
+    matching run out of time, only the prefix matches are returned and the
+    `X-Search-Partial: true` header is set. See `services/search.py`.
+    """
+    matches, partial = await search_words(session, q, language, limit)
+    if partial:
+        response.headers["X-Search-Partial"] = "true"
+    return matches
+
+@router.get("/enrichment-cache/stats")
+async def get_enrichment_cache_stats():
+    """Hit/miss counters of the enrichment cache since process start."""
+    return enrichment_cache.stats()
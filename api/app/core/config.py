@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
@@ -17,6 +17,24 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_DATABASE}"
 
+    # Connection pool (per engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements per connection; 0 behind pgbouncer in transaction mode
+
+    # Optional read replica for read-only endpoints (same credentials and database name)
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None  # defaults to DB_PORT
+    DB_REPLICA_MAX_LAG_SECONDS: float = 1.0  # reads go to the primary while the replica lags more
+
+    @property
+    def REPLICA_DATABASE_URL(self) -> Optional[str]:
+        if not self.DB_REPLICA_HOST:
+            return None
+        port = self.DB_REPLICA_PORT or self.DB_PORT
+        return f"postgresql+asyncpg://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_REPLICA_HOST}:{port}/{self.DB_DATABASE}"
+
     # LLM Provider: "openai" or "azure"
     LLM_PROVIDER: Literal["openai", "azure"] = "openai"
 
@@ -31,6 +49,79 @@ class Settings(BaseSettings):
     AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
     AZURE_DEPLOYMENT_NAME: str = "gpt-4o"
 
+    # Several LLM backends (optional), in order of preference, as JSON, e.g.
+    # NEKO_LLM_BACKENDS='[{"provider": "openai", "model": "gpt-4o-mini"},
+    #                     {"provider": "azure", "model": "gpt-4o", "endpoint": "https://x.openai.azure.com"}]'
+    # Keys: provider, model, name, api_key, base_url (openai), endpoint and
+    # api_version (azure); missing ones come from the settings above. Empty:
+    # LLM_PROVIDER alone. See app/services/llm_router.py.
+    LLM_BACKENDS: List[Dict[str, Any]] = []
+    LLM_HEDGE: bool = True  # also ask the next backend when the first is slower than its p95
+    LLM_HEDGE_MIN_MS: int = 500
+    LLM_HEDGE_DEFAULT_MS: int = 3000  # hedge delay until a backend has enough latency samples
+    LLM_LATENCY_WINDOW: int = 200  # recent calls per backend behind the p95 and error rate
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failures that open a backend's circuit breaker
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    LLM_RETRY_ATTEMPTS: int = 3
+    LLM_RETRY_MAX_WAIT_SECONDS: float = 4.0  # jittered exponential backoff between attempts, capped
+
+    # Provider quotas for LLM calls (0 = unlimited)
+    LLM_RPM_LIMIT: int = 0
+    LLM_TPM_LIMIT: int = 0
+
+    # Enrichment cache (in-process LRU in front of the enrichment_cache table)
+    ENRICHMENT_CACHE_SIZE: int = 2048
+    ENRICHMENT_CACHE_TTL_SECONDS: int = 3600
+
+    # Single-flight enrichment: concurrent adds of one word share one LLM call;
+    # across processes through Postgres advisory locks, on one extra connection
+    # per process (session pooling only: turn off behind pgbouncer in transaction mode)
+    ENRICH_LOCKS: bool = True
+    ENRICH_LOCK_WAIT_SECONDS: float = 60.0  # a follower stops waiting for the leader and calls the LLM itself
+    SSE_KEEPALIVE_SECONDS: float = 15.0  # /words/stream sends a comment when silent this long, e.g. while following
+
+    # Word search (GET /words/search)
+    SEARCH_BUDGET_MS: int = 150  # substring/fuzzy matching is cut off after this; prefix matches always return
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.3  # pg_trgm similarity for fuzzy matches
+    SEARCH_CACHE_SIZE: int = 1024  # in-process cache of complete results, for typeahead
+    SEARCH_CACHE_TTL_SECONDS: float = 10.0
+
+    # Deck export (GET /export): rows fetched from the server-side cursor at a time
+    EXPORT_CHUNK_ROWS: int = 1000
+
+    # Response compression (GET /reviews/due): brotli or gzip, as the client prefers
+    COMPRESS_MIN_BYTES: int = 1024  # smaller bodies are sent as is
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # Batch ingestion
+    ENRICH_CONCURRENCY: int = 4  # max LLM calls in flight per batch request
+    LLM_BATCH_SIZE: int = 10  # words per multi-word enrichment prompt (1 = one prompt per word)
+    BATCH_MAX_WORDS: int = 500
+
+    # Background enrichment jobs (POST /words/?async=true)
+    JOB_WORKERS: int = 2  # 0 disables the worker pool in this process
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: int = 300  # a running job whose lease expired is picked up again
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Review scheduling (app/services/scheduler.py). Params are JSON, e.g.
+    # NEKO_SCHEDULER_PARAMS='{"second_interval": 4}'
+    SCHEDULER: str = "sm2"
+    SCHEDULER_PARAMS: Dict[str, Any] = {}
+
+    # Logging. With LOG_ENQUEUE, sinks are written from a background thread.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_ENQUEUE: bool = True
+    LOG_FILE: Optional[str] = "logs/neko_words.log"  # empty disables the file sink
+    LOG_FILE_LEVEL: str = "DEBUG"
+    LOG_PAYLOAD_MAX_CHARS: int = 500  # raw LLM output etc. is cut to this length...
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01  # ...except for this share of records
+
+    # Per-request spans (db, llm, ...) in a Server-Timing header; costs a little per statement
+    TRACE_REQUESTS: bool = False
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
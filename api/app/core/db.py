@@ -1,18 +1,102 @@
-from sqlalchemy.ext.asyncio import create_async_engine
+import time
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from .config import settings
-from loguru import logger
-from typing import AsyncGenerator
-
-# Enable pre_ping and pool recycling to avoid stale connections from long-lived or idle sessions
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,
-    pool_recycle=1800,  # recycle connections every 30 minutes
+from .metrics import (
+    DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT, DB_POOL_OVERFLOW, DB_POOL_SATURATED, DB_POOL_SIZE,
+    DB_REPLICA_LAG, current_trace,
 )
+from loguru import logger
+from typing import AsyncGenerator, Optional
+
+# Saturation warnings are logged at most this often per pool
+SATURATION_LOG_INTERVAL = 10.0
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The default async pool, recording checkout time and saturation."""
+
+    role = "primary"
+    _last_saturation_log = 0.0
+    _saturated_since_log = 0
+
+    def _do_get(self):
+        if self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow():
+            self._saturated()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.role).observe(time.perf_counter() - start)
+
+    def _saturated(self) -> None:
+        DB_POOL_SATURATED.labels(self.role).inc()
+        cls = type(self)
+        cls._saturated_since_log += 1
+        now = time.monotonic()
+        if now - cls._last_saturation_log >= SATURATION_LOG_INTERVAL:
+            logger.warning(
+                "DB pool ({}) saturated: all {} connections in use, {} checkouts waited "
+                "since the last warning (timeout {}s)",
+                self.role, self.size() + self._max_overflow, cls._saturated_since_log, self._timeout,
+            )
+            cls._last_saturation_log = now
+            cls._saturated_since_log = 0
+
+
+class ReplicaQueuePool(TimedQueuePool):
+    role = "replica"
+
+
+class LockQueuePool(TimedQueuePool):
+    role = "locks"
+
+
+def _create_engine(url: str, poolclass, **options) -> AsyncEngine:
+    # Enable pre_ping and pool recycling to avoid stale connections from long-lived or idle sessions
+    options.setdefault("pool_size", settings.DB_POOL_SIZE)
+    options.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+    options.setdefault("pool_timeout", settings.DB_POOL_TIMEOUT)
+    engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=poolclass,
+        pool_pre_ping=True,
+        pool_recycle=1800,  # recycle connections every 30 minutes
+        connect_args={
+            # SQLAlchemy's prepared statement cache and asyncpg's own
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        **options,
+    )
+
+    # Read at scrape time; engine.pool is replaced by dispose()
+    role = poolclass.role
+    DB_POOL_SIZE.labels(role).set_function(lambda: engine.pool.size())
+    DB_POOL_CHECKED_OUT.labels(role).set_function(lambda: engine.pool.checkedout())
+    DB_POOL_OVERFLOW.labels(role).set_function(lambda: engine.pool.overflow())
+
+    if settings.TRACE_REQUESTS:
+        # Statement time goes to the "db" span of the request being traced
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _start_db_span(conn, cursor, statement, parameters, context, executemany):
+            context.span_start = time.perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _end_db_span(conn, cursor, statement, parameters, context, executemany):
+            trace = current_trace.get()
+            if trace is not None:
+                trace.add("db", time.perf_counter() - context.span_start)
+
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL, TimedQueuePool)
 
 async_session_factory = sessionmaker(
     bind=engine,
@@ -20,14 +104,185 @@ async_session_factory = sessionmaker(
     expire_on_commit=False,
 )
 
+# Read replica, used by get_read_session only
+replica_engine: Optional[AsyncEngine] = None
+replica_session_factory = None
+if settings.REPLICA_DATABASE_URL:
+    replica_engine = _create_engine(settings.REPLICA_DATABASE_URL, ReplicaQueuePool)
+    replica_session_factory = sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+# The one connection holding this process's advisory locks (see core.locks)
+lock_engine: Optional[AsyncEngine] = None
+if settings.ENRICH_LOCKS:
+    lock_engine = _create_engine(
+        settings.DATABASE_URL, LockQueuePool, pool_size=1, max_overflow=0, isolation_level="AUTOCOMMIT"
+    )
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
         logger.debug("DB Session created")
         yield session
 
+async def execute_alone(session: AsyncSession, statement):
+    """Run one self-contained statement in autocommit mode.
+
+    Skips the BEGIN/COMMIT pair, so the statement is a single round trip.
+    Commits whatever the session had pending first.
+    """
+    await session.commit()
+    connection = await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+    return await connection.execute(statement)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (pg_last_xact_replay_timestamp alone keeps growing while the primary is idle)
+REPLICA_LAG = text("""
+    SELECT coalesce(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                         ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END, 0)
+""")
+# How long a lag measurement is reused
+REPLICA_LAG_CHECK_INTERVAL = 1.0
+
+_replica_state = {"checked_at": float("-inf"), "usable": False}
+
+
+async def replica_is_usable() -> bool:
+    """Whether the replica answers and lags less than DB_REPLICA_MAX_LAG_SECONDS.
+
+    Measured at most once per REPLICA_LAG_CHECK_INTERVAL; requests arriving
+    while a check runs use the previous answer.
+    """
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < REPLICA_LAG_CHECK_INTERVAL:
+        return _replica_state["usable"]
+    _replica_state["checked_at"] = now
+    try:
+        async with replica_engine.connect() as conn:
+            lag = float((await conn.execute(REPLICA_LAG)).scalar_one())
+    except Exception as e:
+        if _replica_state["usable"]:
+            logger.warning("Read replica unavailable, reading from the primary: {}", e)
+        _replica_state["usable"] = False
+        return False
+    DB_REPLICA_LAG.set(lag)
+    usable = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+    if usable != _replica_state["usable"]:
+        if usable:
+            logger.info("Read replica caught up ({:.2f}s behind), reading from it", lag)
+        else:
+            logger.warning("Read replica {:.2f}s behind, reading from the primary", lag)
+    _replica_state["usable"] = usable
+    return usable
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints.
+
+    Uses the replica when one is configured and caught up, the primary
+    otherwise, so results only differ by at most DB_REPLICA_MAX_LAG_SECONDS
+    of staleness. Nothing may be written through it.
+    """
+    factory = async_session_factory
+    if replica_session_factory is not None and await replica_is_usable():
+        factory = replica_session_factory
+    async with factory() as session:
+        yield session
+
+# Net change of the per-day due counters for a set of old (-1) / new (+1) rows
+_FORECAST_OLD = "SELECT language, next_review_at::date AS day, -1 AS delta FROM old_rows"
+_FORECAST_NEW = "SELECT language, next_review_at::date AS day, 1 AS delta FROM new_rows"
+_FORECAST_UPSERT = (
+    "INSERT INTO review_forecast (language, day, due_count) "
+    "SELECT language, day, sum(delta) FROM ({changes}) AS changes "
+    "GROUP BY language, day HAVING sum(delta) <> 0 ORDER BY language, day "
+    "ON CONFLICT (language, day) DO UPDATE SET due_count = review_forecast.due_count + excluded.due_count"
+)
+# Counters recomputed from scratch (also used by app/scripts/rebuild_forecast.py)
+FORECAST_COUNTS = (
+    "SELECT language, next_review_at::date AS day, count(*) AS due_count FROM reviews GROUP BY 1, 2"
+)
+
+# create_all only creates missing tables. Changes to tables that already exist
+# are applied here on startup; every statement must be safe to run repeatedly.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS language VARCHAR",
+    "UPDATE reviews SET language = words.language FROM words "
+    "WHERE reviews.word_id = words.id AND reviews.language IS NULL",
+    "ALTER TABLE reviews ALTER COLUMN language SET NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_due_queue ON reviews "
+    "(language, streak, ease_factor, interval, word_id) INCLUDE (next_review_at)",
+    "ALTER TABLE review_events ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0",
+    # GET /words/search. Prefix matches walk this btree in order (the C
+    # collation lets LIKE 'abc%' use it); substring and fuzzy matches use
+    # trigram indexes. pg_trgm ships with contrib, which not every server
+    # has: without it search still works, without fuzzy matching.
+    'CREATE INDEX IF NOT EXISTS ix_words_prefix ON words (language, (word COLLATE "C"))',
+    "DO $$ BEGIN "
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm; "
+    "CREATE INDEX IF NOT EXISTS ix_words_word_trgm ON words USING gin (word gin_trgm_ops); "
+    "CREATE INDEX IF NOT EXISTS ix_words_translation_trgm ON words USING gin (translation gin_trgm_ops); "
+    "EXCEPTION WHEN feature_not_supported OR undefined_file OR insufficient_privilege THEN "
+    "RAISE WARNING 'pg_trgm unavailable (%), word search runs without trigram indexes', SQLERRM; "
+    "END $$",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_review_events_idempotency_key "
+    "ON review_events (idempotency_key)",
+    # Change tracking for GET /sync/changes. Rows written before this existed
+    # keep xid 0, so a client's first sync still receives them.
+    "ALTER TABLE words ADD COLUMN IF NOT EXISTS sync_xid BIGINT NOT NULL DEFAULT 0",
+    "ALTER TABLE reviews ADD COLUMN IF NOT EXISTS sync_xid BIGINT NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_words_sync_xid ON words (sync_xid, id)",
+    "CREATE INDEX IF NOT EXISTS ix_reviews_sync_xid ON reviews (sync_xid, word_id)",
+    "CREATE OR REPLACE FUNCTION set_sync_xid() RETURNS trigger AS $$ "
+    "BEGIN NEW.sync_xid = pg_current_xact_id()::text::bigint; RETURN NEW; END "
+    "$$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE TRIGGER words_sync_xid BEFORE INSERT OR UPDATE ON words "
+    "FOR EACH ROW EXECUTE FUNCTION set_sync_xid()",
+    "CREATE OR REPLACE TRIGGER reviews_sync_xid BEFORE INSERT OR UPDATE ON reviews "
+    "FOR EACH ROW EXECUTE FUNCTION set_sync_xid()",
+    # One row per (word, language). Databases from before the constraint may
+    # hold duplicates from concurrent adds: merge them into the oldest row
+    # (its review wins, history and aliases move over) before adding it.
+    "DO $$ BEGIN "
+    "IF to_regclass('uq_words_word_language') IS NULL THEN "
+    "CREATE TEMP TABLE word_merges ON COMMIT DROP AS SELECT * FROM ("
+    "SELECT id AS dup_id, first_value(id) OVER (PARTITION BY word, language ORDER BY created_at, id) AS keep_id "
+    "FROM words) AS ranked WHERE dup_id <> keep_id; "
+    "UPDATE review_events e SET word_id = m.keep_id FROM word_merges m WHERE e.word_id = m.dup_id; "
+    "UPDATE word_aliases a SET word_id = m.keep_id FROM word_merges m WHERE a.word_id = m.dup_id; "
+    "UPDATE enrichment_jobs j SET word_id = m.keep_id FROM word_merges m WHERE j.word_id = m.dup_id; "
+    "DELETE FROM reviews r USING word_merges m WHERE r.word_id = m.dup_id; "
+    "DELETE FROM words w USING word_merges m WHERE w.id = m.dup_id; "
+    "ALTER TABLE words ADD CONSTRAINT uq_words_word_language UNIQUE (word, language); "
+    "END IF; END $$",
+    # Per-day due counters for GET /reviews/forecast. Statement-level, so a
+    # bulk UPDATE costs one aggregate instead of one upsert per row.
+    f"CREATE OR REPLACE FUNCTION review_forecast_apply() RETURNS trigger AS $$ BEGIN "
+    f"IF TG_OP = 'INSERT' THEN {_FORECAST_UPSERT.format(changes=_FORECAST_NEW)}; "
+    f"ELSIF TG_OP = 'DELETE' THEN {_FORECAST_UPSERT.format(changes=_FORECAST_OLD)}; "
+    f"ELSE {_FORECAST_UPSERT.format(changes=_FORECAST_OLD + ' UNION ALL ' + _FORECAST_NEW)}; "
+    f"END IF; RETURN NULL; END $$ LANGUAGE plpgsql",
+    "CREATE OR REPLACE TRIGGER reviews_forecast_insert AFTER INSERT ON reviews "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION review_forecast_apply()",
+    "CREATE OR REPLACE TRIGGER reviews_forecast_update AFTER UPDATE ON reviews "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION review_forecast_apply()",
+    "CREATE OR REPLACE TRIGGER reviews_forecast_delete AFTER DELETE ON reviews "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION review_forecast_apply()",
+    # First start with the counter table: fill it from the existing reviews.
+    # Every review is counted, so an empty table means there is nothing to count.
+    "INSERT INTO review_forecast (language, day, due_count) "
+    f"SELECT * FROM ({FORECAST_COUNTS}) AS counts WHERE NOT EXISTS (SELECT 1 FROM review_forecast)",
+]
+
 async def init_db():
     from sqlmodel import SQLModel
     # Import models to ensure they are registered
-    from ..models import word, review
+    from ..models import word, review, review_event, enrichment_cache, word_alias, job, review_forecast
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
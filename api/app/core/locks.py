@@ -0,0 +1,110 @@
+"""Postgres advisory locks for the whole process, held on one connection.
+
+A session-level advisory lock belongs to a connection, so holding one for the
+length of an LLM call would keep a pooled connection out of use. Instead
+every lock of the process lives on a single dedicated connection, and taking
+one never blocks it (`pg_try_advisory_lock`): a caller that finds a lock
+taken waits for the NOTIFY its holder sends on release, and tries again every
+`poll_interval` seconds in case the holder went away without one.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+CHANNEL = "advisory_lock_released"
+
+TRY_LOCK = "SELECT pg_try_advisory_lock($1)"
+UNLOCK = f"SELECT pg_advisory_unlock($1), pg_notify('{CHANNEL}', $1::text)"
+
+
+class AdvisoryLocks:
+    def __init__(self, engine: AsyncEngine, poll_interval: float = 1.0):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self._connection: Optional[AsyncConnection] = None
+        self._driver_connection: Any = None
+        # One query at a time on the connection
+        self._mutex = asyncio.Lock()
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+
+    async def _fetch(self, query: str, lock: int) -> Any:
+        async with self._mutex:
+            if self._connection is None:
+                connection = await self.engine.connect()
+                driver_connection = (await connection.get_raw_connection()).driver_connection
+                await driver_connection.add_listener(CHANNEL, self._released)
+                self._connection, self._driver_connection = connection, driver_connection
+            try:
+                return await self._driver_connection.fetchval(query, lock)
+            except Exception:
+                # Dropping the connection releases every lock it held
+                await self._drop()
+                raise
+
+    async def _drop(self) -> None:
+        connection, self._connection, self._driver_connection = self._connection, None, None
+        try:
+            await connection.invalidate()
+            await connection.close()
+        except Exception as e:
+            logger.warning("Failed to close the advisory lock connection: {}", e)
+        for waiters in self._waiters.values():
+            for released in waiters:
+                if not released.done():
+                    released.set_result(None)
+
+    def _released(self, connection, pid: int, channel: str, payload: str) -> None:
+        for released in self._waiters.pop(int(payload), []):
+            if not released.done():
+                released.set_result(None)
+
+    async def try_acquire(self, lock: int) -> bool:
+        """Take `lock` if no one holds it, without waiting."""
+        return await self._fetch(TRY_LOCK, lock)
+
+    async def acquire(self, lock: int, timeout: float) -> bool:
+        """Take `lock`, waiting up to `timeout` seconds for its holder to release it.
+
+        Returns whether it had to wait. Raises TimeoutError.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waited = False
+        while True:
+            # Listening before trying, so that a release in between is not missed
+            released = loop.create_future()
+            self._waiters.setdefault(lock, []).append(released)
+            try:
+                if await self.try_acquire(lock):
+                    return waited
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Advisory lock {lock} still held after {timeout}s")
+                waited = True
+                await asyncio.wait({released}, timeout=min(self.poll_interval, remaining))
+            finally:
+                waiters = self._waiters.get(lock, [])
+                if released in waiters:
+                    waiters.remove(released)
+                    if not waiters:
+                        del self._waiters[lock]
+
+    async def release(self, lock: int) -> None:
+        """Release `lock` and wake its waiters. Never raises: a connection that
+        failed has released its locks anyway."""
+        try:
+            await self._fetch(UNLOCK, lock)
+        except Exception as e:
+            logger.warning("Failed to release advisory lock {}: {}", lock, e)
+
+    @asynccontextmanager
+    async def hold(self, lock: int, timeout: float) -> AsyncIterator[bool]:
+        """Hold `lock` for the block; yields whether another holder had it first."""
+        waited = await self.acquire(lock, timeout)
+        try:
+            yield waited
+        finally:
+            await self.release(lock)
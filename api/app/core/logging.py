@@ -1,19 +1,103 @@
+import json
+import random
 import sys
+import traceback
+import uuid
 from loguru import logger
+from starlette.datastructures import MutableHeaders
 from .config import settings
 
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{extra[request_id]}</cyan> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+
+def _json_format(record) -> str:
+    """loguru format function writing one compact JSON object per line.
+
+    The JSON is handed back through `extra` so loguru does not parse it as a
+    format string.
+    """
+    entry = {
+        "ts": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        **{key: value for key, value in record["extra"].items() if key != "_json"},
+    }
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+def clip(text: str) -> str:
+    """Shorten a large payload (e.g. raw LLM output) for logging.
+
+    A LOG_PAYLOAD_SAMPLE_RATE share of payloads is kept whole, so full
+    examples still show up without every record carrying one.
+    """
+    limit = settings.LOG_PAYLOAD_MAX_CHARS
+    if len(text) <= limit or random.random() < settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return text
+    return f"{text[:limit]}... ({len(text)} chars)"
+
+
+class RequestIdMiddleware:
+    """Binds a request id to every log record of the request.
+
+    Uses the caller's X-Request-ID when given, otherwise a new one, and
+    returns it in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        with logger.contextualize(request_id=request_id):
+            await self.app(scope, receive, send_with_id)
+
+
 def setup_logging():
     logger.remove()
+    logger.configure(extra={"request_id": "-"})
+    json_output = settings.LOG_FORMAT == "json"
+    # With LOG_ENQUEUE, records go through a queue to a writer thread, so
+    # file writes, rotation and compression never block the event loop.
     logger.add(
         sys.stderr,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO",
-    )
-    logger.add(
-        "logs/neko_words.log",
-        rotation="10 MB",
-        retention="10 days",
-        level="DEBUG",
-        compression="zip"
+        format=_json_format if json_output else TEXT_FORMAT,
+        level=settings.LOG_LEVEL,
+        enqueue=settings.LOG_ENQUEUE,
     )
-    logger.info(f"Logging initialized for {settings.PROJECT_NAME}")
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE,
+            format=_json_format if json_output else TEXT_FORMAT,
+            rotation="10 MB",
+            retention="10 days",
+            level=settings.LOG_FILE_LEVEL,
+            compression="zip",
+            enqueue=settings.LOG_ENQUEUE,
+        )
+    logger.info("Logging initialized for {}", settings.PROJECT_NAME)
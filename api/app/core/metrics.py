@@ -0,0 +1,143 @@
+"""Prometheus metrics and optional per-request trace spans.
+
+Metrics live in the default prometheus_client registry and are served by
+GET /metrics (see app/main.py). With TRACE_REQUESTS on, every request also
+collects spans (time spent in named phases such as "db" or "llm") and returns
+them in a Server-Timing header, which browsers show in the network panel.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.datastructures import MutableHeaders
+
+from .config import settings
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Duration of one chat completion call per backend (streamed calls until the last chunk); "
+    "outcome is ok, error or cancelled (lost a hedged race)",
+    ["operation", "backend", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls retried after a failure", ["operation"])
+LLM_SERVED = Counter("llm_served_total", "LLM calls by the backend whose answer was used", ["operation", "backend"])
+LLM_HEDGES = Counter(
+    "llm_hedged_total", "Calls also sent to the next backend after the first exceeded its p95", ["operation"]
+)
+LLM_BREAKER_OPEN = Gauge("llm_breaker_open", "1 while the backend's circuit breaker is open", ["backend"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported in the provider's usage field", ["kind"])
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including opening a new one",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured size of the connection pool", ["engine"])
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently in use", ["engine"])
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size (negative: pool not full yet)", ["engine"]
+)
+DB_POOL_SATURATED = Counter(
+    "db_pool_saturated_total", "Checkouts that found every connection in use and had to wait", ["engine"]
+)
+DB_REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replay lag of the read replica at the last check")
+
+ENRICHMENT_CACHE_LOOKUPS = Counter(
+    "enrichment_cache_lookups_total", "Enrichment cache lookups by outcome", ["result"]
+)
+ENRICHMENT_CACHE_ENTRIES = Gauge("enrichment_cache_memory_entries", "Entries in the in-process enrichment cache")
+ENRICHMENT_SINGLE_FLIGHT = Counter(
+    "enrichment_single_flight_total",
+    "Enrichments after a cache miss by role: leader (called the LLM), joined (shared a call in this process), "
+    "followed (used the result of another process)",
+    ["role"],
+)
+
+WORD_SEARCHES = Counter(
+    "word_search_total", "GET /words/search by outcome (cache_hit, complete, partial: budget ran out)", ["result"]
+)
+
+
+class Trace:
+    """Spans of one request: total seconds and count per phase name."""
+
+    def __init__(self):
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += 1
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f'{name};dur={total * 1000:.1f};desc="{count}x"' for name, (total, count) in self.spans.items()
+        )
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time the block as phase `name` of the current request's trace, if tracing."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """Records REQUEST_LATENCY and, with TRACE_REQUESTS, the request's spans.
+
+    Pure ASGI so the route template (set in the scope by the router) can be
+    read after the app has run, and streamed responses are timed to the end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace() if settings.TRACE_REQUESTS else None
+        token = current_trace.set(trace)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None and trace.spans:
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_trace.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(elapsed)
+            if trace is not None and trace.spans:
+                logger.debug("Trace {} {} {:.1f}ms: {}", scope["method"], route, elapsed * 1000, trace.server_timing())
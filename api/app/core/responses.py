@@ -0,0 +1,82 @@
+"""Lean JSON responses for hot read endpoints, with optional compression.
+
+`CompactJSONResponse` serializes plain data (dicts built from selected
+columns) directly, skipping the response_model validation and
+jsonable_encoder pass FastAPI applies to returned objects, with orjson.
+Bodies are compressed with brotli or gzip, as the client accepts.
+"""
+import gzip
+from typing import Any, Iterable, Mapping, Optional
+
+import brotli
+import orjson
+from fastapi import Response
+
+from .config import settings
+
+# Preferred first when the client rates them equally
+ENCODINGS = ("br", "gzip")
+
+
+def _default(value: Any) -> Any:
+    # What orjson doesn't serialize natively: asyncpg's UUID type, Decimal
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+def choose_encoding(accept_encoding: Optional[str], offered: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """The offered content coding the client rates highest in `Accept-Encoding`, if any."""
+    ratings = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        try:
+            quality = float(params.strip().removeprefix("q=") or 1)
+        except ValueError:
+            quality = 1.0
+        ratings[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = ratings.get(encoding, ratings.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+class CompactJSONResponse(Response):
+    """JSON response for already-plain content (str, numbers, lists, dicts,
+    datetime, UUID).
+
+    Given the request's `Accept-Encoding`, a body of at least
+    NEKO_COMPRESS_MIN_BYTES is compressed with brotli or gzip.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        accept_encoding: Optional[str] = None,
+    ):
+        super().__init__(content, status_code, headers)
+        self.headers["Vary"] = "Accept-Encoding"
+        if len(self.body) < settings.COMPRESS_MIN_BYTES:
+            return
+        encoding = choose_encoding(accept_encoding)
+        if encoding:
+            self.body = compress(self.body, encoding)
+            self.headers["Content-Encoding"] = encoding
+            self.headers["Content-Length"] = str(len(self.body))
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,8 +1,11 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .core.config import settings
-from .core.logging import setup_logging
+from .core.logging import RequestIdMiddleware, setup_logging
+from .core.metrics import MetricsMiddleware
 from .core.db import init_db
+from .services.jobs import job_workers
 from .api.v1.api import api_router
 from loguru import logger
 
@@ -11,8 +14,11 @@ async def lifespan(app: FastAPI):
     setup_logging()
     logger.info("Starting up application...")
     await init_db()
+    await job_workers.start()
     yield
     logger.info("Shutting down application...")
+    await job_workers.stop()
+    await logger.complete()
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -28,10 +34,18 @@ app.add_middleware(
     allow_credentials=False,  # 使用 * 时不能为 True
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Search-Partial", "Server-Timing", "X-Request-ID"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Neko Words API", "docs": "/docs"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
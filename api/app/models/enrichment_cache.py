@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Dict, Any
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+
+class EnrichmentCacheEntry(SQLModel, table=True):
+    __tablename__ = "enrichment_cache"
+    # sha256 over (normalized word, language, provider, model, prompt version)
+    key: str = Field(primary_key=True, max_length=64)
+    word: str
+    language: str
+    model: str
+    prompt_version: str
+    data: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
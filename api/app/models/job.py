@@ -0,0 +1,19 @@
+from datetime import datetime
+import uuid
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+class EnrichmentJob(SQLModel, table=True):
+    """A queued POST /words/ request, processed by the background worker pool."""
+    __tablename__ = "enrichment_jobs"
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    word: str
+    language: str = "en"
+    status: str = Field(default="queued", index=True)  # queued, running, done, failed
+    attempts: int = 0
+    # Not picked up before this time (retry backoff, or lease of a running job)
+    run_after: datetime = Field(default_factory=datetime.utcnow, index=True)
+    word_id: Optional[uuid.UUID] = Field(default=None, foreign_key="words.id")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,9 +1,8 @@
 from datetime import datetime
 import uuid
-from typing import Optional, List, Dict, Any
+from typing import Optional
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, BigInteger, Index, Integer
 
 class ReviewBase(SQLModel):
     interval: int = 0
@@ -11,11 +10,30 @@ class ReviewBase(SQLModel):
     streak: int = 0
     next_review_at: datetime = Field(default_factory=datetime.utcnow)
     last_reviewed_at: Optional[datetime] = None
-    history: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSONB))
 
 class Review(ReviewBase, table=True):
     __tablename__ = "reviews"
+    # Serves GET /reviews/due: language equality, then the queue order, with
+    # next_review_at included so the due filter is checked from the index.
+    __table_args__ = (
+        Index(
+            "ix_reviews_due_queue",
+            "language", "streak", "ease_factor", "interval", "word_id",
+            postgresql_include=["next_review_at"],
+        ),
+        Index("ix_reviews_sync_xid", "sync_xid", "word_id"),
+    )
     word_id: uuid.UUID = Field(foreign_key="words.id", primary_key=True)
+    # Copy of words.language so the due queue needs no join to filter
+    language: str = Field(default="en")
+    # Bumped by every write to the card. POST /reviews/{id}/log only applies
+    # a grade to the version the client saw, so concurrent grades conflict
+    # instead of overwriting each other.
+    version: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    # See Word.sync_xid
+    sync_xid: int = Field(
+        default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"), exclude=True
+    )
     
     word: "Word" = Relationship(back_populates="reviews")
 
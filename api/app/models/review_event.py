@@ -0,0 +1,28 @@
+from datetime import datetime
+import uuid
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, BigInteger, Index
+
+class ReviewEvent(SQLModel, table=True):
+    """One graded review. Append-only; undo deletes the latest event for a word.
+
+    The prev_* columns hold the review state before this grade was applied, so
+    undoing it is a plain restore instead of a replay of the whole history.
+    """
+    __tablename__ = "review_events"
+    __table_args__ = (Index("ix_review_events_word_id_ts", "word_id", "ts"),)
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    word_id: uuid.UUID = Field(foreign_key="words.id")
+    ts: datetime = Field(default_factory=datetime.utcnow)
+    grade: str
+    # State after the grade
+    interval: int
+    ease_factor: float
+    # State before the grade
+    prev_interval: int
+    prev_ease_factor: float
+    prev_streak: int
+    prev_last_reviewed_at: Optional[datetime] = None
+    # Client-chosen key of a batch-logged grade; a resent key is not applied twice
+    idempotency_key: Optional[str] = Field(default=None, max_length=64, unique=True, index=True)
@@ -0,0 +1,13 @@
+from datetime import date
+from sqlmodel import SQLModel, Field
+
+class ReviewForecast(SQLModel, table=True):
+    """Number of reviews whose next_review_at falls on `day` (UTC), per language.
+
+    Maintained by statement-level triggers on reviews (see core/db.py), so it
+    changes in the same transaction as the reviews themselves.
+    """
+    __tablename__ = "review_forecast"
+    language: str = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    due_count: int = 0
@@ -2,7 +2,7 @@ from datetime import datetime
 import uuid
 from typing import Optional, List, Dict, Any
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column
+from sqlalchemy import Column, BigInteger, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 
 class WordBase(SQLModel):
@@ -13,8 +13,18 @@ class WordBase(SQLModel):
 
 class Word(WordBase, table=True):
     __tablename__ = "words"
+    __table_args__ = (
+        # One row per lemma; adds upsert against it (services/vocabulary.py)
+        UniqueConstraint("word", "language", name="uq_words_word_language"),
+        Index("ix_words_sync_xid", "sync_xid", "id"),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Id of the transaction that last wrote the row, set by a trigger (see
+    # core/db.py). Drives the GET /sync/changes feed; never serialized.
+    sync_xid: int = Field(
+        default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"), exclude=True
+    )
     
     # Relationships
     reviews: List["Review"] = Relationship(back_populates="word")
@@ -0,0 +1,9 @@
+import uuid
+from sqlmodel import SQLModel, Field
+
+class WordAlias(SQLModel, table=True):
+    """Maps a surface form someone typed (e.g. "wrote") to its stored lemma ("write")."""
+    __tablename__ = "word_aliases"
+    surface: str = Field(primary_key=True)
+    language: str = Field(primary_key=True)
+    word_id: uuid.UUID = Field(foreign_key="words.id", index=True)
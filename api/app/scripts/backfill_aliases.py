@@ -0,0 +1,32 @@
+"""Build word_aliases rows from existing words.
+
+Every stored lemma becomes an alias of itself, so re-adding a word that was
+saved before the alias table existed no longer needs an LLM call.
+
+Usage: uv run python -m app.scripts.backfill_aliases
+"""
+import asyncio
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.db import engine, init_db
+
+BACKFILL_SQL = text("""
+    INSERT INTO word_aliases (surface, language, word_id)
+    SELECT DISTINCT ON (lower(word), language) lower(word), language, id
+    FROM words
+    ORDER BY lower(word), language, created_at
+    ON CONFLICT (surface, language) DO NOTHING
+""")
+
+
+async def main():
+    await init_db()
+    async with engine.begin() as conn:
+        result = await conn.execute(BACKFILL_SQL)
+    logger.info(f"Backfilled {result.rowcount} word aliases")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""One-shot migration of reviews.history JSONB arrays into review_events.
+
+Each history entry becomes one event; the state before each grade is rebuilt
+by replaying the entries in order. Rows are converted in chunks and their
+history cleared in the same transaction, so an interrupted run can simply be
+restarted. The history column is dropped once every row is converted.
+
+Usage: uv run python -m app.scripts.migrate_review_history
+"""
+import asyncio
+from datetime import datetime
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.db import engine, init_db
+
+CHUNK_SIZE = 1000
+
+INSERT_EVENT = text("""
+    INSERT INTO review_events
+        (word_id, ts, grade, interval, ease_factor,
+         prev_interval, prev_ease_factor, prev_streak, prev_last_reviewed_at)
+    VALUES
+        (:word_id, :ts, :grade, :interval, :ease_factor,
+         :prev_interval, :prev_ease_factor, :prev_streak, :prev_last_reviewed_at)
+""")
+
+
+def history_to_events(word_id, history):
+    interval, ease, streak, last = 0, 2.5, 0, None
+    rows = []
+    for entry in history:
+        ts = datetime.fromisoformat(entry["date"])
+        grade = entry.get("grade", "good")
+        rows.append({
+            "word_id": word_id,
+            "ts": ts,
+            "grade": grade,
+            "interval": entry.get("interval", 0),
+            "ease_factor": entry.get("ease", ease),
+            "prev_interval": interval,
+            "prev_ease_factor": ease,
+            "prev_streak": streak,
+            "prev_last_reviewed_at": last,
+        })
+        streak = 0 if grade in ("again", "hard") else streak + 1
+        interval, ease, last = rows[-1]["interval"], rows[-1]["ease_factor"], ts
+    return rows
+
+
+async def main():
+    await init_db()
+    async with engine.connect() as conn:
+        has_column = (await conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'reviews' AND column_name = 'history'"
+        ))).first()
+    if not has_column:
+        logger.info("reviews.history is already gone, nothing to migrate")
+        await engine.dispose()
+        return
+
+    converted = events = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(text(
+                "SELECT word_id, history FROM reviews "
+                "WHERE history IS NOT NULL AND jsonb_array_length(history) > 0 "
+                "LIMIT :limit FOR UPDATE"
+            ), {"limit": CHUNK_SIZE})
+            chunk = result.all()
+            if not chunk:
+                break
+            rows = [row for word_id, history in chunk for row in history_to_events(word_id, history)]
+            if rows:
+                await conn.execute(INSERT_EVENT, rows)
+            await conn.execute(
+                text("UPDATE reviews SET history = NULL WHERE word_id = ANY(:ids)"),
+                {"ids": [word_id for word_id, _ in chunk]},
+            )
+        converted += len(chunk)
+        events += len(rows)
+        logger.info(f"Converted {converted} reviews ({events} events)")
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE reviews DROP COLUMN history"))
+    logger.info(f"Done: {converted} reviews, {events} events. Dropped reviews.history")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
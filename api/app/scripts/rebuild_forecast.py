@@ -0,0 +1,37 @@
+"""Recompute the review_forecast counters from the reviews table.
+
+The counters are kept up to date by triggers on reviews; this repairs them if
+they ever drift (e.g. after restoring a partial backup or editing rows with
+triggers disabled). Writes to reviews are blocked for the duration, which is
+one aggregate over the table.
+
+Usage: uv run python -m app.scripts.rebuild_forecast
+"""
+import asyncio
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.db import FORECAST_COUNTS, engine, init_db
+
+DRIFT_SQL = text(f"""
+    SELECT count(*) FROM ({FORECAST_COUNTS}) AS actual
+    FULL JOIN (SELECT * FROM review_forecast WHERE due_count <> 0) AS counters
+        USING (language, day)
+    WHERE actual.due_count IS DISTINCT FROM counters.due_count
+""")
+
+
+async def main():
+    await init_db()
+    async with engine.begin() as conn:
+        # Keep the counters and the reviews consistent while we recount
+        await conn.execute(text("LOCK TABLE reviews IN SHARE MODE"))
+        drifted = (await conn.execute(DRIFT_SQL)).scalar_one()
+        await conn.execute(text("DELETE FROM review_forecast"))
+        await conn.execute(text(f"INSERT INTO review_forecast (language, day, due_count) {FORECAST_COUNTS}"))
+    logger.info(f"Rebuilt review forecast counters ({drifted} language/day counts were off)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+"""Replay every card's review history with a scheduler and write the result back.
+
+Run it after changing NEKO_SCHEDULER / NEKO_SCHEDULER_PARAMS. Use --dry-run to
+simulate other parameters: it prints the current and the simulated schedule
+side by side and writes nothing.
+
+Only cards with review events are rescheduled. A card that was reset by
+re-adding the word after its last review (interval 0) keeps its state,
+because resets are not in the event log. Rows are written with one UPDATE per
+chunk. A card graded while the script runs is left alone.
+
+Usage:
+    uv run python -m app.scripts.reschedule --dry-run --params '{"second_interval": 4}'
+    uv run python -m app.scripts.reschedule
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.services.scheduler import DeckState, create_scheduler, grade_quality
+
+CHUNK_SIZE = 50_000
+
+BULK_UPDATE = text("""
+    UPDATE reviews AS r
+    SET interval = v.interval, ease_factor = v.ease_factor, streak = v.streak,
+        next_review_at = v.next_review_at, last_reviewed_at = v.last_reviewed_at,
+        version = r.version + 1
+    FROM unnest(
+        CAST(:word_ids AS uuid[]), CAST(:intervals AS integer[]), CAST(:ease_factors AS double precision[]),
+        CAST(:streaks AS integer[]), CAST(:next_review_ats AS timestamp[]), CAST(:last_reviewed_ats AS timestamp[])
+    ) AS v(word_id, interval, ease_factor, streak, next_review_at, last_reviewed_at)
+    WHERE r.word_id = v.word_id
+      AND NOT EXISTS (
+          SELECT 1 FROM review_events e WHERE e.word_id = v.word_id AND e.ts > v.last_reviewed_at
+      )
+""")
+
+
+async def load_events(conn):
+    """All events as arrays sorted by card and time, plus the word id of each card index."""
+    word_ids, index = [], {}
+    card, quality, ts = [], [], []
+    result = await conn.stream(text("SELECT word_id, ts, grade FROM review_events ORDER BY word_id, ts, id"))
+    async for rows in result.partitions(100_000):
+        for word_id, at, grade in rows:
+            i = index.get(word_id)
+            if i is None:
+                i = index[word_id] = len(word_ids)
+                word_ids.append(word_id)
+            card.append(i)
+            quality.append(grade_quality(grade))
+            ts.append(at)
+    return (
+        word_ids,
+        np.array(card, dtype=np.int64),
+        np.array(quality, dtype=np.int64),
+        np.array(ts, dtype="datetime64[us]"),
+    )
+
+
+async def load_current(conn, word_ids) -> DeckState:
+    """Current review state of the given cards, in the same order."""
+    position = {word_id: i for i, word_id in enumerate(word_ids)}
+    n = len(word_ids)
+    deck = DeckState(
+        interval=np.zeros(n, dtype=np.int64),
+        ease_factor=np.zeros(n, dtype=np.float64),
+        streak=np.zeros(n, dtype=np.int64),
+        next_review_at=np.full(n, np.datetime64("NaT"), dtype="datetime64[us]"),
+        last_reviewed_at=np.full(n, np.datetime64("NaT"), dtype="datetime64[us]"),
+    )
+    result = await conn.stream(text(
+        "SELECT word_id, interval, ease_factor, streak, next_review_at, last_reviewed_at FROM reviews"
+    ))
+    async for rows in result.partitions(100_000):
+        for word_id, interval, ease_factor, streak, next_review_at, last_reviewed_at in rows:
+            i = position.get(word_id)
+            if i is None:
+                continue
+            deck.interval[i] = interval
+            deck.ease_factor[i] = ease_factor
+            deck.streak[i] = streak
+            deck.next_review_at[i] = next_review_at
+            deck.last_reviewed_at[i] = last_reviewed_at if last_reviewed_at else np.datetime64("NaT")
+    return deck
+
+
+def summarize(label: str, deck: DeckState, mask: np.ndarray) -> None:
+    now = np.datetime64(datetime.utcnow(), "us")
+    due = deck.next_review_at[mask]
+    day = np.timedelta64(1, "D")
+    logger.info(
+        f"{label:>9}: mean interval {deck.interval[mask].mean():7.1f}d | "
+        f"mean ease {deck.ease_factor[mask].mean():.3f} | "
+        f"due now {int((due <= now).sum())} | "
+        f"due in 7d {int((due <= now + 7 * day).sum())} | "
+        f"due in 30d {int((due <= now + 30 * day).sum())}"
+    )
+
+
+async def write(word_ids, deck: DeckState, indices: np.ndarray) -> None:
+    for start in range(0, len(indices), CHUNK_SIZE):
+        chunk = indices[start:start + CHUNK_SIZE]
+        async with engine.begin() as conn:
+            await conn.execute(BULK_UPDATE, {
+                "word_ids": [word_ids[i] for i in chunk],
+                "intervals": deck.interval[chunk].tolist(),
+                "ease_factors": deck.ease_factor[chunk].tolist(),
+                "streaks": deck.streak[chunk].tolist(),
+                "next_review_ats": deck.next_review_at[chunk].astype(object).tolist(),
+                "last_reviewed_ats": deck.last_reviewed_at[chunk].astype(object).tolist(),
+            })
+        logger.info(f"Updated {min(start + CHUNK_SIZE, len(indices))}/{len(indices)} cards")
+
+
+async def main(scheduler_name: str, params: dict, dry_run: bool):
+    scheduler = create_scheduler(scheduler_name, params)
+    logger.info(f"Scheduler {scheduler.name} with {scheduler.params.model_dump()}")
+
+    await init_db()
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        word_ids, card, quality, ts = await load_events(conn)
+        current = await load_current(conn, word_ids)
+    loaded = time.perf_counter()
+    logger.info(f"Loaded {len(card)} events for {len(word_ids)} cards in {loaded - started:.1f}s")
+    if not word_ids:
+        await engine.dispose()
+        return
+
+    replayed = scheduler.replay(card, quality, ts, len(word_ids))
+    logger.info(f"Replayed in {time.perf_counter() - loaded:.2f}s")
+
+    # Re-added words were reset after their last review; keep them due
+    keep = current.interval == 0
+    changed = ~keep & (
+        (replayed.interval != current.interval)
+        | ~np.isclose(replayed.ease_factor, current.ease_factor)
+        | (replayed.streak != current.streak)
+        | (replayed.next_review_at != current.next_review_at)
+    )
+    everything = np.ones(len(word_ids), dtype=bool)
+    summarize("current", current, everything)
+    summarize("simulated" if dry_run else "new", DeckState(*(
+        np.where(keep, now, new) for now, new in zip(current, replayed)
+    )), everything)
+    logger.info(f"{int(changed.sum())} cards change, {int(keep.sum())} reset cards kept as they are")
+
+    if not dry_run:
+        await write(word_ids, replayed, np.flatnonzero(changed))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheduler", default=settings.SCHEDULER)
+    parser.add_argument("--params", type=json.loads, default=None,
+                        help="JSON scheduler parameters (default: NEKO_SCHEDULER_PARAMS)")
+    parser.add_argument("--dry-run", action="store_true", help="Simulate only; write nothing")
+    args = parser.parse_args()
+    params = args.params if args.params is not None else settings.SCHEDULER_PARAMS
+    asyncio.run(main(args.scheduler, params, args.dry_run))
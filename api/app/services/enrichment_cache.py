@@ -0,0 +1,407 @@
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+from contextlib import AsyncExitStack
+from loguru import logger
+from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.metrics import ENRICHMENT_CACHE_ENTRIES, ENRICHMENT_CACHE_LOOKUPS, ENRICHMENT_SINGLE_FLIGHT
+from ..core.db import async_session_factory, lock_engine
+from ..core.locks import AdvisoryLocks
+from ..models.enrichment_cache import EnrichmentCacheEntry
+from .llm import enrich_word, enrich_words, get_model_identity, model_identities, stream_enrich_word, PROMPT_VERSION
+
+
+def normalize_word(word: str) -> str:
+    """Lowercase and collapse whitespace so "  Roll  Out" and "roll out" share a key."""
+    return " ".join(word.strip().lower().split())
+
+
+def cache_key(word: str, language: str, model: Optional[str] = None) -> str:
+    """Key of an enrichment produced by `model` (by default the preferred backend's)."""
+    raw = "\x1f".join([normalize_word(word), language, model or get_model_identity(), PROMPT_VERSION])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """Two-tier cache for LLM enrichments: in-process LRU backed by Postgres.
+
+    The key covers the model that produced the entry and the prompt version,
+    so switching either one makes old entries unreachable without any explicit
+    invalidation. Lookups try the configured backends' models in order of
+    preference: an answer from a fallback backend (failover, hedge) is served
+    until the preferred model has its own, and only while that fallback model
+    is configured.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.memory: TTLCache[Dict[str, Any]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get(self, word: str, language: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([word], language)).get(word)
+
+    async def get_many(self, words: List[str], language: str) -> Dict[str, Dict[str, Any]]:
+        """Look up several words at once, with a single query for the memory misses."""
+        models = model_identities()
+        found: Dict[str, Dict[str, Any]] = {}
+        # Key -> (word, preference of its model)
+        pending: Dict[str, Tuple[str, int]] = {}
+        for word in words:
+            keys = [cache_key(word, language, model) for model in models]
+            data = next((data for data in map(self.memory.get, keys) if data is not None), None)
+            if data is not None:
+                self.memory_hits += 1
+                ENRICHMENT_CACHE_LOOKUPS.labels("memory_hit").inc()
+                found[word] = data
+            else:
+                pending.update((key, (word, rank)) for rank, key in enumerate(keys))
+
+        if pending:
+            try:
+                async with async_session_factory() as session:
+                    statement = select(EnrichmentCacheEntry).where(EnrichmentCacheEntry.key.in_(list(pending)))
+                    entries = (await session.exec(statement)).all()
+            except Exception as e:
+                # The cache must never be the reason an add fails
+                logger.warning(f"Enrichment cache lookup failed for {len(pending) // len(models)} words: {e}")
+                entries = []
+            best: Dict[str, Tuple[int, EnrichmentCacheEntry]] = {}
+            for entry in entries:
+                word, rank = pending[entry.key]
+                if word not in best or rank < best[word][0]:
+                    best[word] = rank, entry
+            for word, (_, entry) in best.items():
+                self.memory.set(entry.key, entry.data)
+                found[word] = entry.data
+            misses = len(pending) // len(models) - len(best)
+            self.db_hits += len(best)
+            self.misses += misses
+            ENRICHMENT_CACHE_LOOKUPS.labels("db_hit").inc(len(best))
+            ENRICHMENT_CACHE_LOOKUPS.labels("miss").inc(misses)
+        return found
+
+    async def set(self, word: str, language: str, data: Dict[str, Any], model: Optional[str] = None) -> None:
+        await self.set_many({word: data}, language, model)
+
+    async def set_many(
+        self, items: Dict[str, Dict[str, Any]], language: str, model: Optional[str] = None
+    ) -> None:
+        """Store enrichments produced by `model` (by default the preferred backend's)."""
+        if not items:
+            return
+        model = model or get_model_identity()
+        rows = []
+        for word, data in items.items():
+            key = cache_key(word, language, model)
+            self.memory.set(key, data)
+            rows.append({
+                "key": key,
+                "word": normalize_word(word),
+                "language": language,
+                "model": model,
+                "prompt_version": PROMPT_VERSION,
+                "data": data,
+            })
+        statement = insert(EnrichmentCacheEntry).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"data": statement.excluded.data},
+        )
+        try:
+            async with async_session_factory() as session:
+                await session.exec(statement)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Enrichment cache write failed for {len(rows)} words: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_size": len(self.memory),
+        }
+
+
+enrichment_cache = EnrichmentCache(
+    maxsize=settings.ENRICHMENT_CACHE_SIZE,
+    ttl=settings.ENRICHMENT_CACHE_TTL_SECONDS,
+)
+ENRICHMENT_CACHE_ENTRIES.set_function(lambda: len(enrichment_cache.memory))
+
+
+# Across processes, when enabled (NEKO_ENRICH_LOCKS)
+enrichment_locks = AdvisoryLocks(lock_engine) if lock_engine is not None else None
+
+# Cache key -> the enrichment of that word running in this process (a flight):
+# a task, or a future resolved by a batch or a stream
+_in_flight: Dict[str, asyncio.Future] = {}
+
+# Batch enrichments resolving flights; the event loop only keeps weak
+# references to tasks
+_batch_tasks: Set[asyncio.Task] = set()
+
+
+class FlightAbandoned(Exception):
+    """The flight's leader went away before it finished (a stream whose client left)."""
+
+
+def lock_id(key: str) -> int:
+    """Advisory lock id for a cache key: its first 64 bits, as a signed bigint."""
+    return int.from_bytes(bytes.fromhex(key[:16]), "big", signed=True)
+
+
+def _start_flight(key: str, flight: asyncio.Future) -> None:
+    _in_flight[key] = flight
+    flight.add_done_callback(lambda done: _forget(key, done))
+
+
+def _forget(key: str, flight: asyncio.Future) -> None:
+    if _in_flight.get(key) is flight:
+        del _in_flight[key]
+    if not flight.cancelled():
+        flight.exception()  # retrieved: every caller may have gone
+
+
+async def _lock_word(
+    stack: AsyncExitStack, word: str, language: str, key: str,
+    timeout: float = settings.ENRICH_LOCK_WAIT_SECONDS,
+) -> bool:
+    """Hold the word's advisory lock until `stack` closes, waiting for another
+    process that holds it. Returns whether it waited.
+
+    Without locks, or when the lock can't be had in time, nothing is held and
+    the enrichment goes ahead anyway.
+    """
+    if enrichment_locks is None:
+        return False
+    try:
+        return await stack.enter_async_context(enrichment_locks.hold(lock_id(key), timeout))
+    except Exception as e:
+        logger.warning("Enrichment lock unavailable for {} ({}), enriching without it: {}", word, language, e)
+        return False
+
+
+async def _try_lock_word(stack: AsyncExitStack, word: str, language: str, key: str) -> bool:
+    """Like `_lock_word` without waiting: False when another process holds the lock."""
+    if enrichment_locks is None:
+        return True
+    lock = lock_id(key)
+    try:
+        if not await enrichment_locks.try_acquire(lock):
+            return False
+    except Exception as e:
+        logger.warning("Enrichment lock unavailable for {} ({}), enriching without it: {}", word, language, e)
+        return True
+    stack.push_async_callback(enrichment_locks.release, lock)
+    return True
+
+
+async def cached_enrich_word(word: str, language: str = "en") -> Dict[str, Any]:
+    """`enrich_word` with the enrichment cache in front of it.
+
+    Concurrent misses for the same word make one LLM call (single flight),
+    whichever path they come from (this function, `cached_enrich_words`,
+    `cached_stream_enrich_word`): callers in this process await the same
+    flight, and processes take turns on a Postgres advisory lock, so that a
+    follower reads the leader's result from the cache instead of calling the
+    LLM again.
+    """
+    while True:
+        data = await enrichment_cache.get(word, language)
+        if data is not None:
+            logger.info("Enrichment cache hit for: {} ({})", word, language)
+            return data
+
+        key = cache_key(word, language)
+        flight = _in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(_enrich_locked(word, language, key))
+            _start_flight(key, flight)
+        else:
+            ENRICHMENT_SINGLE_FLIGHT.labels("joined").inc()
+        try:
+            # A caller going away (client disconnect) must not cancel the others' call
+            return await asyncio.shield(flight)
+        except FlightAbandoned:
+            continue
+
+
+async def _enrich_locked(word: str, language: str, key: str) -> Dict[str, Any]:
+    """Enrich under the word's advisory lock, unless another process just did.
+
+    Without the lock (database error, or the leader took longer than
+    ENRICH_LOCK_WAIT_SECONDS) the LLM is called anyway.
+    """
+    async with AsyncExitStack() as stack:
+        if await _lock_word(stack, word, language, key):
+            data = await enrichment_cache.get(word, language)
+            if data is not None:
+                ENRICHMENT_SINGLE_FLIGHT.labels("followed").inc()
+                return data
+
+        ENRICHMENT_SINGLE_FLIGHT.labels("leader").inc()
+        data, model = await enrich_word(normalize_word(word), language)
+        # Written before the lock is released: the followers read it next
+        await enrichment_cache.set(word, language, data, model)
+        return data
+
+
+async def cached_enrich_words(
+    words: List[str], language: str = "en"
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """`enrich_words` with the enrichment cache and single flight in front of it.
+    Words must be normalized.
+
+    Misses already being enriched in this process await that flight; this call
+    leads the flights of the others and enriches them together
+    (`_enrich_batch_locked`).
+    """
+    results = await enrichment_cache.get_many(words, language)
+    errors: Dict[str, str] = {}
+    missing = [w for w in words if w not in results]
+    while missing:
+        loop = asyncio.get_running_loop()
+        flights: Dict[str, asyncio.Future] = {}
+        owned: Dict[str, asyncio.Future] = {}
+        for word in missing:
+            key = cache_key(word, language)
+            flight = _in_flight.get(key)
+            if flight is None:
+                flight = owned[word] = loop.create_future()
+                _start_flight(key, flight)
+            else:
+                ENRICHMENT_SINGLE_FLIGHT.labels("joined").inc()
+            flights[word] = flight
+        if owned:
+            task = asyncio.ensure_future(_enrich_batch_locked(owned, language))
+            _batch_tasks.add(task)
+            task.add_done_callback(_batch_tasks.discard)
+
+        missing = []
+        for word, flight in flights.items():
+            try:
+                results[word] = await asyncio.shield(flight)
+            except FlightAbandoned:
+                missing.append(word)
+            except Exception as e:
+                errors[word] = str(e) or type(e).__name__
+    return results, errors
+
+
+async def _enrich_batch_locked(owned: Dict[str, asyncio.Future], language: str) -> None:
+    """Enrich the words of the flights in `owned` and resolve them.
+
+    Words whose advisory lock is free are locked without waiting and enriched
+    in one go. Then, holding no lock any more, the words another process is
+    enriching: their locks are taken in lock id order, so that two batches
+    never wait on each other, and only what is still missing from the cache
+    once they are released is enriched.
+    """
+    try:
+        keys = {word: cache_key(word, language) for word in owned}
+        busy = []
+        async with AsyncExitStack() as stack:
+            free = []
+            for word in owned:
+                if await _try_lock_word(stack, word, language, keys[word]):
+                    free.append(word)
+                else:
+                    busy.append(word)
+            await _enrich_batch(free, language, owned)
+
+        if busy:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.ENRICH_LOCK_WAIT_SECONDS
+            async with AsyncExitStack() as stack:
+                for word in sorted(busy, key=lambda word: lock_id(keys[word])):
+                    await _lock_word(stack, word, language, keys[word], timeout=max(0.0, deadline - loop.time()))
+                found = await enrichment_cache.get_many(busy, language)
+                for word, data in found.items():
+                    ENRICHMENT_SINGLE_FLIGHT.labels("followed").inc()
+                    owned[word].set_result(data)
+                await _enrich_batch([w for w in busy if w not in found], language, owned)
+    finally:
+        for flight in owned.values():
+            if not flight.done():
+                flight.set_exception(RuntimeError("Enrichment did not finish"))
+
+
+async def _enrich_batch(words: List[str], language: str, owned: Dict[str, asyncio.Future]) -> None:
+    if not words:
+        return
+    ENRICHMENT_SINGLE_FLIGHT.labels("leader").inc(len(words))
+    enriched, errors = await enrich_words(words, language)
+    by_model: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for word, (data, model) in enriched.items():
+        by_model.setdefault(model, {})[word] = data
+    # Written before the locks are released: the followers read them next
+    for model, items in by_model.items():
+        await enrichment_cache.set_many(items, language, model)
+    for word, (data, _) in enriched.items():
+        owned[word].set_result(data)
+    for word, message in errors.items():
+        owned[word].set_exception(RuntimeError(message))
+
+
+async def cached_stream_enrich_word(word: str, language: str = "en") -> AsyncIterator[Tuple[str, Any]]:
+    """`stream_enrich_word` with the enrichment cache and single flight in front of it.
+
+    Partial events are only streamed when this call enriches the word. An
+    enrichment from the cache or from another flight (in this process, or in
+    another one through the advisory lock) comes as a single ("done", data).
+    Other callers join the stream's flight; if its client goes away before
+    the end they start their own.
+    """
+    while True:
+        data = await enrichment_cache.get(word, language)
+        if data is not None:
+            yield "done", data
+            return
+        key = cache_key(word, language)
+        flight = _in_flight.get(key)
+        if flight is None:
+            break
+        ENRICHMENT_SINGLE_FLIGHT.labels("joined").inc()
+        try:
+            data = await asyncio.shield(flight)
+        except FlightAbandoned:
+            continue
+        yield "done", data
+        return
+
+    flight = asyncio.get_running_loop().create_future()
+    _start_flight(key, flight)
+    try:
+        async with AsyncExitStack() as stack:
+            if await _lock_word(stack, word, language, key):
+                data = await enrichment_cache.get(word, language)
+                if data is not None:
+                    ENRICHMENT_SINGLE_FLIGHT.labels("followed").inc()
+                    flight.set_result(data)
+                    yield "done", data
+                    return
+
+            ENRICHMENT_SINGLE_FLIGHT.labels("leader").inc()
+            async for event, value in stream_enrich_word(word, language):
+                if event == "done":
+                    value, model = value
+                    await enrichment_cache.set(word, language, value, model)
+                    flight.set_result(value)
+                yield event, value
+    except Exception as e:
+        if not flight.done():
+            flight.set_exception(e)
+        raise
+    finally:
+        if not flight.done():
+            flight.set_exception(FlightAbandoned())
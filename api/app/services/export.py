@@ -0,0 +1,83 @@
+"""Deck export for GET /export: every word with its review state, streamed.
+
+Rows come from a server-side cursor EXPORT_CHUNK_ROWS at a time and are
+encoded (and optionally gzipped) chunk by chunk, so memory use does not grow
+with the deck. The whole export is one statement, i.e. one consistent
+snapshot.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.db import engine
+from ..models.review import Review
+from ..models.word import Word
+
+COLUMNS = [
+    Word.id, Word.word, Word.language, Word.translation, Word.examples, Word.created_at,
+    Review.interval, Review.ease_factor, Review.streak, Review.next_review_at, Review.last_reviewed_at,
+]
+FIELDS = [column.key for column in COLUMNS]
+
+
+async def export_rows(language: Optional[str] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Chunks of rows, one dict per word; review fields are None for a word without a review."""
+    statement = (
+        select(*COLUMNS)
+        .outerjoin(Review, Review.word_id == Word.id)
+        .execution_options(yield_per=settings.EXPORT_CHUNK_ROWS)
+    )
+    if language:
+        statement = statement.where(Word.language == language)
+    async with engine.connect() as conn:
+        result = await conn.stream(statement)
+        async for rows in result.partitions():
+            yield [dict(zip(FIELDS, row)) for row in rows]
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (str, int, float, list, dict)):
+        return str(value)
+    return value
+
+
+async def ndjson_chunks(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield "".join(
+            json.dumps({key: _plain(value) for key, value in row.items()}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+async def csv_chunks(chunks: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """CSV with a header row; examples are a JSON array in one column."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    async for rows in chunks:
+        for row in rows:
+            writer.writerow([
+                json.dumps(value, ensure_ascii=False) if key == "examples" else _plain(value)
+                for key, value in row.items()
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream on the fly into one gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,268 @@
+"""Bulk import for POST /words/import: CSV, TSV and Anki plain-text exports.
+
+Rows are parsed lazily from the uploaded file and streamed into a temporary
+staging table with asyncpg's binary COPY; one statement then merges them:
+
+- rows with a translation become words (with an alias and a review, due now
+  unless the file carries review state, e.g. a GET /export CSV); no LLM call
+- rows with only a word are queued as enrichment jobs for the worker pool
+- words that already exist (same word and language) are left untouched, and
+  within the file the first row of a word wins
+"""
+import asyncio
+import csv
+import html
+import io
+import json
+import re
+import tempfile
+from datetime import datetime
+from typing import IO, Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from sqlalchemy import text
+
+from ..core.db import engine
+from .enrichment_cache import normalize_word
+from .reviewing import naive_utc
+
+# Uploads larger than this are spooled to a temporary file while receiving
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# Columns recognised in a header row (any order, case-insensitive); files
+# without a header are read positionally as word, translation, example,
+# example translation
+HEADER_COLUMNS = {
+    "word", "translation", "examples", "example", "example_translation", "language",
+    "interval", "ease_factor", "streak", "next_review_at", "last_reviewed_at",
+}
+POSITIONAL = ["word", "translation", "example", "example_translation"]
+
+ANKI_SEPARATORS = {"tab": "\t", "comma": ",", "semicolon": ";", "space": " ", "pipe": "|", "colon": ":"}
+
+STAGING_COLUMNS = [
+    "n", "word", "language", "translation", "examples",
+    "interval", "ease_factor", "streak", "next_review_at", "last_reviewed_at",
+]
+
+CREATE_STAGING = text("""
+    CREATE TEMP TABLE import_rows (
+        n bigint, word text, language text, translation text, examples jsonb,
+        interval integer, ease_factor double precision, streak integer,
+        next_review_at timestamp, last_reviewed_at timestamp
+    ) ON COMMIT DROP
+""")
+
+# First row of each (word, language) wins. Jobs are only queued for words
+# that neither exist nor are queued already.
+MERGE = text("""
+    WITH rows AS (
+        SELECT DISTINCT ON (word, language) * FROM import_rows ORDER BY word, language, n
+    ), new_words AS (
+        INSERT INTO words (id, word, language, translation, examples, created_at)
+        SELECT gen_random_uuid(), word, language, translation, coalesce(examples, '[]'), timezone('utc', now())
+        FROM rows WHERE translation IS NOT NULL
+        ON CONFLICT (word, language) DO NOTHING
+        RETURNING id, word, language
+    ), new_reviews AS (
+        INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at, last_reviewed_at)
+        SELECT w.id, w.language, coalesce(r.interval, 0), coalesce(r.ease_factor, 2.5), coalesce(r.streak, 0),
+               coalesce(r.next_review_at, timezone('utc', now())), r.last_reviewed_at
+        FROM new_words w JOIN rows r ON r.word = w.word AND r.language = w.language
+        RETURNING word_id
+    ), new_aliases AS (
+        INSERT INTO word_aliases (surface, language, word_id)
+        SELECT word, language, id FROM new_words
+        ON CONFLICT (surface, language) DO NOTHING
+        RETURNING surface
+    ), jobs AS (
+        INSERT INTO enrichment_jobs (id, word, language, status, attempts, run_after, created_at, updated_at)
+        SELECT gen_random_uuid(), r.word, r.language, 'queued', 0,
+               timezone('utc', now()), timezone('utc', now()), timezone('utc', now())
+        FROM rows r
+        WHERE r.translation IS NULL
+          AND NOT EXISTS (SELECT 1 FROM words w WHERE w.word = r.word AND w.language = r.language)
+          AND NOT EXISTS (
+              SELECT 1 FROM enrichment_jobs j
+              WHERE j.word = r.word AND j.language = r.language AND j.status IN ('queued', 'running')
+          )
+        RETURNING id
+    )
+    SELECT
+        (SELECT count(*) FROM import_rows) AS rows,
+        (SELECT count(*) FROM rows) AS unique_rows,
+        (SELECT count(*) FROM new_words) AS created,
+        (SELECT count(*) FROM new_reviews) AS reviews,
+        (SELECT count(*) FROM jobs) AS queued
+""")
+
+_TAG = re.compile(r"<[^>]+>")
+_LINE_BREAK = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_SOUND = re.compile(r"\[sound:[^\]]*\]")
+
+
+def _strip_html(value: str) -> str:
+    value = _LINE_BREAK.sub("\n", value)
+    return html.unescape(_TAG.sub("", _SOUND.sub("", value))).strip()
+
+
+def detect_format(first_line: str) -> str:
+    if first_line.startswith("#separator:") or first_line.startswith("#html:"):
+        return "anki"
+    return "tsv" if "\t" in first_line else "csv"
+
+
+class ImportStats:
+    """Rows skipped while parsing, filled in as the file is read."""
+
+    def __init__(self):
+        self.invalid = 0
+
+
+def parse_rows(file: IO[str], format: str, language: str, stats: ImportStats) -> Iterator[Dict[str, Any]]:
+    """Rows of an uploaded file, one dict per card, read lazily.
+
+    Anki exports start with `#key:value` lines: `#separator`, `#html`, and
+    `#<name> column:<n>` for the GUID / note type / deck / tags columns,
+    which are dropped so the note fields remain.
+    """
+    first = file.readline()
+    if format == "auto":
+        format = detect_format(first)
+    lines = _chain(first, file)
+
+    delimiter = "\t" if format in ("tsv", "anki") else ","
+    strip_html = False
+    meta_columns = set()
+    if format == "anki":
+        lines, directives = _anki_directives(lines)
+        separator = directives.get("separator", "tab")
+        delimiter = ANKI_SEPARATORS.get(separator.lower(), separator[:1] or "\t")
+        strip_html = directives.get("html", "false").lower() == "true"
+        for key, value in directives.items():
+            if key.endswith(" column") and value.isdigit():
+                meta_columns.add(int(value) - 1)
+
+    columns = None
+    for fields in csv.reader(lines, delimiter=delimiter):
+        if meta_columns:
+            fields = [field for i, field in enumerate(fields) if i not in meta_columns]
+        if strip_html:
+            fields = [_strip_html(field) for field in fields]
+        if not any(field.strip() for field in fields):
+            # Blank line, e.g. the trailing ones of an Anki export
+            continue
+        if columns is None and format != "anki":
+            header = [field.strip().lower() for field in fields]
+            if "word" in header:
+                columns = [name if name in HEADER_COLUMNS else "" for name in header]
+                continue
+            columns = POSITIONAL
+        row = _to_row(dict(zip(columns or POSITIONAL, fields)), language)
+        if row is None:
+            stats.invalid += 1
+        else:
+            yield row
+
+
+def _chain(first: str, rest: IO[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def _anki_directives(lines: Iterator[str]) -> Tuple[Iterator[str], Dict[str, str]]:
+    directives = {}
+    for line in lines:
+        if not line.startswith("#"):
+            return _chain(line, lines), directives
+        key, _, value = line[1:].rstrip("\r\n").partition(":")
+        directives[key.strip().lower()] = value.strip()
+    return iter(()), directives
+
+
+def _optional(value: Optional[str], parse) -> Any:
+    value = (value or "").strip()
+    return parse(value) if value else None
+
+
+def _timestamp(value: str) -> datetime:
+    # Columns are naive UTC timestamps; an offset (`Z`, `+02:00`) is converted
+    return naive_utc(datetime.fromisoformat(value))
+
+
+def _to_row(values: Dict[str, str], language: str) -> Optional[Dict[str, Any]]:
+    word = normalize_word(values.get("word") or "")
+    if not word:
+        return None
+    try:
+        if values.get("examples", "").strip():
+            examples = json.loads(values["examples"])
+            if not isinstance(examples, list):
+                return None
+        elif (values.get("example") or "").strip():
+            examples = [{
+                "sentence": values["example"].strip(),
+                "translation": (values.get("example_translation") or "").strip(),
+            }]
+        else:
+            examples = None
+        return {
+            "word": word,
+            "language": (values.get("language") or "").strip() or language,
+            "translation": (values.get("translation") or "").strip() or None,
+            "examples": json.dumps(examples, ensure_ascii=False) if examples is not None else None,
+            "interval": _optional(values.get("interval"), int),
+            "ease_factor": _optional(values.get("ease_factor"), float),
+            "streak": _optional(values.get("streak"), int),
+            "next_review_at": _optional(values.get("next_review_at"), _timestamp),
+            "last_reviewed_at": _optional(values.get("last_reviewed_at"), _timestamp),
+        }
+    except ValueError:
+        return None
+
+
+async def _records(rows: Iterator[Dict[str, Any]]) -> AsyncIterator[tuple]:
+    for n, row in enumerate(rows):
+        yield (n, *(row[column] for column in STAGING_COLUMNS[1:]))
+        if n % 1000 == 999:
+            # Parsing is CPU work: let other requests run
+            await asyncio.sleep(0)
+
+
+async def import_file(file: IO[bytes], format: str, language: str) -> Dict[str, int]:
+    """COPY the rows of `file` into a staging table and merge them in one transaction.
+
+    Raises ValueError for a file that can't be parsed; nothing is imported then.
+    """
+    stats = ImportStats()
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(CREATE_STAGING)
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                "import_rows",
+                records=_records(parse_rows(text_file, format, language, stats)),
+                columns=STAGING_COLUMNS,
+            )
+            result = (await conn.execute(MERGE)).one()
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Could not parse the file: {e}")
+    finally:
+        text_file.detach()
+    return {
+        "rows": result.rows + stats.invalid,
+        "created": result.created,
+        "queued": result.queued,
+        # Already in the deck, or already queued for enrichment
+        "skipped": result.unique_rows - result.created - result.queued,
+        "duplicates": result.rows - result.unique_rows,
+        "invalid": stats.invalid,
+    }
+
+
+async def import_stream(chunks: AsyncIterator[bytes], format: str, language: str) -> Dict[str, int]:
+    """Receive an upload into a (spooled) temporary file, then `import_file` it."""
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+        async for chunk in chunks:
+            spool.write(chunk)
+        spool.seek(0)
+        return await import_file(spool, format, language)
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import uuid
+from loguru import logger
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update
+
+from ..core.config import settings
+from ..core.db import async_session_factory
+from ..models.job import EnrichmentJob
+from .enrichment_cache import cached_enrich_word, normalize_word
+from .vocabulary import reset_known_word, save_enriched_word
+
+
+async def enqueue_job(session: AsyncSession, word: str, language: str) -> EnrichmentJob:
+    job = EnrichmentJob(word=normalize_word(word), language=language)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    job_workers.notify()
+    return job
+
+
+async def _claim_job() -> Optional[EnrichmentJob]:
+    """Lock the oldest runnable job and lease it to this worker.
+
+    Runnable means queued, or running with an expired lease (its worker died).
+    A job whose lease expired on its last attempt is marked failed instead.
+    SKIP LOCKED lets any number of workers, in any number of processes, poll
+    the same table without handing out a job twice.
+    """
+    now = datetime.utcnow()
+    async with async_session_factory() as session:
+        statement = (
+            select(EnrichmentJob)
+            .where(col(EnrichmentJob.status).in_(["queued", "running"]))
+            .where(EnrichmentJob.run_after <= now)
+            .order_by(EnrichmentJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        while True:
+            job = (await session.exec(statement)).first()
+            if not job:
+                return None
+            if job.status != "running" or job.attempts < settings.JOB_MAX_ATTEMPTS:
+                break
+            logger.warning("Enrichment job {} for {} lost its worker on the last attempt", job.id, job.word)
+            job.status = "failed"
+            job.error = f"Worker stopped during attempt {job.attempts} of {settings.JOB_MAX_ATTEMPTS}"
+            job.updated_at = now
+            session.add(job)
+            await session.commit()
+        job.status = "running"
+        job.attempts += 1
+        job.run_after = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        job.updated_at = now
+        session.add(job)
+        await session.commit()
+        return job
+
+
+async def _update_job(job_id: uuid.UUID, **values) -> None:
+    async with async_session_factory() as session:
+        await session.exec(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.id == job_id)
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+        await session.commit()
+
+
+async def _run_job(job: EnrichmentJob) -> None:
+    logger.info("Running enrichment job {} for: {} (attempt {})", job.id, job.word, job.attempts)
+    try:
+        async with async_session_factory() as session:
+            word = await reset_known_word(session, job.word, job.language)
+        if not word:
+            # No session is held while the LLM works
+            data = await cached_enrich_word(job.word, job.language)
+            async with async_session_factory() as session:
+                word, _ = await save_enriched_word(session, job.word, job.language, data)
+        await _update_job(job.id, status="done", word_id=word.id, error=None)
+    except Exception as e:
+        logger.error(f"Enrichment job {job.id} for {job.word} failed: {e}")
+        if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            await _update_job(job.id, status="failed", error=str(e))
+        else:
+            backoff = timedelta(seconds=5 * 2 ** (job.attempts - 1))
+            await _update_job(job.id, status="queued", error=str(e), run_after=datetime.utcnow() + backoff)
+
+
+class JobWorkerPool:
+    """Background workers draining the enrichment_jobs table, run inside the app lifespan."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def notify(self) -> None:
+        """Wake idle workers right away instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.size)]
+        if self.size:
+            logger.info("Started {} enrichment job workers", self.size)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, n: int) -> None:
+        while not self._stopping:
+            job = None
+            try:
+                job = await _claim_job()
+                if job:
+                    await _run_job(job)
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                if job:
+                    # Hand the job back so the next process picks it up immediately
+                    await asyncio.shield(_update_job(
+                        job.id, status="queued", attempts=job.attempts - 1, run_after=datetime.utcnow()
+                    ))
+                raise
+            except Exception as e:
+                logger.error(f"Enrichment job worker {n} error: {e}")
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+
+job_workers = JobWorkerPool(settings.JOB_WORKERS)
@@ -0,0 +1,150 @@
+"""Incremental parsing of a JSON object that is still being generated.
+
+The LLM streams the enrichment object token by token. `EnrichmentStreamParser`
+re-scans the text received so far and reports each top-level field (and each
+element of the "examples" array) as soon as its value is complete, so it can
+be shown before the rest of the object has arrived.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_ws(text: str, i: int) -> int:
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _string_end(text: str, i: int) -> Optional[int]:
+    """Index just past the string starting at text[i] == '"', or None if unterminated."""
+    i += 1
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"':
+            return i + 1
+        i += 1
+    return None
+
+
+def _value_end(text: str, i: int) -> Optional[int]:
+    """Index just past the JSON value starting at text[i], or None if it is not complete yet."""
+    if text[i] == '"':
+        return _string_end(text, i)
+    if text[i] in "[{":
+        depth = 0
+        while i < len(text):
+            c = text[i]
+            if c == '"':
+                end = _string_end(text, i)
+                if end is None:
+                    return None
+                i = end
+                continue
+            if c in "[{":
+                depth += 1
+            elif c in "]}":
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return None
+    # Number or literal: only complete once something follows it
+    while i < len(text):
+        if text[i] in ",}]" + _WHITESPACE:
+            return i
+        i += 1
+    return None
+
+
+def _array_items(text: str, i: int) -> Tuple[List[Any], Optional[int]]:
+    """Complete elements of the array starting at text[i] == '['.
+
+    Returns (elements, index past the array) or (elements so far, None).
+    """
+    items: List[Any] = []
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return items, None
+        if text[i] == "]":
+            return items, i + 1
+        if text[i] == ",":
+            i += 1
+            continue
+        end = _value_end(text, i)
+        if end is None:
+            return items, None
+        items.append(json.loads(text[i:end]))
+        i = end
+
+
+def scan_partial_object(text: str) -> Dict[str, Any]:
+    """Top-level fields of a partial JSON object whose values are complete.
+
+    Array fields are included with the elements that are complete so far.
+    """
+    fields: Dict[str, Any] = {}
+    i = _skip_ws(text, 0)
+    if i >= len(text) or text[i] != "{":
+        return fields
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text) or text[i] == "}":
+            return fields
+        if text[i] == ",":
+            i += 1
+            continue
+        key_end = _string_end(text, i) if text[i] == '"' else None
+        if key_end is None:
+            return fields
+        key = json.loads(text[i:key_end])
+        i = _skip_ws(text, key_end)
+        if i >= len(text) or text[i] != ":":
+            return fields
+        i = _skip_ws(text, i + 1)
+        if i >= len(text):
+            return fields
+        if text[i] == "[":
+            items, end = _array_items(text, i)
+            fields[key] = items
+        else:
+            end = _value_end(text, i)
+            if end is not None:
+                fields[key] = json.loads(text[i:end])
+        if end is None:
+            return fields
+        i = end
+
+
+class EnrichmentStreamParser:
+    """Turns streamed enrichment JSON into ("word" | "translation" | "example", value) events."""
+
+    def __init__(self):
+        self.text = ""
+        self._sent_word = False
+        self._sent_translation = False
+        self._sent_examples = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        fields = scan_partial_object(self.text)
+        events: List[Tuple[str, Any]] = []
+        if not self._sent_word and isinstance(fields.get("word"), str):
+            self._sent_word = True
+            events.append(("word", fields["word"]))
+        if not self._sent_translation and isinstance(fields.get("translation"), str):
+            self._sent_translation = True
+            events.append(("translation", fields["translation"]))
+        examples = fields.get("examples")
+        if isinstance(examples, list):
+            for example in examples[self._sent_examples:]:
+                events.append(("example", example))
+            self._sent_examples = len(examples)
+        return events
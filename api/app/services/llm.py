@@ -1,51 +1,91 @@
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, List, Tuple
 import json
+import hashlib
+import time
 from openai import AsyncOpenAI, AsyncAzureOpenAI
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import retry, stop_after_attempt, wait_random_exponential
 from loguru import logger
 from ..core.config import settings
+from ..core.logging import clip
+from ..core.metrics import LLM_RETRIES, LLM_TOKENS, span
+from .json_stream import EnrichmentStreamParser
+from .llm_router import Backend, CircuitBreaker, LLMRouter, timed_call
+from .rate_limit import RateLimiter
 
 
-def _create_client():
-    """Create OpenAI client based on configuration."""
-    if settings.LLM_PROVIDER == "azure":
-        if not settings.AZURE_OPENAI_API_KEY or not settings.AZURE_OPENAI_ENDPOINT:
+def _create_client(provider: str, spec: Dict[str, Any]):
+    """Create an OpenAI or Azure OpenAI client; missing keys come from the settings.
+
+    The SDK's own retries are off: failover, hedging and retries are the
+    router's and tenacity's, and hidden retries would only delay failover.
+    """
+    if provider == "azure":
+        api_key = spec.get("api_key") or settings.AZURE_OPENAI_API_KEY
+        endpoint = spec.get("endpoint") or settings.AZURE_OPENAI_ENDPOINT
+        if not api_key or not endpoint:
             raise ValueError("Azure OpenAI requires AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT")
         # Strip trailing path if user provided full URL
-        endpoint = settings.AZURE_OPENAI_ENDPOINT.rstrip("/")
+        endpoint = endpoint.rstrip("/")
         for suffix in ["/openai/v1", "/openai"]:
             if endpoint.endswith(suffix):
                 endpoint = endpoint[:-len(suffix)]
                 break
         return AsyncAzureOpenAI(
-            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_key=api_key,
             azure_endpoint=endpoint,
-            api_version=settings.AZURE_OPENAI_API_VERSION,
+            api_version=spec.get("api_version") or settings.AZURE_OPENAI_API_VERSION,
+            max_retries=0,
         )
-    else:
-        if not settings.OPENAI_API_KEY:
+    elif provider == "openai":
+        api_key = spec.get("api_key") or settings.OPENAI_API_KEY
+        if not api_key:
             raise ValueError("OpenAI requires OPENAI_API_KEY")
         return AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL,
+            api_key=api_key,
+            base_url=spec.get("base_url") or settings.OPENAI_BASE_URL,
+            max_retries=0,
         )
+    raise ValueError(f"Unknown LLM provider {provider!r} (expected openai or azure)")
 
 
-def _get_model_name() -> str:
-    """Get model name based on provider."""
-    if settings.LLM_PROVIDER == "azure":
-        return settings.AZURE_DEPLOYMENT_NAME
-    return settings.OPENAI_MODEL
+def _create_backend(spec: Dict[str, Any]) -> Backend:
+    provider = spec.get("provider") or settings.LLM_PROVIDER
+    model = spec.get("model") or (settings.AZURE_DEPLOYMENT_NAME if provider == "azure" else settings.OPENAI_MODEL)
+    return Backend(
+        name=spec.get("name") or f"{provider}:{model}",
+        provider=provider,
+        model=model,
+        client=_create_client(provider, spec),
+        breaker=CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_COOLDOWN_SECONDS),
+        window=settings.LLM_LATENCY_WINDOW,
+    )
 
 
-client = _create_client()
+def _create_router() -> LLMRouter:
+    """Backends from LLM_BACKENDS, or the single LLM_PROVIDER one."""
+    backends = [_create_backend(spec) for spec in settings.LLM_BACKENDS or [{}]]
+    names = [backend.name for backend in backends]
+    if len(set(names)) != len(names):
+        raise ValueError(f"LLM backend names must be unique (set \"name\"): {names}")
+    return LLMRouter(
+        backends,
+        hedge=settings.LLM_HEDGE,
+        hedge_min=settings.LLM_HEDGE_MIN_MS / 1000,
+        hedge_default=settings.LLM_HEDGE_DEFAULT_MS / 1000,
+    )
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-async def enrich_word(word: str, language: str = "en") -> Dict[str, Any]:
-    model_name = _get_model_name()
-    logger.info(f"Enriching word: {word} ({language}) | Provider: {settings.LLM_PROVIDER} | Model: {model_name}")
-    
-    prompt = f"""
+
+def get_model_identity() -> str:
+    """Provider/model pair of the preferred backend."""
+    return router.primary.identity
+
+
+def model_identities() -> List[str]:
+    """Provider/model pairs of every backend, in order of preference."""
+    return list(dict.fromkeys(backend.identity for backend in router.backends))
+
+
+ENRICH_PROMPT_TEMPLATE = """
     You are a vocabulary assistant. Analyze the {language} word "{word}".
 
     Rules for word forms:
@@ -68,25 +108,266 @@ async def enrich_word(word: str, language: str = "en") -> Dict[str, Any]:
     - Provide at least 2 examples, preferably related to daily life or programming/software engineering.
     - Keep translation concise.
     """
+
+ENRICH_BATCH_PROMPT_TEMPLATE = """
+    You are a vocabulary assistant. Analyze each of these {language} words: {words}
+
+    Rules for word forms:
+    - If an input is a conjugated verb or plural noun, set "word" to the base form (lemma).
+    - For IRREGULAR forms only, append the conjugation pattern after translation, e.g., "(write-wrote-written)" or "(child-children)".
+    - For REGULAR forms (add -ed, -s, -ing), do NOT mention any rule.
+
+    Return a valid JSON object with one entry per input word, in the same order:
+    {{
+      "results": [
+        {{
+          "input": "the input word exactly as given",
+          "word": "base form",
+          "translation": "/IPA/ Chinese translation (irregular note only if applicable)",
+          "examples": [
+            {{"sentence": "Example in {language}", "translation": "Chinese translation"}},
+            {{"sentence": "Example in {language}", "translation": "Chinese translation"}}
+          ]
+        }}
+      ]
+    }}
+
+    Requirements:
+    - Include IPA phonetic transcription at the start of translation.
+    - Provide at least 2 examples, preferably related to daily life or programming/software engineering.
+    - Keep translation concise.
+    """
+
+# Changes whenever a prompt text changes, so cached enrichments built with an
+# older prompt are never served.
+PROMPT_VERSION = hashlib.sha256(
+    (ENRICH_PROMPT_TEMPLATE + ENRICH_BATCH_PROMPT_TEMPLATE).encode("utf-8")
+).hexdigest()[:16]
+
+# A validated enrichment and the provider/model that produced it
+Enrichment = Tuple[Dict[str, Any], str]
+
+# Running totals of tokens reported by the provider, for benchmarks and debugging
+token_usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+# Rough completion size of one enrichment, used to reserve tokens-per-minute budget
+COMPLETION_TOKENS_PER_WORD = 250
+
+rate_limiter = RateLimiter(rpm=settings.LLM_RPM_LIMIT, tpm=settings.LLM_TPM_LIMIT)
+
+
+def _record_usage(response, estimated_tokens: int) -> None:
+    token_usage["calls"] += 1
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        token_usage["prompt_tokens"] += usage.prompt_tokens or 0
+        token_usage["completion_tokens"] += usage.completion_tokens or 0
+        LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+        rate_limiter.settle(estimated_tokens, usage.total_tokens or 0)
+
+
+def _count_retry(operation: str):
+    """tenacity before_sleep hook counting retries of `operation`."""
+    return lambda retry_state: LLM_RETRIES.labels(operation).inc()
+
+
+def _stream_options(backend: Backend) -> Dict[str, Any]:
+    if backend.provider == "openai":
+        # Usage is only reported on streams when asked for
+        return {"stream_options": {"include_usage": True}}
+    return {}
+
+
+def _backoff():
+    """Full-jitter exponential wait between attempts, so retries from many
+    requests don't hit a recovering provider in lockstep."""
+    return wait_random_exponential(multiplier=0.5, max=settings.LLM_RETRY_MAX_WAIT_SECONDS)
+
+
+async def _complete_json(prompt: str, n_words: int = 1, operation: str = "enrich") -> Tuple[str, str]:
+    """Run one JSON-mode chat completion under the rate limiter.
+
+    Returns its content and the identity of the backend that answered.
+    """
+    # ~4 characters per token is close enough for budgeting
+    estimated_tokens = len(prompt) // 4 + COMPLETION_TOKENS_PER_WORD * n_words
+    with span("llm_rate_limit"):
+        await rate_limiter.acquire(estimated_tokens)
+    response, backend = await router.complete(
+        operation,
+        limiter=rate_limiter,
+        estimated_tokens=estimated_tokens,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+    )
+    logger.debug("LLM call ({}) served by {}", operation, backend.name)
+    _record_usage(response, estimated_tokens)
+
+    content = response.choices[0].message.content
+    if not content:
+        raise ValueError("Empty response from LLM")
+    return content, backend.identity
+
+
+def validate_enrichment(data: Any) -> Dict[str, Any]:
+    """Check the shape of one enrichment and return it with only the expected keys."""
+    if not isinstance(data, dict):
+        raise ValueError("Enrichment is not an object")
+    word = data.get("word")
+    translation = data.get("translation")
+    examples = data.get("examples")
+    if not isinstance(word, str) or not word.strip():
+        raise ValueError("Missing 'word'")
+    if not isinstance(translation, str) or not translation.strip():
+        raise ValueError("Missing 'translation'")
+    if not isinstance(examples, list) or not examples:
+        raise ValueError("Missing 'examples'")
+    for example in examples:
+        if not isinstance(example, dict) or not isinstance(example.get("sentence"), str) \
+                or not isinstance(example.get("translation"), str):
+            raise ValueError("Malformed example")
+    return {"word": word, "translation": translation, "examples": examples}
+
+
+router = _create_router()
+
+@retry(stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS), wait=_backoff(), before_sleep=_count_retry("enrich"))
+async def enrich_word(word: str, language: str = "en") -> Enrichment:
+    logger.info("Enriching word: {} ({}) | Backends: {}", word, language, [b.name for b in router.available()])
+    
+    prompt = ENRICH_PROMPT_TEMPLATE.format(word=word, language=language)
     
     try:
-        response = await client.chat.completions.create(
-            model=model_name,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
-        if not content:
-            raise ValueError("Empty response from LLM")
+        content, model = await _complete_json(prompt)
         
         # Log raw LLM output so it is visible in container logs for debugging
-        logger.info("LLM raw response for {}: {}", word, content)
+        # (clipped to LOG_PAYLOAD_MAX_CHARS)
+        logger.info("LLM raw response for {}: {}", word, clip(content))
             
-        data = json.loads(content)
-        logger.debug(f"LLM Response for {word}: {data}")
-        return data
+        data = validate_enrichment(json.loads(content))
+        logger.opt(lazy=True).debug("LLM Response for {}: {}", lambda: word, lambda: clip(str(data)))
+        return data, model
         
     except Exception as e:
         logger.error(f"Error enriching word {word}: {e}")
         raise
+
+
+@retry(stop=stop_after_attempt(2), wait=_backoff(), before_sleep=_count_retry("batch"), reraise=True)
+async def _request_batch(words: List[str], language: str) -> Tuple[List[Any], str]:
+    """One chat completion for several words.
+
+    Returns the raw, unvalidated entries and the identity of the backend that
+    answered.
+
+    Raises ValueError when the response arrived but can't be used, anything
+    else when the call itself failed (transport, provider, no backend).
+    """
+    prompt = ENRICH_BATCH_PROMPT_TEMPLATE.format(
+        words=json.dumps(words, ensure_ascii=False), language=language
+    )
+    content, model = await _complete_json(prompt, n_words=len(words), operation="batch")
+    logger.info("LLM raw batch response for {}: {}", words, clip(content))
+
+    parsed = json.loads(content)
+    results = parsed.get("results") if isinstance(parsed, dict) else None
+    if not isinstance(results, list):
+        raise ValueError("Batch response has no 'results' array")
+    return results, model
+
+
+async def enrich_words(
+    words: List[str], language: str = "en"
+) -> Tuple[Dict[str, Enrichment], Dict[str, str]]:
+    """Enrich several words with a single chat completion.
+
+    Entries are matched back to inputs by their "input" field and validated one
+    by one. Whatever is missing or malformed is split in half and retried, down
+    to the single-word prompt, so one bad entry never fails the whole batch.
+    When the call itself fails (timeout, provider error, outage) nothing is
+    split: every word of the batch is returned as failed, so an outage costs
+    one batch request rather than one per word.
+    Returns ((enrichment, model) by input word, error message by input word).
+    """
+    if not words:
+        return {}, {}
+    if len(words) == 1:
+        try:
+            return {words[0]: await enrich_word(words[0], language)}, {}
+        except Exception as e:
+            return {}, {words[0]: str(e) or type(e).__name__}
+
+    logger.info("Enriching {} words in one request ({})", len(words), language)
+    results: Dict[str, Enrichment] = {}
+    try:
+        entries, model = await _request_batch(words, language)
+    except ValueError as e:
+        logger.warning(f"Batch response for {len(words)} words unusable, splitting: {e}")
+        entries, model = [], None
+    except Exception as e:
+        logger.error(f"Batch enrichment of {len(words)} words failed: {e}")
+        message = str(e) or type(e).__name__
+        return {}, {word: message for word in words}
+
+    wanted = set(words)
+    for entry in entries:
+        key = entry.get("input") if isinstance(entry, dict) else None
+        if not isinstance(key, str) or key not in wanted or key in results:
+            continue
+        try:
+            results[key] = validate_enrichment(entry), model
+        except ValueError as e:
+            logger.warning(f"Malformed batch entry for {key}: {e}")
+
+    remaining = [w for w in words if w not in results]
+    errors: Dict[str, str] = {}
+    if remaining:
+        half = (len(remaining) + 1) // 2
+        for part in (remaining[:half], remaining[half:]):
+            part_results, part_errors = await enrich_words(part, language)
+            results.update(part_results)
+            errors.update(part_errors)
+    return results, errors
+
+
+async def stream_enrich_word(word: str, language: str = "en") -> AsyncIterator[Tuple[str, Any]]:
+    """Streaming variant of `enrich_word`.
+
+    Yields ("word" | "translation" | "example", value) as soon as each part of
+    the JSON has been generated, then ("done", (validated enrichment, identity
+    of the backend that streamed it)). Not
+    retried or hedged: a stream that already produced output cannot be
+    replayed. Only opening it fails over to the next backend.
+    """
+    logger.info("Streaming enrichment for: {} ({})", word, language)
+
+    prompt = ENRICH_PROMPT_TEMPLATE.format(word=word, language=language)
+    estimated_tokens = len(prompt) // 4 + COMPLETION_TOKENS_PER_WORD
+    with span("llm_rate_limit"):
+        await rate_limiter.acquire(estimated_tokens)
+
+    parser = EnrichmentStreamParser()
+    start = time.perf_counter()
+    stream, backend = await router.open_stream(
+        "stream",
+        _stream_options,
+        limiter=rate_limiter,
+        estimated_tokens=estimated_tokens,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+    )
+    with timed_call("stream", backend, start):
+        async for chunk in stream:
+            if chunk.usage is not None:
+                _record_usage(chunk, estimated_tokens)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                for event in parser.feed(delta):
+                    yield event
+
+    logger.info("LLM raw streamed response for {}: {}", word, clip(parser.text))
+    yield "done", (validate_enrichment(json.loads(parser.text)), backend.identity)
@@ -0,0 +1,285 @@
+"""Routing of chat completions over an ordered list of LLM backends.
+
+Each backend (one provider client and model) keeps the latencies and
+outcomes of its recent calls and a circuit breaker. A call goes to the first
+backend whose breaker is closed:
+
+- if it fails, the next backend is tried right away (failover)
+- if it has not answered after its own p95 latency (the hedge delay), the
+  same request is also sent to the next backend; the first answer wins and
+  the other call is cancelled
+- after LLM_BREAKER_FAILURES consecutive failures a backend is skipped for
+  LLM_BREAKER_COOLDOWN_SECONDS, then one trial call decides whether it is
+  used again
+
+Hedging costs a second completion for the slowest ~5% of calls; it only
+happens with two or more backends and LLM_HEDGE on. Each request after the
+first one of a call is taken from the caller's rate limiter too: a failover
+waits for budget, and a hedge is skipped when none is free, so hedging never
+pushes the provider quota over its limit.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from ..core.metrics import LLM_BREAKER_OPEN, LLM_HEDGES, LLM_LATENCY, LLM_SERVED, span
+from .rate_limit import RateLimiter
+
+# A backend's p95 is only trusted once it has this many successful calls
+MIN_LATENCY_SAMPLES = 20
+
+
+class NoBackendAvailable(Exception):
+    """Every backend's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed, then open after `failures` consecutive failures.
+
+    Once `cooldown` seconds have passed (half-open), a single trial call is
+    let through: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_running)
+
+    def begin(self) -> None:
+        if self.state == "half_open":
+            self._trial_running = True
+
+    def release(self) -> None:
+        """A call ended without telling anything about the backend (cancelled)."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+
+
+class Backend:
+    """One provider client and model, with its recent latencies and outcomes."""
+
+    def __init__(self, name: str, provider: str, model: str, client: Any, breaker: CircuitBreaker, window: int = 200):
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.client = client
+        self.breaker = breaker
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+
+    @property
+    def identity(self) -> str:
+        """Provider/model pair its answers depend on (part of the enrichment cache key)."""
+        return f"{self.provider}:{self.model}"
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def record(self, ok: bool, seconds: Optional[float] = None) -> None:
+        """Outcome of one call; `seconds` (successful whole completions only) feeds the p95."""
+        self.outcomes.append(ok)
+        was_open = self.breaker.opened_at is not None
+        if ok:
+            if seconds is not None:
+                self.latencies.append(seconds)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        is_open = self.breaker.opened_at is not None
+        if is_open != was_open:
+            logger.warning("LLM backend {} circuit {}", self.name, "opened" if is_open else "closed")
+            LLM_BREAKER_OPEN.labels(self.name).set(int(is_open))
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "name": self.name,
+            "breaker": self.breaker.state,
+            "calls": len(self.outcomes),
+            "error_rate": round(self.error_rate(), 3),
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+@contextmanager
+def timed_call(operation: str, backend: Backend, start: Optional[float] = None):
+    """Observe LLM_LATENCY for the block (from `start`, a perf_counter value,
+    when given) and count it as the "llm" span."""
+    start = start if start is not None else time.perf_counter()
+    outcome = "error"
+    try:
+        with span("llm"):
+            yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        LLM_LATENCY.labels(operation, backend.name, outcome).observe(time.perf_counter() - start)
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        backends: List[Backend],
+        hedge: bool = True,
+        hedge_min: float = 0.5,
+        hedge_default: float = 3.0,
+    ):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_min = hedge_min
+        self.hedge_default = hedge_default
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    def available(self) -> List[Backend]:
+        return [backend for backend in self.backends if backend.breaker.available()]
+
+    def hedge_delay(self, backend: Backend) -> float:
+        p95 = backend.p95()
+        return max(self.hedge_min, p95 if p95 is not None else self.hedge_default)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.stats() for backend in self.backends]
+
+    async def _attempt(self, backend: Backend, operation: str, request: Dict[str, Any]) -> Any:
+        backend.breaker.begin()
+        start = time.perf_counter()
+        try:
+            with timed_call(operation, backend):
+                response = await backend.client.chat.completions.create(model=backend.model, **request)
+        except asyncio.CancelledError:
+            backend.breaker.release()
+            raise
+        except Exception as e:
+            backend.record(False)
+            logger.warning("LLM backend {} failed ({}): {}", backend.name, operation, e)
+            raise
+        backend.record(True, time.perf_counter() - start)
+        return response
+
+    async def complete(
+        self, operation: str, limiter: Optional[RateLimiter] = None, estimated_tokens: int = 0, **request
+    ) -> Tuple[Any, Backend]:
+        """One chat completion, from whichever backend answers first.
+
+        The caller has taken the first request from `limiter`; failovers and
+        hedges take `estimated_tokens` from it again (see the module docstring).
+        Returns (response, backend that served it: its `identity` is the model
+        the answer came from, after failover or a won hedge too). Raises the last error when
+        every available backend failed, NoBackendAvailable when none is.
+        """
+        queue = self.available()
+        if not queue:
+            raise NoBackendAvailable("Every LLM backend's circuit breaker is open")
+        loop = asyncio.get_running_loop()
+        hedge_at = loop.time() + self.hedge_delay(queue[0])
+        hedged = not self.hedge
+        pending: Dict[asyncio.Task, Backend] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            backend = queue.pop(0)
+            pending[asyncio.ensure_future(self._attempt(backend, operation, request))] = backend
+
+        launch()
+        try:
+            while pending:
+                timeout = max(0.0, hedge_at - loop.time()) if queue and not hedged else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if limiter is not None and not limiter.try_acquire(estimated_tokens):
+                        logger.debug("No rate limit budget for a hedge ({})", operation)
+                        continue
+                    LLM_HEDGES.labels(operation).inc()
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        LLM_SERVED.labels(operation, backend.name).inc()
+                        return task.result(), backend
+                    last_error = task.exception()
+                if not pending and queue:
+                    if limiter is not None:
+                        await limiter.acquire(estimated_tokens)
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    async def open_stream(
+        self,
+        operation: str,
+        options: Callable[[Backend], Dict[str, Any]] = lambda backend: {},
+        limiter: Optional[RateLimiter] = None,
+        estimated_tokens: int = 0,
+        **request,
+    ) -> Tuple[Any, Backend]:
+        """Start a streamed completion on the first backend that accepts it.
+
+        `options(backend)` adds provider-specific arguments. Only opening the
+        stream fails over (each failover taking `estimated_tokens` from
+        `limiter`, like `complete`); it is not hedged, and an error after the
+        first chunk is the caller's.
+        """
+        last_error: Optional[BaseException] = None
+        for backend in self.available():
+            if last_error is not None and limiter is not None:
+                await limiter.acquire(estimated_tokens)
+            backend.breaker.begin()
+            try:
+                stream = await backend.client.chat.completions.create(
+                    model=backend.model, stream=True, **request, **options(backend)
+                )
+            except asyncio.CancelledError:
+                backend.breaker.release()
+                raise
+            except Exception as e:
+                backend.record(False)
+                logger.warning("LLM backend {} failed to open a stream: {}", backend.name, e)
+                last_error = e
+                continue
+            backend.record(True)
+            LLM_SERVED.labels(operation, backend.name).inc()
+            return stream, backend
+        raise last_error or NoBackendAvailable("Every LLM backend's circuit breaker is open")
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled at `rate` per second.
+
+    The level may go negative when a caller reports that it used more than it
+    reserved; later callers then wait for the debt to be refilled.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Take `amount` only if it is there now and no one is waiting for tokens."""
+        amount = min(amount, self.capacity)
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self.level < amount:
+            return False
+        self.level -= amount
+        return True
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or take (negative) tokens after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for LLM calls. 0 disables a limit."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.requests: Optional[TokenBucket] = TokenBucket(rpm, rpm / 60) if rpm > 0 else None
+        self.tokens: Optional[TokenBucket] = TokenBucket(tpm, tpm / 60) if tpm > 0 else None
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens:
+            await self.tokens.acquire(estimated_tokens)
+
+    def try_acquire(self, estimated_tokens: int) -> bool:
+        """Take one request and `estimated_tokens` if both are available now, without waiting."""
+        if self.requests and not self.requests.try_acquire(1):
+            return False
+        if self.tokens and not self.tokens.try_acquire(estimated_tokens):
+            if self.requests:
+                self.requests.adjust(1)
+            return False
+        return True
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token reservation once the provider reports real usage."""
+        if self.tokens:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
@@ -0,0 +1,273 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import delete, exists, false, insert, literal, update
+from sqlalchemy.exc import IntegrityError
+
+from ..core.db import execute_alone
+from ..models.review import Review
+from ..models.review_event import ReviewEvent
+from .scheduler import CardState, grade_quality, scheduler
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def grade_review(
+    review: Review,
+    grade: str,
+    now: datetime,
+    idempotency_key: Optional[str] = None,
+) -> ReviewEvent:
+    """Apply one grade to `review` in place with the configured scheduler and return the event to append.
+
+    Also bumps `review.version`. Neither object is added to a session; the
+    caller does that and commits.
+    """
+    event = ReviewEvent(
+        word_id=review.word_id,
+        ts=now,
+        grade=grade,
+        interval=0,
+        ease_factor=0.0,
+        prev_interval=review.interval,
+        prev_ease_factor=review.ease_factor,
+        prev_streak=review.streak,
+        prev_last_reviewed_at=review.last_reviewed_at,
+        idempotency_key=idempotency_key,
+    )
+    state = scheduler.next_card(
+        CardState(review.interval, review.ease_factor, review.streak, review.next_review_at, review.last_reviewed_at),
+        grade_quality(grade),
+        now,
+    )
+    review.interval = state.interval
+    review.ease_factor = state.ease_factor
+    review.streak = state.streak
+    review.next_review_at = state.next_review_at
+    review.last_reviewed_at = state.last_reviewed_at
+    review.version += 1
+
+    event.interval = review.interval
+    event.ease_factor = review.ease_factor
+    return event
+
+
+def _review_from_row(row) -> Review:
+    return Review(**{column.name: row._mapping[column.name] for column in Review.__table__.c})
+
+
+async def log_grade(
+    session: AsyncSession,
+    word_id: uuid.UUID,
+    grade: str,
+    version: Optional[int] = None,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[str, Optional[Review]]:
+    """Apply one grade if the card is still at `version`, without holding a lock.
+
+    The card is read, the new state computed by the scheduler, and written
+    with a single UPDATE ... WHERE version = ... RETURNING that also appends
+    the event; both statements run in autocommit, so this is two round
+    trips. `version` is the version the client graded (as returned by
+    GET /reviews/due); when omitted, the version just read is used. Returns
+    the status and the card's state:
+
+    - "applied": the grade was applied; the new state
+    - "duplicate": `idempotency_key` was already applied; the current state
+    - "conflict": the card was written since `version`; the current state
+    - "not_found": no such card; None
+    """
+    seen = (
+        exists().where(ReviewEvent.idempotency_key == idempotency_key) if idempotency_key else false()
+    )
+    read = select(*Review.__table__.c, seen.label("seen")).where(Review.word_id == word_id)
+
+    row = (await execute_alone(session, read)).first()
+    if row is None:
+        return "not_found", None
+    review = _review_from_row(row)
+    if row.seen:
+        return "duplicate", review
+    if version is not None and version != review.version:
+        return "conflict", review
+
+    expected = review.version
+    event = grade_review(review, grade, datetime.utcnow(), idempotency_key)
+    updated = (
+        update(Review)
+        .where(Review.word_id == word_id, Review.version == expected)
+        .values(
+            interval=review.interval,
+            ease_factor=review.ease_factor,
+            streak=review.streak,
+            next_review_at=review.next_review_at,
+            last_reviewed_at=review.last_reviewed_at,
+            version=review.version,
+        )
+        .returning(*Review.__table__.c)
+        .cte("updated")
+    )
+    # Selecting from `updated` appends the event only if the version matched
+    event_columns = [
+        "ts", "grade", "interval", "ease_factor", "prev_interval", "prev_ease_factor",
+        "prev_streak", "prev_last_reviewed_at", "idempotency_key",
+    ]
+    logged = insert(ReviewEvent).from_select(
+        ["word_id", *event_columns],
+        select(updated.c.word_id, *(
+            literal(getattr(event, name), ReviewEvent.__table__.c[name].type) for name in event_columns
+        )),
+    ).cte("logged")
+    try:
+        row = (await execute_alone(session, select(updated).add_cte(logged))).first()
+    except IntegrityError:
+        # The idempotency key was used concurrently, for another card
+        await session.rollback()
+        row = None
+    if row is not None:
+        return "applied", _review_from_row(row)
+
+    # Written in between: by a concurrent submission of this very grade, or
+    # by another one
+    row = (await execute_alone(session, read)).first()
+    if row is None:
+        return "not_found", None
+    return ("duplicate" if row.seen else "conflict"), _review_from_row(row)
+
+
+async def undo_grade(
+    session: AsyncSession,
+    word_id: uuid.UUID,
+    version: Optional[int] = None,
+) -> Tuple[str, Optional[Review], Optional[ReviewEvent]]:
+    """Restore the card to before its last event and delete that event, if the card is still at `version`.
+
+    Like `log_grade`, the card is written with UPDATE ... WHERE version = ...
+    (the version just read when `version` is omitted), and the event is only
+    deleted in the same transaction if that matched, so concurrent undos
+    remove one event each, never two for one read. Returns the status, the
+    card's state and the undone event:
+
+    - "undone": the new state and the deleted event
+    - "conflict": the card was written since `version`; the current state
+    - "no_history": the card has no event to undo; the current state
+    - "not_found": no such card; None
+    """
+    review = await session.get(Review, word_id)
+    if review is None:
+        return "not_found", None, None
+    if version is not None and version != review.version:
+        return "conflict", review, None
+    statement = (
+        select(ReviewEvent)
+        .where(ReviewEvent.word_id == word_id)
+        .order_by(ReviewEvent.ts.desc(), ReviewEvent.id.desc())
+        .limit(1)
+    )
+    event = (await session.exec(statement)).first()
+    if event is None:
+        return "no_history", review, None
+
+    updated = (
+        update(Review)
+        .where(Review.word_id == word_id, Review.version == review.version)
+        .values(
+            interval=event.prev_interval,
+            ease_factor=event.prev_ease_factor,
+            streak=event.prev_streak,
+            last_reviewed_at=event.prev_last_reviewed_at,
+            # Due again right away
+            next_review_at=datetime.utcnow(),
+            version=review.version + 1,
+        )
+        .returning(*Review.__table__.c)
+    )
+    row = (await session.execute(updated)).first()
+    if row is None:
+        # Written in between, e.g. by a concurrent undo
+        await session.rollback()
+        review = await session.get(Review, word_id, populate_existing=True)
+        return ("conflict" if review is not None else "not_found"), review, None
+    await session.execute(delete(ReviewEvent).where(ReviewEvent.id == event.id))
+    await session.commit()
+    return "undone", _review_from_row(row), event
+
+
+async def apply_grades(
+    session: AsyncSession,
+    items: List[Any],
+) -> Tuple[List[Dict[str, Any]], Dict[uuid.UUID, Review]]:
+    """Apply client-logged grades (word_id, grade, reviewed_at, idempotency_key) and commit.
+
+    Items are applied in `reviewed_at` order. An idempotency key that was
+    already applied is "duplicate" and not applied again, so a client can
+    safely resend after a timeout. Conflict rule: the most recent review wins;
+    a grade older than the card's last review (e.g. from another device) is
+    "stale" and ignored. Returns one result per item, in input order, and the
+    resulting review of every card that was found.
+    """
+    try:
+        return await _apply_grades(session, items)
+    except IntegrityError:
+        # An idempotency key was committed concurrently (for a card this
+        # batch does not lock): read the keys again, it is "duplicate" now
+        await session.rollback()
+        return await _apply_grades(session, items)
+
+
+async def _apply_grades(
+    session: AsyncSession,
+    items: List[Any],
+) -> Tuple[List[Dict[str, Any]], Dict[uuid.UUID, Review]]:
+    ordered = sorted(items, key=lambda item: naive_utc(item.reviewed_at))
+    # Cards first: a resend racing its original waits here for it to commit,
+    # and the keys read next include the original's
+    reviews = {
+        review.word_id: review
+        for review in (await session.exec(
+            select(Review)
+            .where(col(Review.word_id).in_({item.word_id for item in ordered}))
+            .order_by(Review.word_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )).all()
+    }
+    keys = [item.idempotency_key for item in ordered]
+    seen = set((await session.exec(
+        select(ReviewEvent.idempotency_key).where(col(ReviewEvent.idempotency_key).in_(keys))
+    )).all())
+
+    now = datetime.utcnow()
+    results = {}
+    for item in ordered:
+        review = reviews.get(item.word_id)
+        if item.idempotency_key in seen:
+            status = "duplicate"
+        elif not review:
+            status = "not_found"
+        else:
+            # Never schedule from a clock that is ahead of ours
+            reviewed_at = min(naive_utc(item.reviewed_at), now)
+            if review.last_reviewed_at and reviewed_at < review.last_reviewed_at:
+                status = "stale"
+            else:
+                session.add(grade_review(review, item.grade, reviewed_at, item.idempotency_key))
+                status = "applied"
+        seen.add(item.idempotency_key)
+        results[item.idempotency_key] = {
+            "idempotency_key": item.idempotency_key,
+            "word_id": item.word_id,
+            "status": status,
+            "next_review_at": review.next_review_at if review else None,
+        }
+
+    session.add_all(reviews.values())
+    await session.commit()
+    return [results[item.idempotency_key] for item in items], reviews
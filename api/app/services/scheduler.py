@@ -0,0 +1,189 @@
+"""Review scheduling algorithms.
+
+Every algorithm implements two paths over the same state (the interval,
+ease_factor, streak, next_review_at and last_reviewed_at columns of reviews):
+
+- `next_card`: one card, plain Python, used while handling a request.
+- `next_deck`: many cards at once on NumPy arrays, used to replay the whole
+  review_events log (`replay`) or to reschedule every card after a parameter
+  change (see app/scripts/reschedule.py).
+
+The two paths must give identical results.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..core.config import settings
+
+QUALITY = {"again": 0, "hard": 2, "good": 4, "easy": 5}
+
+
+def grade_quality(grade: str) -> int:
+    """SM-2 response quality (0-5) of a grade name; unknown grades count as 3."""
+    return QUALITY.get(grade, 3)
+
+
+class CardState(NamedTuple):
+    interval: int
+    ease_factor: float
+    streak: int
+    next_review_at: Optional[datetime]
+    last_reviewed_at: Optional[datetime]
+
+
+class DeckState(NamedTuple):
+    """The same fields as CardState, one array element per card.
+
+    Timestamps are datetime64[us] (naive UTC); NaT means "never".
+    """
+    interval: np.ndarray
+    ease_factor: np.ndarray
+    streak: np.ndarray
+    next_review_at: np.ndarray
+    last_reviewed_at: np.ndarray
+
+    def take(self, index: np.ndarray) -> "DeckState":
+        return DeckState(*(column[index] for column in self))
+
+    def put(self, index: np.ndarray, values: "DeckState") -> None:
+        for column, new in zip(self, values):
+            column[index] = new
+
+
+class Scheduler(ABC):
+    name: str
+    params: BaseModel
+
+    @abstractmethod
+    def initial_card(self) -> CardState:
+        """State of a card that has never been reviewed."""
+
+    @abstractmethod
+    def next_card(self, state: CardState, quality: int, now: datetime) -> CardState:
+        """State after one review of quality `quality` at `now`."""
+
+    @abstractmethod
+    def next_deck(self, state: DeckState, quality: np.ndarray, now: np.ndarray) -> DeckState:
+        """`next_card` applied element-wise: one review for each card in `state`."""
+
+    def initial_deck(self, n: int) -> DeckState:
+        card = self.initial_card()
+        return DeckState(
+            interval=np.full(n, card.interval, dtype=np.int64),
+            ease_factor=np.full(n, card.ease_factor, dtype=np.float64),
+            streak=np.full(n, card.streak, dtype=np.int64),
+            next_review_at=np.full(n, np.datetime64("NaT"), dtype="datetime64[us]"),
+            last_reviewed_at=np.full(n, np.datetime64("NaT"), dtype="datetime64[us]"),
+        )
+
+    def replay(self, card: np.ndarray, quality: np.ndarray, ts: np.ndarray, n_cards: int) -> DeckState:
+        """Final state of every card after replaying its reviews from scratch.
+
+        `card` (index into the deck), `quality` and `ts` (datetime64[us]) hold
+        one entry per review, sorted by card and then by time. Cards are
+        stepped in lockstep: step k applies every card's k-th review, so the
+        number of Python iterations is the longest history, not the number of
+        reviews.
+        """
+        deck = self.initial_deck(n_cards)
+        if len(card) == 0:
+            return deck
+        starts = np.flatnonzero(np.r_[True, card[1:] != card[:-1]])
+        lengths = np.diff(np.r_[starts, len(card)])
+        rank = np.arange(len(card)) - np.repeat(starts, lengths)
+        order = np.argsort(rank, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+        for k in range(len(bounds) - 1):
+            step = order[bounds[k]:bounds[k + 1]]
+            cards = card[step]
+            deck.put(cards, self.next_deck(deck.take(cards), quality[step], ts[step]))
+        return deck
+
+
+class SM2Params(BaseModel):
+    initial_ease: float = 2.5
+    min_ease: float = 1.3
+    first_interval: int = 1  # days after the first successful review
+    second_interval: int = 6  # days after the second one
+    max_interval: int = 36500  # cap, keeps due dates representable
+    fail_interval: int = 1  # interval stored after a failed review
+    fail_delay_minutes: float = 1.0  # a failed card is due again this soon
+    fail_ease_penalty: float = 0.0  # ease lost on a failed review
+
+
+class SM2Scheduler(Scheduler):
+    name = "sm2"
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        self.params = SM2Params(**(params or {}))
+
+    def initial_card(self) -> CardState:
+        return CardState(0, self.params.initial_ease, 0, None, None)
+
+    def next_card(self, state: CardState, quality: int, now: datetime) -> CardState:
+        p = self.params
+        if quality < 3:
+            return CardState(
+                interval=p.fail_interval,
+                ease_factor=max(p.min_ease, state.ease_factor - p.fail_ease_penalty),
+                streak=0,
+                next_review_at=now + timedelta(minutes=p.fail_delay_minutes),
+                last_reviewed_at=now,
+            )
+
+        if state.streak == 0:
+            interval = p.first_interval
+        elif state.streak == 1:
+            interval = p.second_interval
+        else:
+            interval = min(int(state.interval * state.ease_factor), p.max_interval)
+        ease_factor = state.ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        return CardState(
+            interval=interval,
+            ease_factor=max(p.min_ease, ease_factor),
+            streak=state.streak + 1,
+            next_review_at=now + timedelta(days=interval),
+            last_reviewed_at=now,
+        )
+
+    def next_deck(self, state: DeckState, quality: np.ndarray, now: np.ndarray) -> DeckState:
+        p = self.params
+        fail = quality < 3
+        miss = 5 - quality
+
+        grown = np.minimum(state.interval * state.ease_factor, p.max_interval).astype(np.int64)
+        passed_interval = np.where(
+            state.streak == 0, p.first_interval,
+            np.where(state.streak == 1, p.second_interval, grown),
+        )
+        passed_ease = state.ease_factor + (0.1 - miss * (0.08 + miss * 0.02))
+
+        interval = np.where(fail, p.fail_interval, passed_interval)
+        ease_factor = np.maximum(p.min_ease, np.where(fail, state.ease_factor - p.fail_ease_penalty, passed_ease))
+        fail_delay = np.timedelta64(int(round(p.fail_delay_minutes * 60_000_000)), "us")
+        next_review_at = np.where(fail, now + fail_delay, now + interval.astype("timedelta64[D]"))
+        return DeckState(
+            interval=interval.astype(np.int64),
+            ease_factor=ease_factor,
+            streak=np.where(fail, 0, state.streak + 1),
+            next_review_at=next_review_at.astype("datetime64[us]"),
+            last_reviewed_at=now.astype("datetime64[us]"),
+        )
+
+
+SCHEDULERS: Dict[str, Type[Scheduler]] = {
+    SM2Scheduler.name: SM2Scheduler,
+}
+
+
+def create_scheduler(name: str, params: Optional[Dict[str, Any]] = None) -> Scheduler:
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler '{name}' (available: {', '.join(SCHEDULERS)})")
+    return SCHEDULERS[name](params)
+
+
+scheduler = create_scheduler(settings.SCHEDULER, settings.SCHEDULER_PARAMS)
@@ -0,0 +1,159 @@
+"""Word search behind GET /words/search: prefix, substring and fuzzy matches.
+
+Prefix matches come first, read in order from ix_words_prefix, so typeahead
+on one or two letters costs the same on any deck size. When they don't fill
+the page, a second query looks for the text inside words and translations and
+for similar spellings (pg_trgm), served by the trigram indexes. That query
+gets what is left of SEARCH_BUDGET_MS as its statement_timeout; if it is
+cancelled, the prefix matches are returned alone and the result is partial.
+
+pg_trgm is optional (see SCHEMA_UPGRADES): without it there are no fuzzy
+matches and substring matching scans the table, within the same budget.
+"""
+import time
+from typing import List, Literal, Optional, Tuple
+from loguru import logger
+from pydantic import BaseModel
+from sqlmodel import select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.exc import DBAPIError
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.metrics import WORD_SEARCHES
+from ..models.word import Word
+from .enrichment_cache import normalize_word
+
+# Substring and fuzzy matching need at least one whole trigram
+MIN_SUBSTRING_LENGTH = 3
+
+QUERY_CANCELED = "57014"
+
+
+class WordMatch(BaseModel):
+    word: Word
+    match: Literal["exact", "prefix", "substring", "translation", "fuzzy"]
+    # 1 for exact and prefix matches, trigram similarity to the query otherwise
+    score: float
+
+
+# (language, query, limit) -> complete results; short TTL, so new words show up quickly
+search_cache: TTLCache[List[WordMatch]] = TTLCache(
+    maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL_SECONDS
+)
+
+_has_trigrams: Optional[bool] = None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _trigram_support(session: AsyncSession) -> bool:
+    """Whether pg_trgm is installed; checked once per process."""
+    global _has_trigrams
+    if _has_trigrams is None:
+        _has_trigrams = (await session.exec(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        )).one()[0]
+        if not _has_trigrams:
+            logger.warning("pg_trgm is not installed: word search runs without fuzzy matching")
+    return _has_trigrams
+
+
+async def _set_budget(session: AsyncSession, milliseconds: float) -> None:
+    """statement_timeout (and the fuzzy threshold) for the rest of the transaction."""
+    await session.exec(
+        select(
+            func.set_config("statement_timeout", str(max(1, int(milliseconds))), True),
+            func.set_config("pg_trgm.similarity_threshold", str(settings.SEARCH_SIMILARITY_THRESHOLD), True),
+        )
+    )
+
+
+async def search_words(
+    session: AsyncSession, query: str, language: str, limit: int
+) -> Tuple[List[WordMatch], bool]:
+    """Best matches for `query`, ranked: exact, prefix, substring of the word,
+    substring of the translation, similar spelling; then by similarity.
+
+    Returns the matches and whether they are partial (the budget ran out
+    before substring and fuzzy matching finished).
+    """
+    query = normalize_word(query)
+    if not query:
+        return [], False
+    key = (language, query, limit)
+    cached = search_cache.get(key)
+    if cached is not None:
+        WORD_SEARCHES.labels("cache_hit").inc()
+        return cached, False
+
+    started = time.perf_counter()
+    prefix = (await session.exec(
+        select(Word)
+        .where(Word.language == language)
+        .where(Word.word.collate("C").like(_escape_like(query) + "%", escape="\\"))
+        .order_by(Word.word.collate("C"))
+        .limit(limit)
+    )).all()
+    matches = [
+        WordMatch(word=word, match="exact" if word.word == query else "prefix", score=1.0)
+        for word in prefix
+    ]
+
+    partial = False
+    if len(matches) < limit and len(query) >= MIN_SUBSTRING_LENGTH:
+        try:
+            remaining = settings.SEARCH_BUDGET_MS - (time.perf_counter() - started) * 1000
+            matches += await _search_inside(
+                session, query, language, limit - len(matches), [word.id for word in prefix], remaining
+            )
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+                raise
+            # The rollback would expire the prefix matches already in hand
+            for word in prefix:
+                session.expunge(word)
+            await session.rollback()
+            partial = True
+            logger.info("Word search for '{}' ({}) hit the {}ms budget", query, language, settings.SEARCH_BUDGET_MS)
+
+    WORD_SEARCHES.labels("partial" if partial else "complete").inc()
+    if not partial:
+        search_cache.set(key, matches)
+    return matches, partial
+
+
+async def _search_inside(
+    session: AsyncSession, query: str, language: str, limit: int, exclude: list, budget_ms: float
+) -> List[WordMatch]:
+    await _set_budget(session, budget_ms)
+
+    contains = f"%{_escape_like(query)}%"
+    in_word = Word.word.ilike(contains, escape="\\")
+    in_translation = Word.translation.ilike(contains, escape="\\")
+    conditions = [in_word, in_translation]
+    if await _trigram_support(session):
+        similar = Word.word.op("%")(query)
+        conditions.append(similar)
+        score = func.greatest(func.similarity(Word.word, query), func.word_similarity(query, Word.translation))
+    else:
+        score = literal(0.0)
+    match = case((in_word, "substring"), (in_translation, "translation"), else_="fuzzy")
+    rank = case((in_word, 0), (in_translation, 1), else_=2)
+
+    statement = (
+        select(Word, match.label("match"), score.label("score"))
+        .where(Word.language == language)
+        .where(or_(*conditions))
+        .order_by(rank, score.desc(), func.length(Word.word), Word.word)
+        .limit(limit)
+    )
+    if exclude:
+        statement = statement.where(Word.id.not_in(exclude))
+    return [
+        WordMatch(word=word, match=match, score=round(score, 3))
+        for word, match, score in await session.exec(statement)
+    ]
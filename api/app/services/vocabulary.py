@@ -0,0 +1,293 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import uuid
+from loguru import logger
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import CTE, String, cast, func, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from ..core.config import settings
+from ..core.db import execute_alone
+from ..models.word import Word
+from ..models.review import Review, ReviewBase
+from ..models.word_alias import WordAlias
+from .enrichment_cache import cached_enrich_words, normalize_word
+
+
+def _review_upsert(words: CTE, now: datetime):
+    """INSERT ... SELECT a review for every row of `words`.
+
+    Words without a review get a fresh one; existing reviews are reset as
+    forgotten (ease factor lowered slightly).
+    """
+    fresh = ReviewBase()
+    statement = insert(Review).from_select(
+        ["word_id", "language", "interval", "ease_factor", "streak", "next_review_at"],
+        select(
+            words.c.id, words.c.language,
+            literal(fresh.interval), literal(fresh.ease_factor), literal(fresh.streak), literal(now),
+        ),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["word_id"],
+        set_={
+            "streak": 0,
+            "interval": 0,
+            "next_review_at": statement.excluded.next_review_at,
+            "ease_factor": func.greatest(1.3, Review.ease_factor - 0.2),
+            "version": Review.version + 1,
+        },
+    )
+
+
+def _word_from_row(row) -> Word:
+    return Word(
+        id=row.id,
+        word=row.word,
+        language=row.language,
+        translation=row.translation,
+        examples=row.examples,
+        created_at=row.created_at,
+    )
+
+
+async def reset_known_word(session: AsyncSession, surface: str, language: str) -> Optional[Word]:
+    """If `surface` is a known alias, reset its word as forgotten and return it.
+
+    One statement: the alias lookup and the review reset are CTEs.
+    """
+    known = (
+        select(Word.id, Word.word, Word.language, Word.translation, Word.examples, Word.created_at)
+        .join(WordAlias, WordAlias.word_id == Word.id)
+        .where(WordAlias.surface == surface)
+        .where(WordAlias.language == language)
+        .cte("known")
+    )
+    review = _review_upsert(known, datetime.utcnow()).cte("review")
+    row = (await execute_alone(session, select(known).add_cte(review))).first()
+    if row is None:
+        return None
+    logger.info("Alias '{}' -> '{}'. Resetting review status (Forgotten).", surface, row.word)
+    return _word_from_row(row)
+
+
+async def record_alias_map(
+    session: AsyncSession,
+    language: str,
+    aliases: Dict[str, uuid.UUID],
+) -> None:
+    """Upsert many surface form -> word id aliases in one statement. Caller commits."""
+    rows = [
+        {"surface": surface, "language": language, "word_id": word_id}
+        for surface, word_id in aliases.items() if surface
+    ]
+    if not rows:
+        return
+    statement = insert(WordAlias).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=["surface", "language"],
+        set_={"word_id": statement.excluded.word_id},
+    )
+    await session.exec(statement)
+
+
+async def save_enriched_word(
+    session: AsyncSession,
+    surface: str,
+    language: str,
+    data: Dict[str, Any],
+) -> Tuple[Word, bool]:
+    """Store an enrichment result in one statement (autocommitted).
+
+    If its lemma already exists the word is reset as forgotten instead. Either
+    way the typed surface form is recorded as an alias. Returns (word, created).
+    The (word, language) unique constraint decides between the two, so
+    concurrent adds of the same lemma end up on the same row.
+    """
+    base_word_text = normalize_word(data.get("word") or surface)
+    new_id = uuid.uuid4()
+    now = datetime.utcnow()
+
+    # DO UPDATE instead of DO NOTHING so RETURNING also yields a row that a
+    # concurrent transaction committed after this statement's snapshot. It
+    # rewrites a non-key column: updating `word` would take a FOR UPDATE row
+    # lock, which also blocks the FK checks of concurrent alias inserts.
+    word_insert = insert(Word).values(
+        id=new_id,
+        word=base_word_text,
+        language=language,
+        translation=data["translation"],
+        examples=data["examples"],
+        created_at=now,
+    )
+    word = (
+        word_insert.on_conflict_do_update(
+            index_elements=["word", "language"],
+            set_={"translation": Word.translation},
+        )
+        .returning(Word.id, Word.word, Word.language, Word.translation, Word.examples, Word.created_at)
+        .cte("word")
+    )
+    # Each CTE reads the previous one, which fixes the order rows are locked
+    # in (word, review, aliases), the same as ingest_words; otherwise
+    # Postgres may run the sub-statements in any order.
+    review = _review_upsert(word, now).returning(Review.word_id, Review.language).cte("review")
+
+    surfaces = list(dict.fromkeys(s for s in (surface, base_word_text) if s))
+    alias_insert = insert(WordAlias).from_select(
+        ["surface", "language", "word_id"],
+        select(func.unnest(cast(surfaces, ARRAY(String))), review.c.language, review.c.word_id),
+    )
+    aliases = alias_insert.on_conflict_do_update(
+        index_elements=["surface", "language"],
+        set_={"word_id": alias_insert.excluded.word_id},
+    ).cte("aliases")
+
+    row = (await execute_alone(session, select(word).add_cte(review, aliases))).one()
+    created = row.id == new_id
+    if not created:
+        logger.info("Word '{}' already exists. Resetting review status (Forgotten).", base_word_text)
+    return _word_from_row(row), created
+
+
+async def ingest_words(
+    session: AsyncSession,
+    surfaces: List[str],
+    language: str,
+) -> List[Dict[str, Any]]:
+    """Add many words at once.
+
+    Known aliases are resolved with one query, the rest are enriched
+    LLM_BATCH_SIZE words per prompt with at most ENRICH_CONCURRENCY prompts in
+    flight, and all inserts/resets are written in a single transaction.
+    Returns one result per input, in input order: {"input", "status", "word", "error"} where status is
+    "created", "reset" or "failed".
+    """
+    normalized = [normalize_word(s) for s in surfaces]
+    unique = [s for s in dict.fromkeys(normalized) if s]
+
+    # 1. Surface forms we have seen before
+    known: Dict[str, Word] = {}
+    if unique:
+        statement = (
+            select(WordAlias.surface, Word)
+            .join(Word, WordAlias.word_id == Word.id)
+            .where(WordAlias.language == language)
+            .where(WordAlias.surface.in_(unique))
+        )
+        for surface, word in await session.exec(statement):
+            known[surface] = word
+    # Release the connection while the LLM works
+    await session.commit()
+
+    # 2. Enrich the rest: LLM_BATCH_SIZE words per prompt, at most
+    #    ENRICH_CONCURRENCY prompts in flight
+    semaphore = asyncio.Semaphore(max(1, settings.ENRICH_CONCURRENCY))
+    enriched: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+
+    async def _enrich(chunk: List[str]):
+        async with semaphore:
+            try:
+                results, failed = await cached_enrich_words(chunk, language)
+            except Exception as e:
+                logger.error(f"Error enriching {chunk} in batch: {e}")
+                results, failed = {}, {surface: str(e) or type(e).__name__ for surface in chunk}
+            for surface, data in results.items():
+                enriched[surface] = {
+                    "word": normalize_word(data.get("word") or surface),
+                    "translation": data["translation"],
+                    "examples": data["examples"],
+                }
+            errors.update(failed)
+
+    pending = [s for s in unique if s not in known]
+    size = max(1, settings.LLM_BATCH_SIZE)
+    await asyncio.gather(*(_enrich(pending[i:i + size]) for i in range(0, len(pending), size)))
+
+    # 3. Resolve lemmas against existing words, then write everything at once
+    lemmas = {data["word"] for data in enriched.values()}
+    existing: Dict[str, Word] = {}
+    if lemmas:
+        statement = select(Word).where(Word.language == language).where(Word.word.in_(lemmas))
+        for word in await session.exec(statement):
+            existing.setdefault(word.word, word)
+
+    created: Dict[str, Word] = {}
+    for surface, data in enriched.items():
+        lemma = data["word"]
+        if lemma in existing or lemma in created:
+            continue
+        created[lemma] = Word(
+            word=lemma,
+            language=language,
+            translation=data["translation"],
+            examples=data["examples"],
+        )
+    if created:
+        # A concurrent add may have inserted some of these lemmas since the
+        # lookup above; the unique constraint hands back that row instead and
+        # the word is reset like any other existing one.
+        statement = insert(Word).values([
+            {
+                "id": word.id,
+                "word": word.word,
+                "language": word.language,
+                "translation": word.translation,
+                "examples": word.examples,
+                "created_at": word.created_at,
+            }
+            for word in created.values()
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=["word", "language"],
+            set_={"translation": Word.translation},
+        ).returning(Word.id, Word.word, Word.language, Word.translation, Word.examples, Word.created_at)
+        for row in await session.exec(statement):
+            if row.id != created[row.word].id:
+                existing[row.word] = _word_from_row(row)
+                del created[row.word]
+        session.add_all(Review(word_id=word.id, language=language) for word in created.values())
+
+    reset_ids = {word.id for word in known.values()}
+    reset_ids.update(existing[data["word"]].id for data in enriched.values() if data["word"] in existing)
+    if reset_ids:
+        await session.exec(
+            update(Review)
+            .where(Review.word_id.in_(reset_ids))
+            .values(
+                streak=0,
+                interval=0,
+                next_review_at=datetime.utcnow(),
+                ease_factor=func.greatest(1.3, Review.ease_factor - 0.2),
+                version=Review.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    aliases: Dict[str, uuid.UUID] = {}
+    for surface, data in enriched.items():
+        word = existing.get(data["word"]) or created[data["word"]]
+        aliases[surface] = word.id
+        aliases.setdefault(data["word"], word.id)
+    await record_alias_map(session, language, aliases)
+    await session.commit()
+
+    results = []
+    for original, surface in zip(surfaces, normalized):
+        if not surface:
+            results.append({"input": original, "status": "failed", "word": None, "error": "Empty word"})
+        elif surface in known:
+            results.append({"input": original, "status": "reset", "word": known[surface], "error": None})
+        elif surface not in enriched:
+            error = errors.get(surface, "Enrichment failed")
+            results.append({"input": original, "status": "failed", "word": None, "error": error})
+        else:
+            lemma = enriched[surface]["word"]
+            if lemma in existing:
+                results.append({"input": original, "status": "reset", "word": existing[lemma], "error": None})
+            else:
+                results.append({"input": original, "status": "created", "word": created[lemma], "error": None})
+    return results
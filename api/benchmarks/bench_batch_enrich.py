@@ -0,0 +1,74 @@
+"""Compare single-word and multi-word enrichment prompts.
+
+Calls the configured LLM directly (the enrichment cache is bypassed), first one
+prompt per word, then LLM_BATCH_SIZE words per prompt, and reports prompt and
+completion tokens per word and wall time per word for both.
+
+Usage: uv run python -m benchmarks.bench_batch_enrich [--words 20] [--batch-size 10]
+This spends real tokens.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.services import llm
+
+SAMPLE_WORDS = [
+    "wrote", "children", "deploy", "ran", "mice", "refactor", "thought", "leaves",
+    "debugging", "went", "geese", "compile", "brought", "teeth", "merge", "caught",
+    "feet", "rollback", "taught", "women", "cache", "swam", "knives", "schedule",
+    "built", "wolves", "query", "drove", "lives", "throttle",
+]
+
+
+def _snapshot():
+    return dict(llm.token_usage)
+
+
+def _report(name: str, before: dict, after: dict, elapsed: float, words: int, failed: int) -> dict:
+    prompt = after["prompt_tokens"] - before["prompt_tokens"]
+    completion = after["completion_tokens"] - before["completion_tokens"]
+    return {
+        "mode": name,
+        "words": words,
+        "failed": failed,
+        "llm_calls": after["calls"] - before["calls"],
+        "prompt_tokens_per_word": round(prompt / words, 1),
+        "completion_tokens_per_word": round(completion / words, 1),
+        "seconds_per_word": round(elapsed / words, 3),
+    }
+
+
+async def run(n_words: int, batch_size: int, language: str):
+    words = (SAMPLE_WORDS * (n_words // len(SAMPLE_WORDS) + 1))[:n_words]
+
+    before, start, failed = _snapshot(), time.perf_counter(), 0
+    for word in words:
+        try:
+            await llm.enrich_word(word, language)
+        except Exception:
+            failed += 1
+    single = _report("single", before, _snapshot(), time.perf_counter() - start, len(words), failed)
+
+    before, start, failed = _snapshot(), time.perf_counter(), 0
+    for i in range(0, len(words), batch_size):
+        chunk = list(dict.fromkeys(words[i:i + batch_size]))
+        _, errors = await llm.enrich_words(chunk, language)
+        failed += len(errors)
+    batched = _report(f"batch({batch_size})", before, _snapshot(), time.perf_counter() - start, len(words), failed)
+
+    print(json.dumps([single, batched], indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=llm.settings.LLM_BATCH_SIZE)
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+    asyncio.run(run(args.words, args.batch_size, args.language))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""GET /reviews/due payload: bytes and ms per page, before and after.
+
+Seeds N due cards (default 20k) whose words carry three realistic examples,
+then walks the due queue page by page through the app (in-process) with:
+
+- before: the previous handler (whole Review and Word rows, response_model
+  List[dict], FastAPI's encoder), served from a side app on the same database
+- after: the current handler with its default fields, uncompressed, gzip and br
+- fields: the current handler with fields=word.word,word.translation,review.version
+
+and reports bytes on the wire and p50/p95 latency per page.
+
+Usage: uv run python -m benchmarks.bench_due_payload [--rows 20000] [--pages 200] [--limit 50] [--keep]
+Writes to the configured database; seeded rows are deleted unless --keep.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import engine, get_read_session, init_db
+from app.main import app
+from app.models.review import Review
+from app.models.word import Word
+
+LANGUAGE = "bench-payload"
+
+SEED_WORDS = text("""
+    INSERT INTO words (id, word, language, translation, examples, created_at)
+    SELECT gen_random_uuid(), 'payload' || g, :language,
+           '/ˈpeɪloʊd/ n. the part of a transmission that carries the data ' || g,
+           jsonb_build_array(
+               jsonb_build_object('sentence', 'The payload' || g || ' was delivered to orbit on schedule.',
+                                  'translation', '有效载荷' || g || '按计划送入轨道。'),
+               jsonb_build_object('sentence', 'Strip the headers and keep only the payload' || g || '.',
+                                  'translation', '去掉头部, 只保留有效载荷' || g || '。'),
+               jsonb_build_object('sentence', 'A smaller payload' || g || ' means a faster page.',
+                                  'translation', '更小的载荷' || g || '意味着更快的页面。')
+           ),
+           now()
+    FROM generate_series(1, :rows) AS g
+""")
+
+SEED_REVIEWS = text("""
+    INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at, last_reviewed_at)
+    SELECT id, language, (random() * 60)::int, 1.3 + round((random() * 1.5)::numeric, 2),
+           (random() * 8)::int, now() - random() * interval '30 days', now() - interval '40 days'
+    FROM words WHERE language = :language
+""")
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get(f"{settings.API_V1_STR}/reviews/due", response_model=List[dict])
+async def legacy_due(limit: int = 50, language: str = "en", session: AsyncSession = Depends(get_read_session)):
+    """The handler before the lean payload (without cursor handling)."""
+    statement = (
+        select(Review, Word)
+        .join(Word)
+        .where(Review.language == language)
+        .where(Review.next_review_at <= datetime.utcnow())
+        .order_by(Review.streak.asc(), Review.ease_factor.asc(), Review.interval.asc(), Review.word_id.asc())
+        .limit(limit)
+    )
+    return [{"review": review, "word": word} for review, word in await session.exec(statement)]
+
+
+async def seed(rows: int):
+    async with engine.begin() as conn:
+        await conn.execute(SEED_WORDS, {"rows": rows, "language": LANGUAGE})
+        await conn.execute(SEED_REVIEWS, {"language": LANGUAGE})
+    async with engine.connect() as conn:
+        await conn.execute(text("COMMIT"))
+        await conn.execute(text("ANALYZE words"))
+        await conn.execute(text("ANALYZE reviews"))
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM reviews WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def walk(target: FastAPI, pages: int, limit: int, encoding: str = "identity", fields: str = None):
+    """Fetch `pages` pages (the same first page for the legacy handler, which has no cursor)."""
+    timings, sizes = [], []
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cursor = None
+        for _ in range(pages):
+            params = {"limit": limit, "language": LANGUAGE}
+            if cursor:
+                params["cursor"] = cursor
+            if fields:
+                params["fields"] = fields
+            start = time.perf_counter()
+            response = await client.get(
+                f"{settings.API_V1_STR}/reviews/due", params=params, headers={"Accept-Encoding": encoding}
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            # Bytes as sent, before httpx decodes the body
+            sizes.append(int(response.headers.get("content-length") or len(response.content)))
+            cursor = response.headers.get("x-next-cursor")
+    timings.sort()
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+    return {"bytes_per_page": round(sum(sizes) / len(sizes)), "p50_ms": pct(0.5), "p95_ms": pct(0.95)}
+
+
+async def run(rows: int, pages: int, limit: int, keep: bool):
+    await init_db()
+    try:
+        print(f"Seeding {rows} due cards...")
+        await seed(rows)
+        # Warm up connections and statement caches
+        await walk(app, 5, limit)
+        await walk(legacy_app, 5, limit)
+        results = {
+            "before": await walk(legacy_app, pages, limit),
+            "after": await walk(app, pages, limit),
+            "after_gzip": await walk(app, pages, limit, "gzip"),
+            "after_br": await walk(app, pages, limit, "br"),
+        }
+        results["fields"] = await walk(app, pages, limit, fields="word.word,word.translation,review.version")
+        print(json.dumps({"limit": limit, "pages": pages, **results}, indent=2))
+    finally:
+        if not keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.pages, args.limit, args.keep))
+
+
+if __name__ == "__main__":
+    main()
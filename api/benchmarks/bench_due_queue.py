@@ -0,0 +1,135 @@
+"""GET /reviews/due on a large deck: query plans and page latency.
+
+Seeds N words + reviews (default 1M) spread over a few benchmark languages,
+with a configurable fraction due now. Prints EXPLAIN ANALYZE for the old
+join-filtered query and for the current index-backed keyset query, then walks
+the due queue page by page through the app (in-process) and reports
+p50/p95/p99 latency.
+
+Usage: uv run python -m benchmarks.bench_due_queue [--rows 1000000] [--pages 500] [--keep]
+Writes to the configured database; seeded rows are deleted unless --keep.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+
+LANGUAGES = ["bench-a", "bench-b", "bench-c"]
+
+SEED_WORDS = text("""
+    INSERT INTO words (id, word, language, translation, examples, created_at)
+    SELECT gen_random_uuid(), 'bench-' || g, (ARRAY['bench-a', 'bench-b', 'bench-c'])[1 + g % 3],
+           'bench', '[]', now()
+    FROM generate_series(1, :rows) AS g
+""")
+
+SEED_REVIEWS = text("""
+    INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at)
+    SELECT id, language,
+           (random() * 60)::int,
+           1.3 + round((random() * 1.5)::numeric, 2),
+           (random() * 8)::int,
+           CASE WHEN random() < :due_fraction
+                THEN now() - random() * interval '30 days'
+                ELSE now() + random() * interval '90 days' END
+    FROM words WHERE language LIKE 'bench-%'
+""")
+
+OLD_QUERY = """
+    SELECT reviews.*, words.* FROM reviews JOIN words ON words.id = reviews.word_id
+    WHERE words.language = 'bench-a' AND reviews.next_review_at <= now()
+    ORDER BY reviews.streak, reviews.ease_factor, reviews.interval
+    LIMIT 50
+"""
+
+NEW_QUERY = """
+    SELECT reviews.*, words.* FROM reviews JOIN words ON words.id = reviews.word_id
+    WHERE reviews.language = 'bench-a' AND reviews.next_review_at <= now()
+      AND (reviews.streak, reviews.ease_factor, reviews.interval, reviews.word_id)
+          > (3, 2.0, 30, '00000000-0000-0000-0000-000000000000')
+    ORDER BY reviews.streak, reviews.ease_factor, reviews.interval, reviews.word_id
+    LIMIT 50
+"""
+
+
+async def seed(rows: int, due_fraction: float):
+    async with engine.begin() as conn:
+        await conn.execute(SEED_WORDS, {"rows": rows})
+        await conn.execute(SEED_REVIEWS, {"due_fraction": due_fraction})
+    async with engine.connect() as conn:
+        await conn.execute(text("COMMIT"))
+        await conn.execute(text("ANALYZE words"))
+        await conn.execute(text("ANALYZE reviews"))
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM reviews WHERE language LIKE 'bench-%'"))
+        await conn.execute(text("DELETE FROM words WHERE language LIKE 'bench-%'"))
+
+
+async def explain(query: str) -> str:
+    async with engine.connect() as conn:
+        result = await conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + query))
+        return "\n".join(row[0] for row in result)
+
+
+async def walk_pages(pages: int, limit: int):
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cursor = None
+        for _ in range(pages):
+            params = {"limit": limit, "language": "bench-a"}
+            if cursor:
+                params["cursor"] = cursor
+            start = time.perf_counter()
+            response = await client.get(f"{settings.API_V1_STR}/reviews/due", params=params)
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            # Start over at the head of the queue when a walk reaches the end
+            cursor = response.headers.get("x-next-cursor")
+    timings.sort()
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+    return {"pages": pages, "limit": limit, "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+async def run(rows: int, due_fraction: float, pages: int, limit: int, keep: bool):
+    await init_db()
+    try:
+        print(f"Seeding {rows} reviews ({due_fraction:.0%} due)...")
+        await seed(rows, due_fraction)
+        print("--- old query (filter on words.language, no matching index) ---")
+        print(await explain(OLD_QUERY))
+        print("--- keyset query on ix_reviews_due_queue ---")
+        print(await explain(NEW_QUERY))
+        print(json.dumps(await walk_pages(pages, limit), indent=2))
+    finally:
+        if not keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--due-fraction", type=float, default=0.3)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.due_fraction, args.pages, args.limit, args.keep))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""GET /export: throughput and server memory vs. deck size.
+
+Seeds decks of increasing size (words with reviews and a few examples each)
+and runs the export stream for each format, with and without gzip, by
+iterating the endpoint's response body the way the server does. Reports rows
+per second, bytes produced and the peak of Python memory allocated while
+streaming (tracemalloc, measured in a second run), which should stay flat as
+the deck grows.
+
+Usage: uv run python -m benchmarks.bench_export [--sizes 10000 100000 1000000]
+Writes to the configured database; seeded rows are deleted at the end.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from sqlalchemy import text
+
+from app.api.v1.endpoints.export import export_deck
+from app.core.db import engine, init_db
+
+LANGUAGE = "bench-export"
+
+SEED_WORDS = text("""
+    INSERT INTO words (id, word, language, translation, examples, created_at)
+    SELECT gen_random_uuid(), 'export-' || g, :language, 'translation of word ' || g,
+           '[{"sentence": "An example sentence for this word.", "translation": "Its translation."},
+             {"sentence": "A second, slightly longer example sentence.", "translation": "Another one."}]',
+           now()
+    FROM generate_series(:start, :stop - 1) AS g
+""")
+
+SEED_REVIEWS = text("""
+    INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at)
+    SELECT w.id, w.language, 1, 2.5, 1, now()
+    FROM words w LEFT JOIN reviews r ON r.word_id = w.id
+    WHERE w.language = :language AND r.word_id IS NULL
+""")
+
+
+async def grow(start: int, stop: int):
+    async with engine.begin() as conn:
+        await conn.execute(SEED_WORDS, {"start": start, "stop": stop, "language": LANGUAGE})
+        await conn.execute(SEED_REVIEWS, {"language": LANGUAGE})
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        ids = "SELECT id FROM words WHERE language = :language"
+        await conn.execute(text(f"DELETE FROM reviews WHERE word_id IN ({ids})"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def stream(format: str, gzip: bool) -> int:
+    response = await export_deck(format=format, language=LANGUAGE, accept_encoding="gzip" if gzip else None)
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+async def measure(format: str, gzip: bool):
+    """Time one export, then repeat it under tracemalloc (which slows it down) for the peak."""
+    started = time.perf_counter()
+    size = await stream(format, gzip)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    await stream(format, gzip)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+async def run(sizes):
+    await init_db()
+    results = []
+    seeded = 0
+    try:
+        for rows in sorted(sizes):
+            print(f"Growing the deck to {rows} words...")
+            await grow(seeded, rows)
+            seeded = rows
+            for format in ("ndjson", "csv"):
+                for gzip in (False, True):
+                    elapsed, size, peak = await measure(format, gzip)
+                    results.append({
+                        "rows": rows,
+                        "format": format + (".gz" if gzip else ""),
+                        "rows_per_s": round(rows / elapsed),
+                        "mb": round(size / 1e6, 1),
+                        "peak_python_mb": round(peak / 1e6, 1),
+                    })
+                    print(json.dumps(results[-1]))
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""GET /reviews/forecast latency vs. deck size, against a full aggregate over reviews.
+
+Seeds decks of growing size in a benchmark language (the counters are filled
+by the same triggers as in production), then times the endpoint through the
+app (in-process) and the equivalent GROUP BY over reviews.
+
+Usage: uv run python -m benchmarks.bench_forecast [--sizes 10000 100000 1000000] [--requests 200]
+Writes to the configured database; seeded rows are deleted at the end.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+
+LANGUAGE = "bench-forecast"
+
+SEED_WORDS = text("""
+    INSERT INTO words (id, word, language, translation, examples, created_at)
+    SELECT gen_random_uuid(), 'bench-' || g, :language, 'bench', '[]', now()
+    FROM generate_series(1, :rows) AS g
+""")
+
+SEED_REVIEWS = text("""
+    INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at)
+    SELECT id, language, 1, 2.5, 1, now() - interval '30 days' + random() * interval '120 days'
+    FROM words w
+    WHERE language = :language AND NOT EXISTS (SELECT 1 FROM reviews r WHERE r.word_id = w.id)
+""")
+
+FULL_SCAN = text("""
+    SELECT greatest(next_review_at::date, current_date) AS day, count(*)
+    FROM reviews
+    WHERE language = :language AND next_review_at < current_date + 30
+    GROUP BY 1 ORDER BY 1
+""")
+
+
+def percentiles(timings):
+    timings.sort()
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+    return {"p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+async def time_endpoint(client: httpx.AsyncClient, requests: int):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(
+            f"{settings.API_V1_STR}/reviews/forecast", params={"days": 30, "language": LANGUAGE}
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return percentiles(timings)
+
+
+async def time_full_scan(requests: int):
+    timings = []
+    async with engine.connect() as conn:
+        for _ in range(requests):
+            start = time.perf_counter()
+            (await conn.execute(FULL_SCAN, {"language": LANGUAGE})).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM reviews WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def run(sizes, requests: int):
+    await init_db()
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            seeded = 0
+            for size in sorted(sizes):
+                print(f"Growing the deck to {size} reviews...")
+                async with engine.begin() as conn:
+                    await conn.execute(SEED_WORDS, {"rows": size - seeded, "language": LANGUAGE})
+                    await conn.execute(SEED_REVIEWS, {"language": LANGUAGE})
+                seeded = size
+                async with engine.connect() as conn:
+                    await conn.execute(text("COMMIT"))
+                    await conn.execute(text("ANALYZE reviews"))
+                results.append({
+                    "reviews": size,
+                    "forecast_endpoint": await time_endpoint(client, requests),
+                    "group_by_reviews": await time_full_scan(max(1, requests // 10)),
+                })
+                print(json.dumps(results[-1]))
+    finally:
+        await cleanup()
+        await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""POST /words/import: 100k-row CSV and Anki files, end to end.
+
+Generates a CSV file (with a header, examples and a few untranslated and
+duplicate rows) and an Anki "Notes in Plain Text" export of the same size,
+imports each through the app (in-process), and reports rows/s. Each file is
+then imported a second time, when every row already exists, to show the
+cost of deduplication alone.
+
+Usage: uv run python -m benchmarks.bench_import [--rows 100000] [--keep]
+Writes to the configured database; imported rows and queued jobs are deleted unless --keep.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+
+LANGUAGES = {"csv": "bench-import-csv", "anki": "bench-import-anki"}
+
+
+def csv_file(rows: int) -> bytes:
+    """Every 10th row has no translation (queued), every 50th repeats a word."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["word", "translation", "example", "example_translation"])
+    for i in range(rows):
+        n = i - 1 if i % 50 == 49 else i
+        translated = n % 10 != 5
+        writer.writerow([
+            f"csvword{n}",
+            f"translation {n}" if translated else "",
+            f"An example with csvword{n}, \"quoted\"." if translated else "",
+            f"Exemple {n}" if translated else "",
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+def anki_file(rows: int) -> bytes:
+    lines = ["#separator:tab", "#html:true", "#guid column:1", "#notetype column:2", "#deck column:3", "#tags column:6"]
+    for i in range(rows):
+        lines.append(f"g{i}\tBasic\tVocab\tankiword{i}\t<b>meaning</b> {i}<br>noun\tbench")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        for language in LANGUAGES.values():
+            ids = "SELECT id FROM words WHERE language = :language"
+            for table in ("review_events", "reviews", "word_aliases"):
+                await conn.execute(text(f"DELETE FROM {table} WHERE word_id IN ({ids})"), {"language": language})
+            await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": language})
+            await conn.execute(text("DELETE FROM enrichment_jobs WHERE language = :language"), {"language": language})
+            await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": language})
+
+
+async def timed_import(client: httpx.AsyncClient, body: bytes, format: str):
+    start = time.perf_counter()
+    response = await client.post(
+        f"{settings.API_V1_STR}/words/import",
+        params={"format": format, "language": LANGUAGES[format]},
+        content=body,
+    )
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    result = response.json()
+    return {"seconds": round(elapsed, 2), "rows_per_s": round(result["rows"] / elapsed), **result}
+
+
+async def run(rows: int, keep: bool):
+    await init_db()
+    files = {"csv": csv_file(rows), "anki": anki_file(rows)}
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            for format, body in files.items():
+                print(f"Importing {rows} rows as {format} ({len(body) / 1e6:.1f} MB)...")
+                results[format] = {
+                    "first": await timed_import(client, body, format),
+                    "again": await timed_import(client, body, format),
+                }
+        print(json.dumps(results, indent=2))
+    finally:
+        if not keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--keep", action="store_true", help="keep the imported rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.keep))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""LLM router: tail latency and availability with a degraded provider.
+
+Runs two in-process fake providers (see benchmarks.fake_openai) and sends
+enrichment prompts through, per scenario:
+
+- before: the primary alone, three attempts 2 s apart (the previous client)
+- after: the router over primary + secondary, with hedging after the
+  primary's p95, failover, circuit breaking and jittered retries
+
+Scenarios: "slow_tail" (a share of primary calls stall for seconds),
+"flaky" (the primary fails a share of calls) and "down" (the primary fails
+every call). Reports p50/p95/p99 per logical call, failed calls, which
+backend served the answers and how many provider calls were made per
+logical call (the cost of hedging).
+
+Usage: uv run python -m benchmarks.bench_llm_router [--calls 400] [--concurrency 20]
+Needs no database or network.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import httpx
+from openai import AsyncOpenAI
+from tenacity import AsyncRetrying, stop_after_attempt, wait_fixed, wait_random_exponential
+
+from app.core.config import settings
+from app.services.llm_router import Backend, CircuitBreaker, LLMRouter
+
+from .fake_openai import FakeLLM, create_app
+
+SCENARIOS = {
+    "slow_tail": {
+        "primary": {"latency_ms": 300, "jitter_ms": 50, "slow_rate": 0.08, "slow_ms": 5000},
+        "secondary": {"latency_ms": 400, "jitter_ms": 50},
+    },
+    "flaky": {
+        "primary": {"latency_ms": 300, "jitter_ms": 50, "error_rate": 0.3},
+        "secondary": {"latency_ms": 400, "jitter_ms": 50},
+    },
+    "down": {
+        "primary": {"latency_ms": 20, "error_rate": 1.0},
+        "secondary": {"latency_ms": 400, "jitter_ms": 50},
+    },
+}
+
+
+def make_backend(name: str, llm: FakeLLM, breaker_failures: int = settings.LLM_BREAKER_FAILURES) -> Backend:
+    client = AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(llm))),
+    )
+    breaker = CircuitBreaker(breaker_failures, settings.LLM_BREAKER_COOLDOWN_SECONDS)
+    return Backend(name, "openai", "fake", client, breaker, window=settings.LLM_LATENCY_WINDOW)
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))])
+
+    return {"p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+async def run_mode(scenario: dict, mode: str, calls: int, concurrency: int) -> dict:
+    llms = {name: FakeLLM(seed=i, **scenario[name]) for i, name in enumerate(("primary", "secondary"))}
+    if mode == "before":
+        # No circuit breaker either
+        router = LLMRouter([make_backend("primary", llms["primary"], breaker_failures=10**9)], hedge=False)
+        retrying = dict(stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True)
+    else:
+        router = LLMRouter(
+            [make_backend(name, llm) for name, llm in llms.items()],
+            hedge=True,
+            hedge_min=settings.LLM_HEDGE_MIN_MS / 1000,
+            hedge_default=settings.LLM_HEDGE_DEFAULT_MS / 1000,
+        )
+        retrying = dict(
+            stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS),
+            wait=wait_random_exponential(multiplier=0.5, max=settings.LLM_RETRY_MAX_WAIT_SECONDS),
+            reraise=True,
+        )
+
+    timings, served, failed = [], {}, 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async for attempt in AsyncRetrying(**retrying):
+                    with attempt:
+                        _, backend = await router.complete(
+                            "enrich",
+                            messages=[{"role": "user", "content": f'Analyze the en word "bench{i}"'}],
+                            response_format={"type": "json_object"},
+                        )
+                served[backend.name] = served.get(backend.name, 0) + 1
+            except Exception:
+                failed += 1
+            timings.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    provider_calls = sum(llm.requests for llm in llms.values())
+    return {
+        **percentiles(timings),
+        "failed": failed,
+        "served_by": served,
+        "provider_calls": {name: llm.requests for name, llm in llms.items()},
+        "provider_calls_per_call": round(provider_calls / calls, 2),
+        "backends": router.stats(),
+    }
+
+
+async def run(calls: int, concurrency: int, only: List[str]):
+    results = {}
+    for name in only or SCENARIOS:
+        print(f"Scenario {name}...")
+        results[name] = {
+            mode: await run_mode(SCENARIOS[name], mode, calls, concurrency) for mode in ("before", "after")
+        }
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="run only these")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.concurrency, args.scenario))
+
+
+if __name__ == "__main__":
+    main()
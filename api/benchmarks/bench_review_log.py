@@ -0,0 +1,97 @@
+"""Latency of POST /reviews/{id}/log as a card's review history grows.
+
+Seeds one word per history length with that many review_events rows, then
+grades each card repeatedly through the app (in-process, no HTTP server) and
+reports p50/p99 latency. With the append-only event log the numbers should
+stay flat; with the old JSONB history array they grew with the history.
+
+Usage: uv run python -m benchmarks.bench_review_log [--lengths 0 100 1000 10000] [--iterations 200]
+Writes to the configured database; seeded rows are deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+
+
+async def seed(history_length: int) -> uuid.UUID:
+    word_id = uuid.uuid4()
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO words (id, word, language, translation, examples, created_at) "
+                 "VALUES (:id, :word, 'bench', 'bench', '[]', :now)"),
+            {"id": word_id, "word": f"bench-{word_id}", "now": now},
+        )
+        await conn.execute(
+            text("INSERT INTO reviews (word_id, interval, ease_factor, streak, next_review_at) "
+                 "VALUES (:id, 1, 2.5, 0, :now)"),
+            {"id": word_id, "now": now},
+        )
+        if history_length:
+            await conn.execute(text("""
+                INSERT INTO review_events
+                    (word_id, ts, grade, interval, ease_factor,
+                     prev_interval, prev_ease_factor, prev_streak)
+                SELECT :id, CAST(:start AS timestamp) + make_interval(mins => g), 'good', 1, 2.5, 1, 2.5, 0
+                FROM generate_series(1, :n) AS g
+            """), {"id": word_id, "start": now - timedelta(days=3650), "n": history_length})
+    return word_id
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        ids = "SELECT id FROM words WHERE language = 'bench'"
+        await conn.execute(text(f"DELETE FROM review_events WHERE word_id IN ({ids})"))
+        await conn.execute(text(f"DELETE FROM reviews WHERE word_id IN ({ids})"))
+        await conn.execute(text("DELETE FROM words WHERE language = 'bench'"))
+
+
+async def run(lengths, iterations: int):
+    await init_db()
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            for length in lengths:
+                word_id = await seed(length)
+                url = f"{settings.API_V1_STR}/reviews/{word_id}/log"
+                timings = []
+                for i in range(iterations):
+                    start = time.perf_counter()
+                    response = await client.post(url, json={"grade": "good" if i % 4 else "again"})
+                    timings.append((time.perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                timings.sort()
+                results.append({
+                    "history_length": length,
+                    "iterations": iterations,
+                    "p50_ms": round(statistics.median(timings), 2),
+                    "p99_ms": round(timings[int(len(timings) * 0.99) - 1], 2),
+                })
+        finally:
+            await cleanup()
+            await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.lengths, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
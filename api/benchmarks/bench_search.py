@@ -0,0 +1,200 @@
+"""GET /words/search on a large deck: query plans and latency per kind of query.
+
+Seeds N words (default 1M) built from syllables, so words share prefixes and
+trigrams the way real vocabulary does. Prints EXPLAIN ANALYZE for the prefix
+query and for the substring/fuzzy query, then sends each kind of query
+(1, 2 and 4-letter prefixes, substrings, translations, misspellings, misses)
+through the app (in-process) with the result cache off and reports
+p50/p95/p99 latency and how many answers were cut by the budget. Finally
+replays typeahead (one letter at a time, as many users type the same few
+words) with the cache on.
+
+Usage: uv run python -m benchmarks.bench_search [--rows 1000000] [--queries 50] [--keep]
+Writes to the configured database; seeded rows are deleted unless --keep.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+from app.services.search import search_cache
+
+LANGUAGE = "bench-search"
+
+SEED_WORDS = text("""
+    WITH s AS (SELECT ARRAY['ka', 'ri', 'to', 'ne', 'mu', 'sa', 'lo', 'pe', 'di', 'gu',
+                            'ba', 've', 'chi', 'ro', 'fa', 'ni', 'ze', 'tu', 'ho', 'mi'] AS syl)
+    INSERT INTO words (id, word, language, translation, examples, created_at)
+    SELECT gen_random_uuid(),
+           syl[1 + g % 20] || syl[1 + g / 20 % 20] || syl[1 + g / 400 % 20]
+               || syl[1 + g / 8000 % 20] || syl[1 + g / 160000 % 20],
+           :language, 'bench ' || syl[1 + g / 7 % 20] || ' ' || syl[1 + g / 13 % 20], '[]', now()
+    FROM s, generate_series(0, :rows - 1) AS g
+""")
+
+PREFIX_QUERY = """
+    SELECT * FROM words
+    WHERE language = 'bench-search' AND word COLLATE "C" LIKE :prefix
+    ORDER BY word COLLATE "C" LIMIT 20
+"""
+
+INSIDE_QUERY = """
+    SELECT * FROM words
+    WHERE language = 'bench-search'
+      AND (word ILIKE :contains OR translation ILIKE :contains {fuzzy})
+    LIMIT 20
+"""
+
+
+async def seed(rows: int):
+    async with engine.begin() as conn:
+        await conn.execute(SEED_WORDS, {"rows": rows, "language": LANGUAGE})
+    async with engine.connect() as conn:
+        await conn.execute(text("COMMIT"))
+        await conn.execute(text("ANALYZE words"))
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def explain(query: str, params: dict) -> str:
+    async with engine.connect() as conn:
+        result = await conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + query), params)
+        return "\n".join(row[0] for row in result)
+
+
+async def has_trigrams() -> bool:
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        )).scalar()
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+async def sample_queries(count: int, rng: random.Random):
+    async with engine.connect() as conn:
+        rows = (await conn.execute(
+            text("SELECT word, translation FROM words WHERE language = :language ORDER BY random() LIMIT :n"),
+            {"language": LANGUAGE, "n": count},
+        )).all()
+    return {
+        "prefix_1": [word[:1] for word, _ in rows],
+        "prefix_2": [word[:2] for word, _ in rows],
+        "prefix_4": [word[:4] for word, _ in rows],
+        "substring": [word[3:7] for word, _ in rows],
+        "translation": [translation[2:] for _, translation in rows],
+        "misspelled": [misspell(word, rng) for word, _ in rows],
+        "miss": [f"qx{rng.randrange(10_000)}" for _ in rows],
+    }
+
+
+def percentiles(timings):
+    timings.sort()
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+    return {"p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+async def timed_search(client: httpx.AsyncClient, query: str):
+    start = time.perf_counter()
+    response = await client.get(
+        f"{settings.API_V1_STR}/words/search", params={"q": query, "language": LANGUAGE, "limit": 20}
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    partial = response.headers.get("x-search-partial") == "true"
+    matches = response.json()
+    if any(not match["word"].get("word") for match in matches):
+        raise RuntimeError(f"Search for '{query}' (partial: {partial}) returned matches without their word")
+    return elapsed, partial, len(matches)
+
+
+async def run_queries(queries: dict):
+    search_cache.maxsize = 0
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for kind, texts in queries.items():
+            timings, partial, found = [], 0, 0
+            for query in texts:
+                elapsed, cut, count = await timed_search(client, query)
+                timings.append(elapsed)
+                partial += cut
+                found += count
+            results[kind] = {
+                "queries": len(texts),
+                **percentiles(timings),
+                "partial": partial,
+                "avg_results": round(found / len(texts), 1),
+            }
+    return results
+
+
+async def run_typeahead(words: list, users: int):
+    """Each user types each word one letter at a time."""
+    search_cache.maxsize = settings.SEARCH_CACHE_SIZE
+    search_cache.clear()
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(users):
+            for word in words:
+                for end in range(1, len(word) + 1):
+                    elapsed, _, _ = await timed_search(client, word[:end])
+                    timings.append(elapsed)
+    return {"requests": len(timings), **percentiles(timings)}
+
+
+async def run(rows: int, count: int, keep: bool):
+    await init_db()
+    rng = random.Random(0)
+    try:
+        print(f"Seeding {rows} words...")
+        await seed(rows)
+        trigrams = await has_trigrams()
+        if not trigrams:
+            print("pg_trgm is not installed: no fuzzy matching, substring matching scans the table")
+        print("--- prefix query on ix_words_prefix ---")
+        print(await explain(PREFIX_QUERY, {"prefix": "kari%"}))
+        print("--- substring / fuzzy query ---")
+        fuzzy = "OR word % :query" if trigrams else ""
+        params = {"contains": "%tone%", **({"query": "karitone"} if trigrams else {})}
+        print(await explain(INSIDE_QUERY.format(fuzzy=fuzzy), params))
+
+        queries = await sample_queries(count, rng)
+        print(f"Budget: {settings.SEARCH_BUDGET_MS}ms for substring/fuzzy matching")
+        print(json.dumps({"cold": await run_queries(queries)}, indent=2))
+        typed = queries["prefix_4"][:10]
+        print(json.dumps({"typeahead_cached": await run_typeahead(typed, users=20)}, indent=2))
+    finally:
+        if not keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50, help="queries per kind")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded rows")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.queries, args.keep))
+
+
+if __name__ == "__main__":
+    main()
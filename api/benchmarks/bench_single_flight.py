@@ -0,0 +1,203 @@
+"""Single-flight enrichment: LLM calls for simultaneous adds of the same words.
+
+Starts --processes API processes (each the app in-process, with its own fake
+LLM, see benchmarks.fake_openai) and, once all are ready, has each of them
+add every one of --words new words --concurrency times at once, so every
+word is added processes x concurrency times in the same instant. The adds
+rotate over POST /words/, /words/batch and /words/stream. Per mode:
+
+- before: the previous enrichment paths (cache lookup, then the LLM)
+- local: single flight within each process only (NEKO_ENRICH_LOCKS=false)
+- after: single flight within and across processes (advisory locks)
+
+Reports LLM calls per word (1.0 is ideal), p50/p95 latency of the adds and
+response statuses.
+
+Usage: uv run python -m benchmarks.bench_single_flight [--processes 4] [--words 10] [--concurrency 3]
+Writes to the configured database; created rows are deleted after each mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+from openai import AsyncOpenAI
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+
+LANGUAGE = "bench-single-flight"
+MODES = ("before", "local", "after")
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        ids = "SELECT id FROM words WHERE language = :language"
+        for table in ("review_events", "reviews", "word_aliases"):
+            await conn.execute(text(f"DELETE FROM {table} WHERE word_id IN ({ids})"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM enrichment_cache WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def worker(mode: str, words: int, concurrency: int, latency_ms: float):
+    """One API process: wait for "go" on stdin, add the words, print the results as JSON."""
+    from app.api.v1.endpoints import words as words_endpoint
+    from app.main import app
+    from app.services import llm, vocabulary
+    from app.services.enrichment_cache import enrichment_cache, normalize_word
+    from app.services.llm_router import Backend, CircuitBreaker
+
+    from .fake_openai import FakeLLM, create_app
+
+    fake = FakeLLM(latency_ms=latency_ms, jitter_ms=latency_ms / 4)
+    client = AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(fake))),
+    )
+    breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_COOLDOWN_SECONDS)
+    llm.router.backends = [Backend("fake", "openai", "fake", client, breaker)]
+
+    if mode == "before":
+        async def legacy_cached_enrich_word(word: str, language: str = "en"):
+            data = await enrichment_cache.get(word, language)
+            if data is not None:
+                return data
+            data, model = await llm.enrich_word(normalize_word(word), language)
+            await enrichment_cache.set(word, language, data, model)
+            return data
+
+        async def legacy_cached_enrich_words(words: List[str], language: str = "en"):
+            results = await enrichment_cache.get_many(words, language)
+            enriched, errors = await llm.enrich_words([w for w in words if w not in results], language)
+            for word, (data, model) in enriched.items():
+                await enrichment_cache.set(word, language, data, model)
+                results[word] = data
+            return results, errors
+
+        async def legacy_cached_stream_enrich_word(word: str, language: str = "en"):
+            data = await enrichment_cache.get(word, language)
+            if data is not None:
+                yield "done", data
+                return
+            async for event, value in llm.stream_enrich_word(word, language):
+                if event == "done":
+                    value, model = value
+                    await enrichment_cache.set(word, language, value, model)
+                yield event, value
+
+        words_endpoint.cached_enrich_word = legacy_cached_enrich_word
+        words_endpoint.cached_stream_enrich_word = legacy_cached_stream_enrich_word
+        vocabulary.cached_enrich_words = legacy_cached_enrich_words
+
+    print("ready", flush=True)
+    await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+
+    timings: List[float] = []
+    statuses: Dict[Any, int] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as http:
+        async def add(word: str, n: int):
+            prefix = settings.API_V1_STR
+            start = time.perf_counter()
+            if n % 3 == 0:
+                response = await http.post(f"{prefix}/words/", json={"word": word, "language": LANGUAGE})
+                status = response.status_code
+            elif n % 3 == 1:
+                response = await http.post(f"{prefix}/words/batch", json={"words": [word], "language": LANGUAGE})
+                status = response.status_code if response.json()[0]["status"] != "failed" else "failed"
+            else:
+                response = await http.post(f"{prefix}/words/stream", json={"word": word, "language": LANGUAGE})
+                status = response.status_code if b"event: error" not in response.content else "failed"
+            timings.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+        await asyncio.gather(*(add(f"flight{i}", n) for i in range(words) for n in range(concurrency)))
+    await engine.dispose()
+    print(json.dumps({"llm_calls": fake.requests, "timings": timings, "statuses": statuses}), flush=True)
+
+
+async def run_mode(mode: str, processes: int, words: int, concurrency: int, latency_ms: float) -> dict:
+    env = dict(os.environ)
+    if mode != "after":
+        env["NEKO_ENRICH_LOCKS"] = "false"
+    command = [
+        sys.executable, "-m", "benchmarks.bench_single_flight", "--worker", mode,
+        "--words", str(words), "--concurrency", str(concurrency), "--latency-ms", str(latency_ms),
+    ]
+    workers = [
+        await asyncio.create_subprocess_exec(
+            *command, env=env, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        for _ in range(processes)
+    ]
+    for process in workers:
+        # Skip whatever the app logs to stdout while starting
+        while (line := await process.stdout.readline()).strip() != b"ready":
+            if not line:
+                raise RuntimeError(f"Worker exited with status {await process.wait()}")
+    for process in workers:
+        process.stdin.write(b"go\n")
+        await process.stdin.drain()
+    results = []
+    for process in workers:
+        output, _ = await process.communicate()
+        results.append(json.loads(output.splitlines()[-1]))
+
+    timings = sorted(t for result in results for t in result["timings"])
+    statuses: Dict[str, int] = {}
+    for result in results:
+        for status, count in result["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))])
+
+    llm_calls = sum(result["llm_calls"] for result in results)
+    return {
+        "adds": len(timings),
+        "llm_calls": llm_calls,
+        "llm_calls_per_word": round(llm_calls / words, 2),
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "statuses": statuses,
+    }
+
+
+async def run(processes: int, words: int, concurrency: int, latency_ms: float):
+    await init_db()
+    results = {}
+    try:
+        for mode in MODES:
+            print(f"Mode {mode}...")
+            await cleanup()
+            results[mode] = await run_mode(mode, processes, words, concurrency, latency_ms)
+    finally:
+        await cleanup()
+        await engine.dispose()
+    print(json.dumps({"processes": processes, "words": words, "concurrency": concurrency, **results}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--words", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=3, help="simultaneous adds of a word per process")
+    parser.add_argument("--latency-ms", type=float, default=800, help="fake LLM latency")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(worker(args.worker, args.words, args.concurrency, args.latency_ms))
+    else:
+        asyncio.run(run(args.processes, args.words, args.concurrency, args.latency_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Concurrency check: simultaneous adds of one lemma must leave a single word.
+
+For each of --lemmas lemmas, fires --concurrency requests at once through the
+app (in-process): POST /words/ and POST /words/batch with different surface
+forms of the same lemma ("tests", "test", "testing", ...). Enrichments are put
+in the enrichment cache beforehand, so no LLM is called. Then checks that
+every lemma has exactly one words row and one review, and that every surface
+form points at it. Exits with status 1 on any duplicate.
+
+Usage: uv run python -m benchmarks.concurrent_adds [--lemmas 50] [--concurrency 20]
+Writes to the configured database; created rows are deleted at the end.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.main import app
+from app.services.enrichment_cache import enrichment_cache
+
+LANGUAGE = "bench-concurrency"
+SUFFIXES = ["", "s", "ed", "ing", "er"]
+
+CHECK = text("""
+    SELECT
+        (SELECT count(*) FROM words WHERE language = :language) AS words,
+        (SELECT count(DISTINCT word) FROM words WHERE language = :language) AS lemmas,
+        (SELECT count(*) FROM reviews r JOIN words w ON w.id = r.word_id WHERE w.language = :language) AS reviews,
+        (SELECT count(*) FROM word_aliases a JOIN words w ON w.id = a.word_id
+         WHERE a.language = :language AND a.surface NOT LIKE w.word || '%') AS misrouted_aliases
+""")
+
+
+def enrichment(lemma: str):
+    return {
+        "word": lemma,
+        "translation": f"/{lemma}/ {lemma}",
+        "examples": [{"sentence": f"A {lemma}.", "translation": lemma}],
+    }
+
+
+async def cleanup():
+    async with engine.begin() as conn:
+        ids = "SELECT id FROM words WHERE language = :language"
+        for table in ("review_events", "reviews", "word_aliases"):
+            await conn.execute(text(f"DELETE FROM {table} WHERE word_id IN ({ids})"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM enrichment_cache WHERE language = :language"), {"language": LANGUAGE})
+        await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+
+
+async def run(lemmas: int, concurrency: int) -> bool:
+    await init_db()
+    prefix = settings.API_V1_STR
+    names = [f"conc{i}x" for i in range(lemmas)]
+    for lemma in names:
+        await enrichment_cache.set_many({lemma + suffix: enrichment(lemma) for suffix in SUFFIXES}, LANGUAGE)
+
+    transport = httpx.ASGITransport(app=app)
+    statuses = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            started = time.perf_counter()
+            for lemma in names:
+                requests = []
+                for n in range(concurrency):
+                    surface = lemma + SUFFIXES[n % len(SUFFIXES)]
+                    if n % 4 == 3:
+                        requests.append(client.post(
+                            f"{prefix}/words/batch", json={"words": [surface], "language": LANGUAGE}
+                        ))
+                    else:
+                        requests.append(client.post(
+                            f"{prefix}/words/", json={"word": surface, "language": LANGUAGE}
+                        ))
+                for response in await asyncio.gather(*requests):
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            elapsed = time.perf_counter() - started
+
+        async with engine.connect() as conn:
+            counts = (await conn.execute(CHECK, {"language": LANGUAGE})).one()
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+    total = lemmas * concurrency
+    print(f"{total} concurrent adds ({lemmas} lemmas x {concurrency}) in {elapsed:.1f}s, statuses {statuses}")
+    print(f"words: {counts.words}, distinct lemmas: {counts.lemmas}, reviews: {counts.reviews}, "
+          f"misrouted aliases: {counts.misrouted_aliases}")
+    ok = (
+        counts.words == counts.lemmas == counts.reviews == lemmas
+        and counts.misrouted_aliases == 0
+        and set(statuses) == {200}
+    )
+    print("OK: no duplicates" if ok else "FAILED")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lemmas", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.lemmas, args.concurrency)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
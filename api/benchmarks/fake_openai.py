@@ -0,0 +1,183 @@
+"""Local stand-in for the OpenAI chat-completions API.
+
+Answers the enrichment prompts (single-word and batch, streamed or not) with
+canned or generated JSON after a configurable delay (plus a long stall for a
+configurable fraction of requests), and fails a configurable fraction of
+requests. Point the API at it with
+NEKO_OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Usage: uv run python -m benchmarks.fake_openai [--port 8090] [--latency-ms 800] [--jitter-ms 200]
+                                              [--slow-rate 0.05] [--slow-ms 5000]
+                                              [--error-rate 0.02] [--canned words.json]
+
+--canned is a JSON object mapping a word to its enrichment
+({"word": ..., "translation": ..., "examples": [...]}); other words get a
+generated answer.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SINGLE_WORD = re.compile(r'Analyze the .+? word "(.*)"')
+BATCH_WORDS = re.compile(r"Analyze each of these .+? words: (\[.*\])")
+
+
+class FakeLLM:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        canned: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        slow_rate: float = 0.0,
+        slow_ms: float = 0.0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.canned = canned or {}
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def enrichment(self, word: str) -> Dict[str, Any]:
+        if word in self.canned:
+            return self.canned[word]
+        return {
+            "word": word,
+            "translation": f"/{word}/ {word} (fake)",
+            "examples": [
+                {"sentence": f"This is an example with {word}.", "translation": f"这是一个含有 {word} 的例句。"},
+                {"sentence": f"I looked up {word} today.", "translation": f"我今天查了 {word}。"},
+            ],
+        }
+
+    def answer(self, prompt: str) -> str:
+        batch = BATCH_WORDS.search(prompt)
+        if batch:
+            words = json.loads(batch.group(1))
+            return json.dumps({"results": [{"input": w, **self.enrichment(w)} for w in words]}, ensure_ascii=False)
+        single = SINGLE_WORD.search(prompt)
+        return json.dumps(self.enrichment(single.group(1) if single else "unknown"), ensure_ascii=False)
+
+    async def delay(self) -> None:
+        seconds = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if self.random.random() < self.slow_rate:
+            seconds += self.slow_ms / 1000
+        if seconds:
+            await asyncio.sleep(seconds)
+
+
+def create_app(llm: FakeLLM) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": llm.requests, "errors": llm.errors}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        llm.requests += 1
+        await llm.delay()
+        if llm.random.random() < llm.error_rate:
+            llm.errors += 1
+            return JSONResponse(
+                status_code=llm.error_status,
+                content={"error": {"message": "Injected failure", "type": "server_error", "code": None}},
+            )
+
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = llm.answer(prompt)
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": len(prompt) // 4 + len(content) // 4,
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish_reason=None, chunk_usage=None, choices=True) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+            }
+            if chunk_usage is not None:
+                data["usage"] = chunk_usage
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for start in range(0, len(content), 8):
+                yield chunk({"content": content[start:start + 8]})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk({}, chunk_usage=usage, choices=False)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="extra delay of a stalled request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--canned", help="JSON file mapping words to enrichments")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = json.load(f)
+    llm = FakeLLM(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, canned, args.seed,
+        args.slow_rate, args.slow_ms,
+    )
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
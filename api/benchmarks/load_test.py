@@ -0,0 +1,326 @@
+"""Mixed-workload load test against a local fake LLM.
+
+Starts benchmarks.fake_openai as a subprocess and points the API at it, seeds
+a benchmark language with N words and their reviews, then runs a fixed number
+of concurrent workers through the app (in-process) for a set duration. Each
+worker picks one of:
+
+- add: POST /words/ with a new word (one fake LLM call)
+- log: POST /reviews/{id}/log on a random seeded card
+- due: GET /reviews/due for the benchmark language
+
+Reports p50/p95/p99 latency, requests per second and DB round trips per
+request (statements plus BEGIN/COMMIT/ROLLBACK, counted with engine events)
+for each operation, and writes everything to a JSON file together with the
+current commit so runs can be compared. --compare prints the change against
+an earlier result file.
+
+Usage: uv run python -m benchmarks.load_test [--words 10000] [--concurrency 16] [--duration 30]
+                                            [--mix add=1,log=4,due=5] [--llm-latency-ms 800]
+                                            [--llm-error-rate 0.0] [--output load_test.json]
+                                            [--compare previous.json]
+Writes to the configured database; seeded and created rows are deleted at the end.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+LANGUAGE = "bench-load"
+
+# Round trips of the request currently running in this task, if any
+round_trips: contextvars.ContextVar = contextvars.ContextVar("round_trips", default=None)
+
+
+def count_round_trip(conn, *args, **kwargs):
+    counter = round_trips.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def count_transaction_round_trip(conn, *args, **kwargs):
+    # Autocommit connections still fire begin/commit events but send nothing
+    if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+        count_round_trip(conn)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_llm(port: int, args) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_openai",
+        "--port", str(port),
+        "--latency-ms", str(args.llm_latency_ms),
+        "--jitter-ms", str(args.llm_jitter_ms),
+        "--error-rate", str(args.llm_error_rate),
+        "--seed", str(args.seed),
+        *(["--canned", args.llm_canned] if args.llm_canned else []),
+    ])
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1.0).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake LLM server did not start")
+
+
+def parse_mix(value: str):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("add", "log", "due"):
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (expected add, log, due)")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentiles(timings):
+    timings.sort()
+
+    def pct(p):
+        return round(timings[min(len(timings) - 1, int(len(timings) * p))], 2)
+
+    return {"p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Operation:
+    def __init__(self):
+        self.timings = []
+        self.round_trips = 0
+        self.statuses = {}
+
+    def record(self, elapsed_ms: float, status: int, trips: int):
+        self.timings.append(elapsed_ms)
+        self.round_trips += trips
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    def summary(self, elapsed: float):
+        count = len(self.timings)
+        errors = sum(n for status, n in self.statuses.items() if not status.startswith("2"))
+        return {
+            "requests": count,
+            "errors": errors,
+            "statuses": self.statuses,
+            "rps": round(count / elapsed, 1),
+            **(percentiles(self.timings) if count else {}),
+            "db_round_trips_per_request": round(self.round_trips / count, 2) if count else None,
+        }
+
+
+async def run(args, llm_url: str):
+    # Settings are read at import time, so the app is imported only once
+    # NEKO_OPENAI_BASE_URL points at the fake server.
+    from sqlalchemy import event, text
+
+    from app.core.config import settings
+    from app.core.db import engine, init_db, replica_engine
+    from app.main import app
+
+    seed_words = text("""
+        INSERT INTO words (id, word, language, translation, examples, created_at)
+        SELECT gen_random_uuid(), 'load-' || g, :language, 'bench', '[]', now()
+        FROM generate_series(1, :rows) AS g
+    """)
+    seed_reviews = text("""
+        INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at)
+        SELECT id, language, 1, 2.5, 1, now() - interval '10 days' + random() * interval '30 days'
+        FROM words WHERE language = :language
+    """)
+
+    await init_db()
+    print(f"Seeding {args.words} words and reviews...")
+    async with engine.begin() as conn:
+        await conn.execute(seed_words, {"rows": args.words, "language": LANGUAGE})
+        await conn.execute(seed_reviews, {"language": LANGUAGE})
+        word_ids = (await conn.execute(
+            text("SELECT id FROM words WHERE language = :language"), {"language": LANGUAGE}
+        )).scalars().all()
+    async with engine.connect() as conn:
+        await conn.execute(text("COMMIT"))
+        await conn.execute(text("ANALYZE words"))
+        await conn.execute(text("ANALYZE reviews"))
+
+    engines = [e.sync_engine for e in (engine, replica_engine) if e is not None]
+    listeners = [
+        ("before_cursor_execute", count_round_trip),
+        ("begin", count_transaction_round_trip),
+        ("commit", count_transaction_round_trip),
+        ("rollback", count_transaction_round_trip),
+    ]
+    for name, listener in listeners:
+        for counted in engines:
+            event.listen(counted, name, listener)
+
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    operations = {name: Operation() for name in names}
+    run_id = uuid.uuid4().hex[:8]
+    prefix = settings.API_V1_STR
+
+    def request_for(name: str, n: int):
+        if name == "add":
+            return "POST", f"{prefix}/words/", {"json": {"word": f"load{run_id}x{n}", "language": LANGUAGE}}
+        if name == "log":
+            grade = rng.choice(["again", "hard", "good", "good", "easy"])
+            return "POST", f"{prefix}/reviews/{rng.choice(word_ids)}/log", {"json": {"grade": grade}}
+        return "GET", f"{prefix}/reviews/due", {"params": {"language": LANGUAGE, "limit": 50}}
+
+    sent = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal sent
+        while time.perf_counter() < deadline and (not args.requests or sent < args.requests):
+            sent += 1
+            name = rng.choices(names, weights)[0]
+            method, url, kwargs = request_for(name, sent)
+            counter = [0]
+            token = round_trips.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except Exception:
+                status = 599
+            finally:
+                round_trips.reset(token)
+            operations[name].record((time.perf_counter() - start) * 1000, status, counter[0])
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+            print(f"Running {args.concurrency} workers for up to {args.duration}s (mix {args.mix})...")
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        for name, listener in listeners:
+            for counted in engines:
+                event.remove(counted, name, listener)
+        async with engine.begin() as conn:
+            ids = "SELECT id FROM words WHERE language = :language"
+            for table in ("review_events", "reviews", "word_aliases"):
+                await conn.execute(text(f"DELETE FROM {table} WHERE word_id IN ({ids})"), {"language": LANGUAGE})
+            await conn.execute(text("DELETE FROM words WHERE language = :language"), {"language": LANGUAGE})
+            await conn.execute(text("DELETE FROM enrichment_cache WHERE language = :language"), {"language": LANGUAGE})
+            await conn.execute(text("DELETE FROM review_forecast WHERE language = :language"), {"language": LANGUAGE})
+        await engine.dispose()
+
+    total = sum(len(op.timings) for op in operations.values())
+    all_timings = [t for op in operations.values() for t in op.timings]
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "config": {
+            "words": args.words,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+            "mix": args.mix,
+            "seed": args.seed,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_error_rate": args.llm_error_rate,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "total": {
+            "requests": total,
+            "rps": round(total / elapsed, 1),
+            **(percentiles(all_timings) if all_timings else {}),
+            "db_round_trips_per_request": (
+                round(sum(op.round_trips for op in operations.values()) / total, 2) if total else None
+            ),
+        },
+        "operations": {name: op.summary(elapsed) for name, op in operations.items()},
+        "llm": httpx.get(f"{llm_url}/stats").json(),
+    }
+
+
+def compare(result, baseline):
+    print(f"\nChange vs. {baseline.get('commit', '?')}:")
+    rows = [("total", result["total"], baseline.get("total", {}))]
+    rows += [
+        (name, op, baseline.get("operations", {}).get(name, {}))
+        for name, op in result["operations"].items()
+    ]
+    for name, now, before in rows:
+        changes = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "db_round_trips_per_request"):
+            if now.get(key) is None or not before.get(key):
+                continue
+            changes.append(f"{key} {before[key]} -> {now[key]} ({(now[key] - before[key]) / before[key]:+.0%})")
+        print(f"  {name:6} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+    parser.add_argument("--mix", type=parse_mix, default="add=1,log=4,due=5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-canned", help="JSON file of canned enrichments, see benchmarks.fake_openai")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    port = free_port()
+    llm_url = f"http://127.0.0.1:{port}"
+    llm = start_fake_llm(port, args)
+    os.environ.update({
+        "NEKO_LLM_PROVIDER": "openai",
+        "NEKO_OPENAI_BASE_URL": f"{llm_url}/v1",
+        "NEKO_OPENAI_API_KEY": "fake",
+    })
+    try:
+        result = asyncio.run(run(args, llm_url))
+    finally:
+        llm.terminate()
+        llm.wait()
+
+    print(json.dumps(result, indent=2))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from .local_store import LocalStore
+from .sync import sync
+
+
+class BackgroundSync:
+    """Syncs the local copy in the background while a review session runs.
+
+    Grades reach the server a few at a time during the session (after
+    `batch_size` grades or every `interval` seconds), and cards added or
+    graded on other devices are pulled in, so the reviewer never waits on the
+    network between cards. The thread opens its own connection to the store
+    (SQLite connections can't be shared between threads). Network errors are
+    kept in `last_error`; the grades stay in the outbox for the next sync.
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        open_store: Callable[[], LocalStore],
+        legacy_pending: Optional[Path] = None,
+        batch_size: int = 20,
+        interval: float = 10.0,
+    ):
+        self.client = client
+        self.open_store = open_store
+        self.legacy_pending = legacy_pending
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stale = 0
+        self.last_error: Optional[str] = None
+        self._graded = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="background-sync", daemon=True)
+
+    def start(self) -> None:
+        """Start the thread; its first pass syncs right away."""
+        self._wakeup.set()
+        self._thread.start()
+
+    def graded(self) -> None:
+        """Note a grade stored locally; a full batch is sent without waiting for the interval."""
+        with self._lock:
+            self._graded += 1
+            full = self._graded >= self.batch_size
+            if full:
+                self._graded = 0
+        if full:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        """Stop the thread after its current pass."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        store = self.open_store()
+        try:
+            while not self._stopped.is_set():
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                if self._stopped.is_set():
+                    return
+                try:
+                    result = sync(self.client, store, legacy_pending=self.legacy_pending)
+                    self.stale += result.stale
+                    self.last_error = None
+                except httpx.HTTPError as e:
+                    self.last_error = str(e)
+        finally:
+            store.close()
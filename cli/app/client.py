@@ -0,0 +1,29 @@
+import httpx
+from typing import Optional
+from .config import settings
+
+_client: Optional[httpx.Client] = None
+
+
+def get_client() -> httpx.Client:
+    """The process-wide API client.
+
+    One connection pool (HTTP/2 when the server offers it over TLS, keep-alive
+    HTTP/1.1 otherwise) is reused by every command, so no call after the first
+    pays for a new connection.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            base_url=settings.API_BASE_URL,
+            http2=True,
+            timeout=httpx.Timeout(10.0, read=60.0),
+        )
+    return _client
+
+
+def close_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
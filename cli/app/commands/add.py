@@ -1,23 +1,36 @@
+import json
+import sys
 import typer
 import httpx
+from pathlib import Path
 from rich.console import Console
 from rich import print
 from rich.markup import escape
-from typing import Optional
+from rich.progress import Progress
+from typing import List, Optional
+from ..client import get_client
 from ..config import settings
 
 console = Console()
 
+# Words sent per POST /words/batch request; the server enriches them concurrently
+BATCH_CHUNK_SIZE = 25
+
 
 def add_word(
     word: Optional[str] = typer.Argument(None, help="Word or phrase to add"),
     language: str = typer.Option(settings.DEFAULT_LANGUAGE, "--tag", "-t", help="Language tag"),
+    file: Optional[Path] = typer.Option(
+        None, "--file", "-f", help="Add every line of a file ('-' reads stdin)", allow_dash=True
+    ),
 ):
     """
     Add a word or phrase to Neko Words.
     If no word provided, enters interactive mode.
     """
-    if word:
+    if file:
+        _add_words_from_file(file, language)
+    elif word:
         _add_single_word(word, language)
     else:
         # Interactive mode
@@ -35,26 +48,113 @@ def add_word(
         except KeyboardInterrupt:
             console.print("\nBye!")
 
+def _iter_sse(response: httpx.Response):
+    """Yield (event, data) pairs from a text/event-stream response."""
+    event, data = "message", []
+    for line in response.iter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
 def _add_single_word(word: str, language: str):
-    url = f"{settings.API_BASE_URL}/words/"
     try:
-        with console.status(f"Adding '{word}'...", spinner="dots"):
-            response = httpx.post(url, json={"word": word, "language": language}, timeout=30.0)
-            
-        if response.status_code == 200:
-            data = response.json()
-            console.print(f"[green]✓ {data['word']}[/green]: {escape(data['translation'])}")
-            console.print(f"  Example: {escape(data['examples'][0]['sentence'])}")
-            console.print(f"  Translation: {escape(data['examples'][0]['translation'])}")
-        elif response.status_code == 400:
-            console.print(f"[yellow]! {word} already exists.[/yellow]")
-        else:
-            console.print(f"[red]Error adding {word}: {response.text}[/red]")
-            
+        status = console.status(f"Adding '{word}'...", spinner="dots")
+        status.start()
+        lemma, shown_example = word, False
+        try:
+            with get_client().stream(
+                "POST", "/words/stream", json={"word": word, "language": language}, timeout=30.0
+            ) as response:
+                if response.status_code != 200:
+                    response.read()
+                    status.stop()
+                    console.print(f"[red]Error adding {word}: {response.text}[/red]")
+                    return
+
+                # Render each part of the enrichment as soon as the server sends it
+                for event, data in _iter_sse(response):
+                    if event == "lemma":
+                        lemma = data["word"]
+                        status.update(f"Adding '{lemma}'...")
+                    elif event == "translation":
+                        status.stop()
+                        console.print(f"[green]✓ {escape(lemma)}[/green]: {escape(data['translation'])}")
+                    elif event == "example" and not shown_example:
+                        shown_example = True
+                        status.stop()
+                        console.print(f"  Example: {escape(data['sentence'])}")
+                        console.print(f"  Translation: {escape(data['translation'])}")
+                    elif event == "done":
+                        if data["status"] == "reset":
+                            console.print("  [dim](already saved - review reset)[/dim]")
+                    elif event == "error":
+                        status.stop()
+                        console.print(f"[red]Error adding {word}: {escape(data['detail'])}[/red]")
+        finally:
+            status.stop()
+
     except httpx.RequestError as e:
         console.print(f"[red]Connection error: {e}[/red]")
     except KeyError as e:
         console.print(f"[red]Data error: Missing key {e} in server response[/red]")
-        console.print(f"Response: {response.text}")
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
+
+def _read_words(file: Path) -> List[str]:
+    if str(file) == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = file.read_text(encoding="utf-8").splitlines()
+    # One word or phrase per line; blank lines and # comments are ignored
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _add_words_from_file(file: Path, language: str):
+    try:
+        words = _read_words(file)
+    except OSError as e:
+        console.print(f"[red]Could not read {file}: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not words:
+        console.print("[yellow]No words found.[/yellow]")
+        return
+
+    client = get_client()
+    counts = {"created": 0, "reset": 0, "failed": 0}
+    failures = []
+
+    with Progress(console=console) as progress:
+        task = progress.add_task(f"Adding {len(words)} words ({language})", total=len(words))
+        for start in range(0, len(words), BATCH_CHUNK_SIZE):
+            chunk = words[start:start + BATCH_CHUNK_SIZE]
+            try:
+                response = client.post("/words/batch", json={"words": chunk, "language": language}, timeout=300.0)
+                if response.status_code != 200:
+                    raise RuntimeError(response.text)
+                results = response.json()
+            except Exception as e:
+                results = [{"input": w, "status": "failed", "error": str(e)} for w in chunk]
+
+            for item in results:
+                counts[item["status"]] += 1
+                if item["status"] == "failed":
+                    failures.append(item)
+                else:
+                    progress.console.print(
+                        f"[green]✓ {escape(item['word']['word'])}[/green]: {escape(item['word']['translation'])}"
+                    )
+            progress.advance(task, len(chunk))
+
+    console.print(
+        f"[bold]Done:[/bold] {counts['created']} added, {counts['reset']} already known (reset), "
+        f"{counts['failed']} failed"
+    )
+    for item in failures:
+        console.print(f"[red]✗ {escape(item['input'])}: {escape(str(item.get('error')))}[/red]")
@@ -0,0 +1,79 @@
+import gzip
+import os
+import sys
+import typer
+import httpx
+from pathlib import Path
+from rich.console import Console
+from typing import Optional
+from ..client import close_client, get_client
+
+console = Console(stderr=True)
+
+
+def export_deck(
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="File to write ('-' for stdout; a .gz name is written gzipped)",
+        allow_dash=True,
+    ),
+    format: str = typer.Option("ndjson", "--format", "-f", help="ndjson or csv"),
+    language: Optional[str] = typer.Option(None, "--tag", "-t", help="Only this language (default: all)"),
+):
+    """
+    Export every word with its review state (backup / analysis).
+    """
+    if format not in ("ndjson", "csv"):
+        console.print(f"[red]Unknown format '{format}' (expected ndjson or csv)[/red]")
+        raise typer.Exit(1)
+    output = output or Path(f"nekowords-{language or 'all'}.{format}")
+    params = {"format": format, **({"language": language} if language else {})}
+
+    try:
+        with get_client().stream("GET", "/export", params=params, timeout=httpx.Timeout(10.0, read=300.0)) as response:
+            if response.status_code != 200:
+                response.read()
+                console.print(f"[red]Export failed: {response.text}[/red]")
+                raise typer.Exit(1)
+            with console.status("Exporting...", spinner="dots"):
+                written = _write(response, output)
+    except httpx.HTTPError as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        raise typer.Exit(1)
+    finally:
+        close_client()
+
+    if str(output) != "-":
+        console.print(f"[green]✓ Exported[/green] {written / 1e6:.1f} MB to {output}")
+
+
+def _write(response: httpx.Response, output: Path) -> int:
+    """Copy the body to `output` as it arrives; returns the bytes written.
+
+    A gzipped response goes to a .gz file as is, without decompressing it.
+    Files are written next to the target and renamed at the end, so a failed
+    export never leaves a truncated file behind.
+    """
+    if str(output) == "-":
+        written = 0
+        for chunk in response.iter_bytes():
+            sys.stdout.buffer.write(chunk)
+            written += len(chunk)
+        sys.stdout.buffer.flush()
+        return written
+
+    compressed = output.suffix == ".gz"
+    partial = output.with_name(output.name + ".part")
+    try:
+        if compressed and response.headers.get("content-encoding") == "gzip":
+            with open(partial, "wb") as f:
+                for chunk in response.iter_raw():
+                    f.write(chunk)
+        else:
+            with (gzip.open(partial, "wb") if compressed else open(partial, "wb")) as f:
+                for chunk in response.iter_bytes():
+                    f.write(chunk)
+        os.replace(partial, output)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return output.stat().st_size
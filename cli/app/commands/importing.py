@@ -0,0 +1,60 @@
+import typer
+import httpx
+from pathlib import Path
+from rich.console import Console
+from typing import Iterator
+from ..client import close_client, get_client
+
+console = Console()
+
+FORMATS = ("auto", "csv", "tsv", "anki")
+
+
+def _chunks(path: Path, size: int = 64 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def import_deck(
+    file: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV/TSV file or Anki plain-text export"),
+    format: str = typer.Option("auto", "--format", "-f", help="auto, csv, tsv or anki"),
+    language: str = typer.Option("en", "--tag", "-t", help="Language of rows that don't name one"),
+):
+    """
+    Import words from a CSV/TSV file or an Anki "Notes in Plain Text" export.
+
+    Rows with a translation are added as they are; rows with only a word are
+    queued for enrichment. Words already in the deck are skipped.
+    """
+    if format not in FORMATS:
+        console.print(f"[red]Unknown format '{format}' (expected {', '.join(FORMATS)})[/red]")
+        raise typer.Exit(1)
+
+    try:
+        with console.status(f"Importing {file.name}...", spinner="dots"):
+            response = get_client().post(
+                "/words/import",
+                params={"format": format, "language": language},
+                content=_chunks(file),
+                timeout=httpx.Timeout(10.0, read=600.0),
+            )
+        if response.status_code != 200:
+            console.print(f"[red]Import failed: {response.text}[/red]")
+            raise typer.Exit(1)
+    except httpx.HTTPError as e:
+        console.print(f"[red]Import failed: {e}[/red]")
+        raise typer.Exit(1)
+    finally:
+        close_client()
+
+    result = response.json()
+    console.print(f"[green]✓ Imported[/green] {result['created']} words from {result['rows']} rows")
+    if result["queued"]:
+        console.print(f"  {result['queued']} words without a translation queued for enrichment")
+    if result["skipped"]:
+        console.print(f"  {result['skipped']} already in the deck (or queued)")
+    if result["duplicates"]:
+        console.print(f"  {result['duplicates']} duplicate rows ignored")
+    if result["invalid"]:
+        console.print(f"  [yellow]{result['invalid']} invalid rows skipped[/yellow]")
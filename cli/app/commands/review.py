@@ -1,10 +1,13 @@
 import typer
-import httpx
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.markup import escape
 from rich.panel import Panel
+from ..background_sync import BackgroundSync
 from ..config import settings
+from ..client import close_client, get_client
+from ..local_store import LocalStore, open_store
+from .sync import run_sync
 import sys
 
 console = Console()
@@ -19,37 +22,64 @@ GRADES = {
 
 def review(
     language: str = typer.Option(settings.DEFAULT_LANGUAGE, "--tag", "-t", help="Language tag"),
-    limit: int = typer.Option(50, help="Max words to review"),
+    limit: int = typer.Option(50, help="Max words to review (0 = until nothing is due)"),
+    offline: bool = typer.Option(False, "--offline", help="Don't sync; review the local copy only"),
 ):
     """
     Start a review session.
     """
+    # Cards come from the local copy and grades are stored locally, so the
+    # session itself never waits on the network
+    store = open_store()
+    background = None
     try:
-        # Fetch reviews
-        url = f"{settings.API_BASE_URL}/reviews/due"
-        response = httpx.get(url, params={"limit": limit, "language": language}, timeout=10.0)
-        
-        if response.status_code != 200:
-             console.print(f"[red]Error fetching reviews: {response.text}[/red]")
-             return
-             
-        items = response.json()
-        if not items:
-            console.print("[green]No words to review! 🎉[/green]")
+        if not offline:
+            if store.word_count:
+                # Start right away; grades are sent and changes fetched meanwhile
+                background = BackgroundSync(
+                    get_client(), open_store, legacy_pending=settings.DATA_DIR / "pending_reviews.jsonl"
+                )
+                background.start()
+            else:
+                run_sync(store)
+        if not store.word_count:
+            console.print("[yellow]No words stored locally yet. Run `nekowords sync` while online.[/yellow]")
             return
-            
-        console.print(f"[bold]Starting review for {len(items)} words...[/bold]")
-        console.print("Controls: Space (Next/Reveal), 1-4 (Grade), Enter (Skip), Ctrl+C (Exit)")
-        
-        for item in items:
-            _review_loop(item)
-            
-    except httpx.ConnectError:
-        console.print("[red]Could not connect to backend.[/red]")
+
+        reviewed = 0
+        seen = set()
+        while not limit or reviewed < limit:
+            item = store.next_due(language, exclude=seen)
+            if item is None:
+                break
+            if reviewed == 0:
+                console.print("[bold]Starting review...[/bold]")
+                console.print("Controls: Space (Next/Reveal), 1-4 (Grade), Enter (Skip), Ctrl+C (Exit)")
+            seen.add(item["word"]["id"])
+            _review_loop(item, store)
+            reviewed += 1
+            if background is not None:
+                background.graded()
+
+        if reviewed == 0:
+            console.print("[green]No words to review! 🎉[/green]")
+        else:
+            console.print(f"[green]Reviewed {reviewed} words. 🎉[/green]")
+
     except KeyboardInterrupt:
         console.print("\n[yellow]Review paused.[/yellow]")
+    finally:
+        if background is not None:
+            background.close()
+            if background.stale:
+                console.print(f"[dim]{background.stale} grades were older than a review from another device "
+                              f"and were dropped.[/dim]")
+        if not offline and store.pending:
+            run_sync(store, "Saving grades...")
+        store.close()
+        close_client()
 
-def _review_loop(item: dict):
+def _review_loop(item: dict, store: LocalStore):
     word_data = item['word']
     word_id = word_data['id']
     
@@ -86,14 +116,8 @@ def _review_loop(item: dict):
              
         if grade_input in GRADES:
             grade = GRADES[grade_input]
-            _submit_review(word_id, grade)
+            # Rescheduled locally; sent to the server on the next sync
+            store.record_grade(word_id, grade)
             break
         else:
             console.print("[red]Invalid grade. Please enter 1-4.[/red]")
-
-def _submit_review(word_id: str, grade: str):
-    url = f"{settings.API_BASE_URL}/reviews/{word_id}/log"
-    try:
-        httpx.post(url, json={"grade": grade})
-    except Exception as e:
-        console.print(f"[red]Failed to submit review: {e}[/red]")
@@ -0,0 +1,43 @@
+import httpx
+from rich.console import Console
+from ..client import close_client, get_client
+from ..config import settings
+from ..local_store import LocalStore, open_store
+from ..sync import SyncResult, sync
+
+console = Console()
+
+
+def sync_command():
+    """
+    Sync the local copy with the server (send grades, fetch changes).
+    """
+    store = open_store()
+    try:
+        result = run_sync(store)
+        if result is not None:
+            console.print(
+                f"[green]✓ Synced[/green]: sent {result.pushed} grades, "
+                f"received {result.words} words and {result.reviews} reviews"
+            )
+            if result.stale:
+                console.print(f"[dim]{result.stale} grades were older than a review from another device "
+                              f"and were dropped.[/dim]")
+    finally:
+        store.close()
+        close_client()
+
+
+def run_sync(store: LocalStore, message: str = "Syncing...") -> SyncResult:
+    """Sync with a spinner. Returns None (and says so) when the server can't be reached."""
+    try:
+        with console.status(message, spinner="dots"):
+            return sync(get_client(), store, legacy_pending=settings.DATA_DIR / "pending_reviews.jsonl")
+    except httpx.HTTPStatusError as e:
+        console.print(f"[red]Sync failed: {e.response.text}[/red]")
+    except httpx.HTTPError as e:
+        console.print(f"[yellow]Offline ({e}); working from the local copy.[/yellow]")
+    pending = store.pending
+    if pending:
+        console.print(f"[dim]{pending} grades are saved locally and will be sent on the next sync.[/dim]")
+    return None
@@ -24,5 +24,10 @@ class Settings:
     def DEFAULT_LANGUAGE(self) -> str:
         return os.environ.get("NEKO_DEFAULT_LANGUAGE", "en")
 
+    @property
+    def DATA_DIR(self) -> Path:
+        """Local state (e.g. grades not yet delivered to the server)."""
+        return Path(os.environ.get("NEKO_DATA_DIR", Path.home() / ".nekowords"))
+
 
 settings = Settings()
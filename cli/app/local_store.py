@@ -0,0 +1,209 @@
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .config import settings
+from .scheduling import grade_card
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id TEXT PRIMARY KEY,
+    word TEXT NOT NULL,
+    language TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    examples TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    word_id TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    ease_factor REAL NOT NULL,
+    streak INTEGER NOT NULL,
+    next_review_at TEXT NOT NULL,
+    last_reviewed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_reviews_due ON reviews (language, next_review_at);
+-- Grades made locally that the server has not acknowledged yet
+CREATE TABLE IF NOT EXISTS outbox (
+    idempotency_key TEXT PRIMARY KEY,
+    word_id TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    reviewed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(value) -> Optional[str]:
+    """Naive UTC ISO text with fixed precision, so timestamps compare as strings."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+class LocalStore:
+    """SQLite mirror of the server's words and reviews.
+
+    Reviewing reads and grades cards here only; grades are queued in the
+    outbox and reconciled by `sync`. Rows from the server never overwrite a
+    card that still has grades in the outbox.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # Readers don't wait for the background sync's writes (see BackgroundSync)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- Reviewing -------------------------------------------------------
+
+    def next_due(self, language: str, exclude: Iterable[str] = ()) -> Optional[dict]:
+        """The hardest due card not in `exclude`, shaped like a GET /reviews/due item."""
+        row = self.conn.execute(
+            """
+            SELECT r.*, w.word, w.translation, w.examples, w.created_at
+            FROM reviews r JOIN words w ON w.id = r.word_id
+            WHERE r.language = ? AND r.next_review_at <= ?
+              AND r.word_id NOT IN (SELECT value FROM json_each(?))
+            ORDER BY r.streak, r.ease_factor, r.interval, r.word_id
+            LIMIT 1
+            """,
+            (language, _timestamp(utcnow()), json.dumps(list(exclude))),
+        ).fetchone()
+        if row is None:
+            return None
+        review = {key: row[key] for key in (
+            "word_id", "language", "interval", "ease_factor", "streak", "next_review_at", "last_reviewed_at"
+        )}
+        word = {
+            "id": row["word_id"],
+            "word": row["word"],
+            "language": row["language"],
+            "translation": row["translation"],
+            "examples": json.loads(row["examples"]),
+            "created_at": row["created_at"],
+        }
+        return {"review": review, "word": word}
+
+    def record_grade(self, word_id: str, grade: str) -> None:
+        """Reschedule the card locally and queue the grade for the server."""
+        now = utcnow()
+        with self.conn:
+            card = self.conn.execute("SELECT * FROM reviews WHERE word_id = ?", (word_id,)).fetchone()
+            if card is None:
+                return
+            state = grade_card(dict(card), grade, now)
+            self.conn.execute(
+                "UPDATE reviews SET interval = ?, ease_factor = ?, streak = ?, next_review_at = ?, "
+                "last_reviewed_at = ? WHERE word_id = ?",
+                (state["interval"], state["ease_factor"], state["streak"],
+                 _timestamp(state["next_review_at"]), _timestamp(state["last_reviewed_at"]), word_id),
+            )
+            self.conn.execute(
+                "INSERT INTO outbox (idempotency_key, word_id, grade, reviewed_at) VALUES (?, ?, ?, ?)",
+                (uuid.uuid4().hex, word_id, grade, now.replace(tzinfo=timezone.utc).isoformat()),
+            )
+
+    # --- Sync ------------------------------------------------------------
+
+    def pending_grades(self, limit: int) -> List[dict]:
+        rows = self.conn.execute(
+            "SELECT * FROM outbox ORDER BY reviewed_at LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    @property
+    def pending(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM outbox").fetchone()[0]
+
+    @property
+    def word_count(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM words").fetchone()[0]
+
+    def queue_grades(self, items: List[dict]) -> None:
+        """Add grades made elsewhere (e.g. an older CLI's pending file) to the outbox."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, word_id, grade, reviewed_at) "
+                "VALUES (:idempotency_key, :word_id, :grade, :reviewed_at)",
+                items,
+            )
+
+    def apply_push(self, keys: List[str], reviews: List[dict]) -> None:
+        """Drop acknowledged grades and adopt the server's state of those cards."""
+        with self.conn:
+            self.conn.executemany("DELETE FROM outbox WHERE idempotency_key = ?", [(key,) for key in keys])
+            self._upsert_reviews(reviews)
+
+    def apply_changes(self, words: List[dict], reviews: List[dict], cursor: str) -> None:
+        """Store one page of GET /sync/changes together with the cursor after it."""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO words (id, word, language, translation, examples, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    word = excluded.word, language = excluded.language,
+                    translation = excluded.translation, examples = excluded.examples
+                """,
+                [
+                    (w["id"], w["word"], w["language"], w["translation"],
+                     json.dumps(w["examples"], ensure_ascii=False), _timestamp(w.get("created_at")))
+                    for w in words
+                ],
+            )
+            self._upsert_reviews(reviews)
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('cursor', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (cursor,),
+            )
+
+    @property
+    def cursor(self) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        return row[0] if row else None
+
+    def _upsert_reviews(self, reviews: List[dict]) -> None:
+        # Cards with unsent grades keep their local state; the server's answer
+        # to the push of those grades settles them.
+        self.conn.executemany(
+            """
+            INSERT INTO reviews (word_id, language, interval, ease_factor, streak, next_review_at, last_reviewed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (word_id) DO UPDATE SET
+                language = excluded.language, interval = excluded.interval,
+                ease_factor = excluded.ease_factor, streak = excluded.streak,
+                next_review_at = excluded.next_review_at, last_reviewed_at = excluded.last_reviewed_at
+            WHERE NOT EXISTS (SELECT 1 FROM outbox WHERE outbox.word_id = excluded.word_id)
+            """,
+            [
+                (r["word_id"], r["language"], r["interval"], r["ease_factor"], r["streak"],
+                 _timestamp(r["next_review_at"]), _timestamp(r.get("last_reviewed_at")))
+                for r in reviews
+            ],
+        )
+
+
+def open_store() -> LocalStore:
+    return LocalStore(settings.DATA_DIR / "nekowords.db")
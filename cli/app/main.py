@@ -9,9 +9,15 @@ app = typer.Typer(
 
 from .commands.add import add_word
 from .commands.review import review
+from .commands.sync import sync_command
+from .commands.export import export_deck
+from .commands.importing import import_deck
 
 app.command(name="add")(add_word)
 app.command(name="review")(review)
+app.command(name="sync")(sync_command)
+app.command(name="export")(export_deck)
+app.command(name="import")(import_deck)
 
 
 @app.callback()
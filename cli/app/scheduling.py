@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+# Same SM-2 rules as the server with its default parameters
+# (api/app/services/scheduler.py), so a card graded offline ends up where the
+# server would have put it. The server's state wins on the next sync anyway.
+
+QUALITY = {"again": 0, "hard": 2, "good": 4, "easy": 5}
+MAX_INTERVAL = 36500
+
+
+def grade_card(card: dict, grade: str, now: datetime) -> dict:
+    """Return the review state after grading `card` at `now` (naive UTC).
+
+    `card` has interval, ease_factor and streak; it is not modified.
+    """
+    interval = card["interval"]
+    ease_factor = card["ease_factor"]
+    streak = card["streak"]
+    quality = QUALITY.get(grade, 3)
+
+    if quality < 3:
+        streak = 0
+        interval = 1
+        next_review_at = now + timedelta(minutes=1)
+    else:
+        if streak == 0:
+            interval = 1
+        elif streak == 1:
+            interval = 6
+        else:
+            interval = min(int(interval * ease_factor), MAX_INTERVAL)
+
+        streak += 1
+        ease_factor = max(1.3, ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+        next_review_at = now + timedelta(days=interval)
+
+    return {
+        "interval": interval,
+        "ease_factor": ease_factor,
+        "streak": streak,
+        "next_review_at": next_review_at,
+        "last_reviewed_at": now,
+    }
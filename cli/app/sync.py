@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import httpx
+
+from .local_store import LocalStore
+
+# Grades per POST /sync/push (the server accepts up to 1000)
+PUSH_BATCH_SIZE = 500
+# Rows per table per GET /sync/changes page
+PULL_PAGE_SIZE = 1000
+
+
+class SyncResult:
+    def __init__(self):
+        self.pushed = 0
+        self.stale = 0
+        self.words = 0
+        self.reviews = 0
+
+
+def sync(client: httpx.Client, store: LocalStore, legacy_pending: Path = None) -> SyncResult:
+    """Push queued grades, then pull everything that changed since the last sync.
+
+    Each step is committed locally as soon as the server acknowledged it, so
+    an interrupted sync resumes where it stopped. Raises httpx.HTTPError when
+    the server can't be reached; nothing local is lost in that case.
+    """
+    result = SyncResult()
+    if legacy_pending is not None and legacy_pending.exists():
+        _import_legacy_pending(store, legacy_pending)
+
+    while True:
+        items = store.pending_grades(PUSH_BATCH_SIZE)
+        if not items:
+            break
+        response = client.post("/sync/push", json={"items": items})
+        response.raise_for_status()
+        body = response.json()
+        store.apply_push([item["idempotency_key"] for item in items], body["reviews"])
+        result.pushed += len(items)
+        result.stale += sum(1 for item in body["results"] if item["status"] == "stale")
+
+    cursor = store.cursor
+    while True:
+        params = {"limit": PULL_PAGE_SIZE}
+        if cursor:
+            params["since"] = cursor
+        response = client.get("/sync/changes", params=params)
+        response.raise_for_status()
+        body = response.json()
+        store.apply_changes(body["words"], body["reviews"], body["cursor"])
+        result.words += len(body["words"])
+        result.reviews += len(body["reviews"])
+        cursor = body["cursor"]
+        if not body["has_more"]:
+            return result
+
+
+def _import_legacy_pending(store: LocalStore, path: Path) -> None:
+    """Move grades left in the pending file of older CLI versions into the outbox."""
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    store.queue_grades(items)
+    path.unlink()
@@ -8,6 +8,12 @@ const playPronunciation = (word: string) => {
     audio.play().catch(err => console.error('Audio playback failed:', err));
 };
 
+// Server timestamps are naive UTC
+const isDue = (review: { next_review_at: string }) => {
+    const at = review.next_review_at;
+    return new Date(/(Z|[+-]\d\d:\d\d)$/.test(at) ? at : at + 'Z') <= new Date();
+};
+
 interface ReviewItem {
     word: {
         id: string;
@@ -15,7 +21,7 @@ interface ReviewItem {
         translation: string;
         examples: { sentence: string; translation: string }[];
     };
-    review: any;
+    review: any; // includes `version`, sent back with the grade
 }
 
 export const Review = () => {
@@ -25,7 +31,11 @@ export const Review = () => {
     const [loading, setLoading] = useState(true);
     const [completed, setCompleted] = useState(false);
     const [lastReviewedWordId, setLastReviewedWordId] = useState<string | null>(null);
+    // Card version after the last grade, so an undo only applies to that state
+    const [lastReviewedVersion, setLastReviewedVersion] = useState<number | null>(null);
     const [undoing, setUndoing] = useState(false);
+    // Shown when the server had a newer state of the card than this screen
+    const [conflict, setConflict] = useState<string | null>(null);
     const [hasInteracted, setHasInteracted] = useState(false);
 
     useEffect(() => {
@@ -53,22 +63,58 @@ export const Review = () => {
 
     const currentItem = items[currentIndex];
 
+    // Adopt the server's state of a card, e.g. its new `version`
+    const updateReview = (wordId: string, review: any) => {
+        setItems(items => items.map(item =>
+            item.word.id === wordId ? { ...item, review: { ...item.review, ...review } } : item
+        ));
+    };
+
+    const next = () => {
+        setConflict(null);
+        if (currentIndex < items.length - 1) {
+            setCurrentIndex(currentIndex + 1);
+            setIsRevealed(false);
+        } else {
+            setCompleted(true);
+        }
+    };
+
     const handleGrade = async (grade: string) => {
         if (!currentItem) return;
         setHasInteracted(true);
 
+        const wordId = currentItem.word.id;
+        // The key is the same for a double submit of this card state, so the
+        // grade is applied once
+        const submit = (version: number) => api.post(endpoints.submitReview(wordId), {
+            grade,
+            version,
+            idempotency_key: `${wordId}:${version}`,
+        });
         try {
-            await api.post(endpoints.submitReview(currentItem.word.id), { grade });
-            setLastReviewedWordId(currentItem.word.id);
-
-            if (currentIndex < items.length - 1) {
-                setCurrentIndex(currentIndex + 1);
-                setIsRevealed(false);
+            let res;
+            try {
+                res = await submit(currentItem.review.version);
+            } catch (err: any) {
+                const current = err.response?.status === 409 ? err.response.data.detail.review : null;
+                // /reviews/due may come from a replica a moment behind: a card
+                // that is still due was not graded since, only read stale
+                if (!current || !isDue(current)) throw err;
+                res = await submit(current.version);
+            }
+            setLastReviewedWordId(wordId);
+            setLastReviewedVersion(res.data.version);
+            next();
+        } catch (err: any) {
+            if (err.response?.status === 409) {
+                // Changed elsewhere (another tab or device) since this card was
+                // loaded: take its current state and let the user decide
+                updateReview(wordId, err.response.data.detail.review);
+                setConflict('This card was just reviewed elsewhere. Grade it again to replace that review, or skip it.');
             } else {
-                setCompleted(true);
+                console.error(err);
             }
-        } catch (err) {
-            console.error(err);
         }
     };
 
@@ -77,7 +123,12 @@ export const Review = () => {
 
         setUndoing(true);
         try {
-            await api.post(endpoints.undoReview(lastReviewedWordId));
+            const res = await api.post(endpoints.undoReview(lastReviewedWordId), null, {
+                params: lastReviewedVersion === null ? {} : { version: lastReviewedVersion },
+            });
+            // Grading the card again needs the version after the undo
+            updateReview(lastReviewedWordId, { version: res.data.version });
+            setConflict(null);
 
             // If we completed, go back to the last card
             if (completed) {
@@ -90,12 +141,18 @@ export const Review = () => {
             }
 
             setLastReviewedWordId(null);
-        } catch (err) {
-            console.error('Undo failed:', err);
+        } catch (err: any) {
+            if (err.response?.status === 409) {
+                updateReview(lastReviewedWordId, err.response.data.detail.review);
+                setLastReviewedWordId(null);
+                setConflict('The card was reviewed again elsewhere, so the last review was not undone.');
+            } else {
+                console.error('Undo failed:', err);
+            }
         } finally {
             setUndoing(false);
         }
-    }, [lastReviewedWordId, undoing, completed, currentIndex]);
+    }, [lastReviewedWordId, lastReviewedVersion, undoing, completed, currentIndex]);
 
     // Keyboard shortcut: Ctrl+Z / Cmd+Z
     useEffect(() => {
@@ -186,6 +243,17 @@ export const Review = () => {
                     </div>
                 )}
 
+                {conflict && (
+                    <div style={{ marginTop: '1rem', fontSize: '0.9em', color: 'var(--error)' }}>
+                        {conflict}
+                        {isRevealed && (
+                            <button className="btn" onClick={next} style={{ marginLeft: '0.5rem', padding: '2px 10px' }}>
+                                Skip
+                            </button>
+                        )}
+                    </div>
+                )}
+
                 {!isRevealed ? (
                     <button className="btn" onClick={() => setIsRevealed(true)} style={{ marginTop: '2rem' }}>
                         <Eye size={18} style={{ marginRight: 8, verticalAlign: 'middle' }} /> Reveal Answer